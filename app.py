@@ -1,123 +1,249 @@
-from flask import Flask, send_file, request, jsonify
-from elasticsearch import Elasticsearch
-
-app = Flask(__name__)
-es = Elasticsearch(
-    "https://localhost:9200",
-    basic_auth=("elastic", "AjHJ8y3ZPnroSXIvKK_f"),
-    verify_certs=False
+import json
+import time
+import hashlib
+from flask import Flask, Blueprint, current_app, send_file, request, jsonify, Response, g
+from elasticsearch import Elasticsearch, NotFoundError
+from cache import TTLCache, make_shared_backend
+from suggest import MAX_SUGGESTIONS, DEFAULT_SUGGESTIONS, load_club_suggester, completion_search, completion_values
+from local_search import LocalSearch
+# Bare name like the core/ modules use (local_search put core/ on sys.path), so the
+# app and the batch code share one metrics module.
+from metrics import Metrics, PROMETHEUS_CONTENT_TYPE
+from response_encoding import dumps, choose_encoding, compress, server_timing
+from search_common import (
+    PIT_KEEP_ALIVE, load_config, es_client_kwargs, parse_search_request, from_search_args,
+    cursor_search_args, next_cursor, search_response, facet_list_search, facet_list_values,
+    search_targets, generation_from_mappings
 )
 
-@app.route('/')
+bp = Blueprint("search", __name__)
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.update(load_config(config))
+    app.extensions["elasticsearch"] = make_search_client(app.config)
+    # Facet lists only change when db_to_elastic.py runs; it stamps a new "generation" into
+    # the index _meta, which is part of every cache key, so a sync invalidates old entries.
+    app.extensions["facet_cache"] = TTLCache(
+        maxsize=app.config["FACET_CACHE_SIZE"],
+        ttl=app.config["FACET_CACHE_TTL"],
+        shared=make_shared_backend(app.config["FACET_CACHE_REDIS_URL"])
+    )
+    app.extensions["index_generation"] = {"value": None, "checked_at": 0.0}
+    # Per process: with several gunicorn workers, each one serves its own numbers.
+    app.extensions["metrics"] = Metrics()
+    app.extensions["club_suggester"] = make_club_suggester(app.config)
+    app.register_blueprint(bp)
+    return app
+
+def make_search_client(config):
+    if config["SEARCH_BACKEND"] == "local":
+        return LocalSearch(config["LOCAL_INDEX_PATH"])
+    # The client only connects on the first request, so the app starts even if ES is not up yet.
+    return Elasticsearch(**es_client_kwargs(config))
+
+def make_club_suggester(config):
+    try:
+        return load_club_suggester(config["SUGGEST_AS_OF"])
+    except Exception as e:
+        print(f" Club suggestions unavailable: {e}")
+        return None
+
+def get_es():
+    return current_app.extensions["elasticsearch"]
+
+def index_alias():
+    return current_app.config["INDEX_ALIAS"]
+
+def get_metrics():
+    return current_app.extensions["metrics"]
+
+def endpoint_label():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def es_search(**search_args):
+    # took is the time ES spent on the query; the gap to wall time is network, queueing
+    # and (de)serialisation.
+    start = time.perf_counter()
+    results = get_es().search(**search_args)
+    metrics = get_metrics()
+    metrics.observe("es_search_seconds", time.perf_counter() - start, endpoint=endpoint_label())
+    if "took" in results:
+        metrics.observe("es_took_seconds", results["took"] / 1000, endpoint=endpoint_label())
+    return results
+
+@bp.before_app_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+def encode_response(response):
+    # Bytes on the wire and the time spent serialising and compressing are reported per
+    # request in the Server-Timing header and summed in /metrics. The ETag of a
+    # compressed body is weak, so If-None-Match still matches every encoding.
+    timings = []
+    if "serialize_seconds" in g:
+        timings.append(("serialize", g.pop("serialize_seconds")))
+    size = None if response.direct_passthrough else response.calculate_content_length()
+    encoding = None
+    if response.status_code == 200 and size is not None and "Content-Encoding" not in response.headers:
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), response.mimetype, size)
+    metrics = get_metrics()
+    if encoding:
+        start = time.perf_counter()
+        response.set_data(compress(response.get_data(), encoding))
+        timings.append(("compress", time.perf_counter() - start))
+        response.headers["Content-Encoding"] = encoding
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+        metrics.inc("http_response_uncompressed_bytes_total", size, endpoint=endpoint_label())
+        size = response.calculate_content_length()
+    if size is not None:
+        metrics.inc("http_response_bytes_total", size, endpoint=endpoint_label(), encoding=encoding or "identity")
+    for name, seconds in timings:
+        metrics.observe(f"response_{name}_seconds", seconds, endpoint=endpoint_label())
+    if timings:
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+@bp.after_app_request
+def record_latency(response):
+    response = encode_response(response)
+    start = g.pop("request_start", None)
+    if start is not None:
+        get_metrics().observe(
+            "http_request_seconds", time.perf_counter() - start,
+            endpoint=endpoint_label(), method=request.method, status=response.status_code
+        )
+    return response
+
+def index_generation():
+    generation = current_app.extensions["index_generation"]
+    now = time.monotonic()
+    if generation["value"] is None or now - generation["checked_at"] > current_app.config["GENERATION_CHECK_SECONDS"]:
+        try:
+            generation["value"] = generation_from_mappings(get_es().indices.get_mapping(index=index_alias()))
+        except Exception as e:
+            print(f" Could not read index generation: {e}")
+            generation["value"] = generation["value"] or "unknown"
+        generation["checked_at"] = now
+    return generation["value"]
+
+def cached_facet(key, compute):
+    facet_cache = current_app.extensions["facet_cache"]
+    cache_key = f"{index_generation()}|{key}"
+    cached = facet_cache.get(cache_key)
+    if cached is None:
+        body = json.dumps(compute(), ensure_ascii=False)
+        cached = [body, hashlib.sha1(body.encode("utf-8")).hexdigest()]
+        facet_cache.set(cache_key, cached)
+    body, etag = cached
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    # Answers If-None-Match with an empty 304 when the browser already has this list.
+    return response.make_conditional(request)
+
+@bp.route('/')
 def home():
     return send_file('index.html')
 
-
-@app.route('/search', methods=['POST'])
+@bp.route('/metrics')
+def metrics():
+    return Response(get_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def json_response(payload):
+    start = time.perf_counter()
+    body = dumps(payload)
+    g.serialize_seconds = time.perf_counter() - start
+    return Response(body, mimetype="application/json")
+
+def search_with_cursor(state, facets):
+    es = get_es()
+    search_args = cursor_search_args(state, facets)
+    targets = search_targets(index_alias(), state["filters"])
+    if not state.get("pit"):
+        state["pit"] = es.open_point_in_time(index=targets, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True)["id"]
+    try:
+        results = es_search(pit={"id": state["pit"], "keep_alive": PIT_KEEP_ALIVE}, **search_args)
+    except NotFoundError:
+        # The point in time expired between pages; the stable sort lets us resume on a new one.
+        state["pit"] = es.open_point_in_time(index=targets, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True)["id"]
+        results = es_search(pit={"id": state["pit"], "keep_alive": PIT_KEEP_ALIVE}, **search_args)
+
+    cursor = next_cursor(state, results)
+    if cursor is None:
+        try:
+            es.close_point_in_time(id=results.get("pit_id", state["pit"]))
+        except Exception:
+            pass
+    return results, cursor
+
+@bp.route('/search', methods=['POST'])
 def search():
-    data = request.get_json()
-    query = data.get("query", "")
-    league = data.get("league", "")
-    club = data.get("club", "")
-    source = data.get("source", "")
-    date_sort = data.get("date", "desc")
-    from_value = data.get("from", 0)
-
-    es_query = {
-        "bool": {
-            "must": [
-                {
-                    "multi_match": {
-                        "query": query,
-                        "type": "phrase",
-                        "fields": [
-                            "title^3", "summary^2", "source",
-                            "clubs^5", "leagues^6", "main_league^7"
-                        ]
-                    }
-                }
-            ] if query else [{"match_all": {}}],
-            "filter": []
-        }
-    }
-    if league:
-        es_query["bool"]["filter"].append({"term": {"main_league": league}})
-    if club:
-        es_query["bool"]["filter"].append({"term": {"clubs": club}})
-    if source:
-        es_query["bool"]["filter"].append({"term": {"source": source}})
-
-    results = es.search(
-        index="football_news",
-        query=es_query,
-        sort=[{"date": {"order": date_sort}}],
-        size=20,
-        from_=from_value
-    )
+    # Modes: "from" (plain list, the original API), "paginate": "cursor" / "cursor" for
+    # point-in-time pagination, and "facets": true to add club/league/source counts.
+    try:
+        plan = parse_search_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    hits = results["hits"]["hits"]
+    if "cursor_state" in plan:
+        results, cursor = search_with_cursor(plan["cursor_state"], plan["facets"])
+        return json_response(search_response(plan, results, cursor))
 
-    return jsonify([
-        {
-            "title": hit["_source"].get("title", ""),
-            "summary": hit["_source"].get("summary", ""),
-            "url": hit["_source"].get("url", ""),
-            "source": hit["_source"].get("source", ""),
-            "date": hit["_source"].get("date", ""),
-            "clubs": hit["_source"].get("clubs", []),
-            "leagues": hit["_source"].get("leagues", [])
-        }
-        for hit in hits
-    ])
+    results = es_search(**from_search_args(plan, index_alias()))
+    return json_response(search_response(plan, results))
 
 
-@app.route('/api/clubs', methods=["GET"])
+@bp.route('/api/clubs', methods=["GET"])
 def get_clubs():
     league = request.args.get("league", "")
-    query = {"match_all": {}} if not league else {"term": {"main_league": league}}
-
-    response = es.search(
-        index="football_news",
-        size=0,
-        query=query,
-        aggs={
-            "clubs": {
-                "terms": {"field": "clubs", "size": 1000}
-            }
-        }
-    )
 
-    clubs = [bucket["key"] for bucket in response["aggregations"]["clubs"]["buckets"]]
-    return jsonify(sorted(clubs))
+    def compute():
+        return facet_list_values("clubs", es_search(**facet_list_search("clubs", index_alias(), league)))
+
+    return cached_facet(f"clubs:{league}", compute)
 
 
-@app.route('/api/leagues', methods=["GET"])
+@bp.route('/api/leagues', methods=["GET"])
 def get_leagues():
-    response = es.search(
-        index="football_news",
-        size=0,
-        aggs={
-            "unique_leagues": {
-                "terms": {"field": "leagues", "size": 1000}
-            }
-        }
-    )
+    def compute():
+        return facet_list_values("leagues", es_search(**facet_list_search("leagues", index_alias())))
 
-    leagues = [bucket["key"] for bucket in response["aggregations"]["unique_leagues"]["buckets"]]
-    return jsonify(sorted(leagues))
+    return cached_facet("leagues", compute)
 
-@app.route('/api/sources')
+@bp.route('/api/sources')
 def get_sources():
-    body = {
-        "size": 0,
-        "aggs": {
-            "sources": {
-                "terms": {"field": "source", "size": 1000}
-            }
-        }
-    }
-    res = es.search(index='football_news', body=body)
-    sources = [bucket['key'] for bucket in res['aggregations']['sources']['buckets']]
-    return jsonify(sources)
+    def compute():
+        return facet_list_values("sources", es_search(**facet_list_search("sources", index_alias())))
+
+    return cached_facet("sources", compute)
+
+@bp.route('/api/suggest')
+def suggest():
+    # Club picker autocomplete: ranked prefix matches over club names and aliases, answered
+    # from the in-memory trie, so typing never triggers a terms aggregation.
+    prefix = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", DEFAULT_SUGGESTIONS, type=int), 1), MAX_SUGGESTIONS)
+    suggester = current_app.extensions["club_suggester"]
+    if current_app.config["SUGGEST_BACKEND"] == "elasticsearch" and current_app.config["SEARCH_BACKEND"] != "local":
+        suggestions = []
+        if prefix.strip():
+            suggestions = completion_values(es_search(**completion_search(index_alias(), prefix, limit)), suggester, limit)
+    elif suggester is None:
+        return jsonify({"error": "club suggestions unavailable"}), 503
+    else:
+        suggestions = suggester.suggest(prefix, limit)
+    response = jsonify(suggestions)
+    # The trie only changes when the app restarts.
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return response
+
+# No module-level app: importing this module must not need Elasticsearch credentials or
+# an index file. Servers call the factory, e.g. gunicorn "app:create_app()".
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
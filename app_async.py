@@ -0,0 +1,246 @@
+import json
+import time
+import hashlib
+from quart import Quart, Blueprint, current_app, send_file, request, jsonify, Response, g
+from quart.wrappers.response import DataBody
+from elasticsearch import AsyncElasticsearch, NotFoundError
+from cache import TTLCache, make_shared_backend
+from suggest import MAX_SUGGESTIONS, DEFAULT_SUGGESTIONS, load_club_suggester, completion_search, completion_values
+from local_search import AsyncLocalSearch
+# Bare name like the core/ modules use (local_search put core/ on sys.path), so the
+# app and the batch code share one metrics module.
+from metrics import Metrics, PROMETHEUS_CONTENT_TYPE
+from response_encoding import dumps, choose_encoding, compress, server_timing
+from search_common import (
+    PIT_KEEP_ALIVE, load_config, es_client_kwargs, parse_search_request, from_search_args,
+    cursor_search_args, next_cursor, search_response, facet_list_search, facet_list_values,
+    search_targets, generation_from_mappings
+)
+
+# Async twin of app.py: same routes and responses, served by an ASGI server on
+# AsyncElasticsearch so one worker can keep many searches in flight, e.g.
+#   hypercorn "app_async:create_app()" --bind 0.0.0.0:8000
+# Needs the quart and aiohttp packages.
+
+bp = Blueprint("search", __name__)
+
+def create_app(config=None):
+    app = Quart(__name__)
+    app.config.update(load_config(config))
+    app.extensions["facet_cache"] = TTLCache(
+        maxsize=app.config["FACET_CACHE_SIZE"],
+        ttl=app.config["FACET_CACHE_TTL"],
+        shared=make_shared_backend(app.config["FACET_CACHE_REDIS_URL"])
+    )
+    app.extensions["index_generation"] = {"value": None, "checked_at": 0.0}
+    app.extensions["metrics"] = Metrics()
+    app.extensions["club_suggester"] = make_club_suggester(app.config)
+
+    @app.before_serving
+    async def open_client():
+        # Created inside the serving loop so the aiohttp session is bound to it.
+        app.extensions["elasticsearch"] = make_search_client(app.config)
+
+    @app.after_serving
+    async def close_client():
+        await app.extensions["elasticsearch"].close()
+
+    app.register_blueprint(bp)
+    return app
+
+def make_search_client(config):
+    if config["SEARCH_BACKEND"] == "local":
+        return AsyncLocalSearch(config["LOCAL_INDEX_PATH"])
+    return AsyncElasticsearch(**es_client_kwargs(config))
+
+def make_club_suggester(config):
+    try:
+        return load_club_suggester(config["SUGGEST_AS_OF"])
+    except Exception as e:
+        print(f" Club suggestions unavailable: {e}")
+        return None
+
+def get_es():
+    return current_app.extensions["elasticsearch"]
+
+def index_alias():
+    return current_app.config["INDEX_ALIAS"]
+
+def get_metrics():
+    return current_app.extensions["metrics"]
+
+def endpoint_label():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+async def es_search(**search_args):
+    start = time.perf_counter()
+    results = await get_es().search(**search_args)
+    metrics = get_metrics()
+    metrics.observe("es_search_seconds", time.perf_counter() - start, endpoint=endpoint_label())
+    if "took" in results:
+        metrics.observe("es_took_seconds", results["took"] / 1000, endpoint=endpoint_label())
+    return results
+
+@bp.before_app_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+
+async def encode_response(response):
+    timings = []
+    if "serialize_seconds" in g:
+        timings.append(("serialize", g.pop("serialize_seconds")))
+    buffered = isinstance(response.response, DataBody)
+    size = len(response.response.data) if buffered else None
+    encoding = None
+    if response.status_code == 200 and buffered and "Content-Encoding" not in response.headers:
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), response.mimetype, size)
+    metrics = get_metrics()
+    if encoding:
+        start = time.perf_counter()
+        response.set_data(compress(await response.get_data(), encoding))
+        timings.append(("compress", time.perf_counter() - start))
+        response.headers["Content-Encoding"] = encoding
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+        metrics.inc("http_response_uncompressed_bytes_total", size, endpoint=endpoint_label())
+        size = len(response.response.data)
+    if size is not None:
+        metrics.inc("http_response_bytes_total", size, endpoint=endpoint_label(), encoding=encoding or "identity")
+    for name, seconds in timings:
+        metrics.observe(f"response_{name}_seconds", seconds, endpoint=endpoint_label())
+    if timings:
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+@bp.after_app_request
+async def record_latency(response):
+    response = await encode_response(response)
+    start = g.pop("request_start", None)
+    if start is not None:
+        get_metrics().observe(
+            "http_request_seconds", time.perf_counter() - start,
+            endpoint=endpoint_label(), method=request.method, status=response.status_code
+        )
+    return response
+
+async def index_generation():
+    generation = current_app.extensions["index_generation"]
+    now = time.monotonic()
+    if generation["value"] is None or now - generation["checked_at"] > current_app.config["GENERATION_CHECK_SECONDS"]:
+        generation["checked_at"] = now
+        try:
+            generation["value"] = generation_from_mappings(await get_es().indices.get_mapping(index=index_alias()))
+        except Exception as e:
+            print(f" Could not read index generation: {e}")
+            generation["value"] = generation["value"] or "unknown"
+    return generation["value"]
+
+async def cached_facet(key, compute):
+    facet_cache = current_app.extensions["facet_cache"]
+    cache_key = f"{await index_generation()}|{key}"
+    cached = facet_cache.get(cache_key)
+    if cached is None:
+        body = json.dumps(await compute(), ensure_ascii=False)
+        cached = [body, hashlib.sha1(body.encode("utf-8")).hexdigest()]
+        facet_cache.set(cache_key, cached)
+    body, etag = cached
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return await response.make_conditional(request)
+
+@bp.route('/')
+async def home():
+    return await send_file('index.html')
+
+@bp.route('/metrics')
+async def metrics():
+    return Response(get_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+def json_response(payload):
+    start = time.perf_counter()
+    body = dumps(payload)
+    g.serialize_seconds = time.perf_counter() - start
+    return Response(body, mimetype="application/json")
+
+async def search_with_cursor(state, facets):
+    es = get_es()
+    search_args = cursor_search_args(state, facets)
+    targets = search_targets(index_alias(), state["filters"])
+    if not state.get("pit"):
+        state["pit"] = (await es.open_point_in_time(index=targets, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True))["id"]
+    try:
+        results = await es_search(pit={"id": state["pit"], "keep_alive": PIT_KEEP_ALIVE}, **search_args)
+    except NotFoundError:
+        state["pit"] = (await es.open_point_in_time(index=targets, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True))["id"]
+        results = await es_search(pit={"id": state["pit"], "keep_alive": PIT_KEEP_ALIVE}, **search_args)
+
+    cursor = next_cursor(state, results)
+    if cursor is None:
+        try:
+            await es.close_point_in_time(id=results.get("pit_id", state["pit"]))
+        except Exception:
+            pass
+    return results, cursor
+
+@bp.route('/search', methods=['POST'])
+async def search():
+    try:
+        plan = parse_search_request(await request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "cursor_state" in plan:
+        results, cursor = await search_with_cursor(plan["cursor_state"], plan["facets"])
+        return json_response(search_response(plan, results, cursor))
+
+    results = await es_search(**from_search_args(plan, index_alias()))
+    return json_response(search_response(plan, results))
+
+@bp.route('/api/clubs', methods=["GET"])
+async def get_clubs():
+    league = request.args.get("league", "")
+
+    async def compute():
+        return facet_list_values("clubs", await es_search(**facet_list_search("clubs", index_alias(), league)))
+
+    return await cached_facet(f"clubs:{league}", compute)
+
+@bp.route('/api/leagues', methods=["GET"])
+async def get_leagues():
+    async def compute():
+        return facet_list_values("leagues", await es_search(**facet_list_search("leagues", index_alias())))
+
+    return await cached_facet("leagues", compute)
+
+@bp.route('/api/sources')
+async def get_sources():
+    async def compute():
+        return facet_list_values("sources", await es_search(**facet_list_search("sources", index_alias())))
+
+    return await cached_facet("sources", compute)
+
+@bp.route('/api/suggest')
+async def suggest():
+    prefix = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", DEFAULT_SUGGESTIONS, type=int), 1), MAX_SUGGESTIONS)
+    suggester = current_app.extensions["club_suggester"]
+    if current_app.config["SUGGEST_BACKEND"] == "elasticsearch" and current_app.config["SEARCH_BACKEND"] != "local":
+        suggestions = []
+        if prefix.strip():
+            suggestions = completion_values(await es_search(**completion_search(index_alias(), prefix, limit)), suggester, limit)
+    elif suggester is None:
+        return jsonify({"error": "club suggestions unavailable"}), 503
+    else:
+        suggestions = suggester.suggest(prefix, limit)
+    response = jsonify(suggestions)
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return response
+
+# No module-level app: importing this module must not need Elasticsearch credentials or
+# an index file. Servers call the factory, e.g. hypercorn "app_async:create_app()".
+if __name__ == '__main__':
+    create_app().run()
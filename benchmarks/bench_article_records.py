@@ -0,0 +1,70 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from synthetic_corpus import load_templates, generate_corpus
+from keywords_match import load_keyword_maps, load_club_matcher
+from clean_and_reorganize import clean_articles, dedupe_day, name_table, KEYWORDS_AS_OF
+from day_storage import dumps_compact, orjson
+
+# Memory held by the cleaner's day buckets (all_by_date) for a synthetic corpus, with the
+# articles kept as dicts (before) and as ArticleRecords (after), and the size and write
+# time of the day files in the pretty-printed and compact formats.
+
+def bucket_corpus(templates, size, seed, maps, names):
+    all_by_date = defaultdict(list)
+    for chunk in generate_corpus(templates, size, seed):
+        for date_str, articles in clean_articles(chunk, *maps, names=names).items():
+            all_by_date[date_str].extend(articles)
+    return all_by_date
+
+def traced(fn):
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Cleaner memory per article: dicts vs ArticleRecord, and day file formats")
+    arg_parser.add_argument("--size", type=int, default=100000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    templates = load_templates()
+    keyword_maps = load_keyword_maps(as_of=KEYWORDS_AS_OF)
+    maps = (keyword_maps["keyword_to_club"], keyword_maps["club_to_league"], keyword_maps["club_to_euro"],
+            keyword_maps["competition_names"], load_club_matcher(keyword_maps))
+    names = name_table()
+
+    as_dicts, dict_bytes = traced(lambda: bucket_corpus(templates, args.size, args.seed, maps, None))
+    kept = sum(len(articles) for articles in as_dicts.values())
+    days = [dedupe_day(articles) for articles in as_dicts.values()]
+    pretty, pretty_time = timed(lambda: sum(len(json.dumps(day, indent=2, ensure_ascii=False).encode("utf-8")) for day in days))
+    compact, compact_time = timed(lambda: sum(sum(len(dumps_compact(article)) + 1 for article in day) for day in days))
+    del as_dicts, days
+
+    as_records, record_bytes = traced(lambda: bucket_corpus(templates, args.size, args.seed, maps, names))
+    del as_records
+
+    per_100k = lambda total: total / kept * 100000 / 1e6
+    print(f" {args.size} synthetic articles, {kept} kept by the cleaner")
+    print(f" Day buckets as dicts:          {dict_bytes / 1e6:8.1f} MB ({dict_bytes / kept:.0f} B/article, {per_100k(dict_bytes):.1f} MB per 100k)")
+    print(f" Day buckets as ArticleRecords: {record_bytes / 1e6:8.1f} MB ({record_bytes / kept:.0f} B/article, {per_100k(record_bytes):.1f} MB per 100k)")
+    print(f" Saved: {(dict_bytes - record_bytes) / 1e6:.1f} MB ({1 - record_bytes / dict_bytes:.0%})")
+    print(f" Day files, json indent=2:      {pretty / 1e6:8.1f} MB, serialised in {pretty_time:.2f}s")
+    print(f" Day files, jsonl compact:      {compact / 1e6:8.1f} MB, serialised in {compact_time:.2f}s ({'orjson' if orjson else 'json'})")
@@ -0,0 +1,60 @@
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from keywords_match import build_keyword_maps, build_club_matcher
+from clean_and_reorganize import detect_clubs_and_leagues
+
+ARTICLES_CSV = "football_news.cleaned_articles.csv"
+ROUNDS = 5
+
+def load_articles(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row.get("title", "") + " " + row.get("summary", ""), row.get("url", ""))
+            for row in csv.DictReader(f)
+        ]
+
+def run(articles, maps, matcher=None):
+    return [
+        detect_clubs_and_leagues(text, url, *maps, matcher=matcher)
+        for text, url in articles
+    ]
+
+def timed(articles, maps, matcher=None):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = run(articles, maps, matcher)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    articles = load_articles(ARTICLES_CSV)
+    maps = build_keyword_maps()
+
+    start = time.perf_counter()
+    matcher = build_club_matcher(maps[0])
+    build_time = time.perf_counter() - start
+
+    loop_time, loop_result = timed(articles, maps)
+    matcher_time, matcher_result = timed(articles, maps, matcher)
+
+    mismatches = [
+        i for i, (a, b) in enumerate(zip(loop_result, matcher_result))
+        if (sorted(a[0]), sorted(a[1])) != (sorted(b[0]), sorted(b[1]))
+    ]
+
+    print(f" Articles: {len(articles)}, keywords: {len(maps[0])}")
+    print(f" Matcher build: {build_time * 1000:.1f} ms")
+    print(f" Keyword loop:  {loop_time * 1000:.1f} ms ({len(articles) / loop_time:,.0f} articles/sec)")
+    print(f" Club matcher:  {matcher_time * 1000:.1f} ms ({len(articles) / matcher_time:,.0f} articles/sec)")
+    print(f" Speedup: {loop_time / matcher_time:.1f}x")
+    if mismatches:
+        for i in mismatches[:10]:
+            print(f" Mismatch on article {i}: {loop_result[i]} != {matcher_result[i]}")
+        sys.exit(1)
+    print(" Outputs identical")
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from dateutil import parser, tz
+from day_storage import list_day_files, read_day_file
+from date_normalizer import DateNormalizer, summarize_counts
+
+INPUT_DIR = "data/rss_by_day"
+UTC7 = tz.tzoffset("UTC+7", 7 * 3600)
+
+def dateutil_utc7(value):
+    # The cleaner's previous convert_to_utc7.
+    try:
+        parsed = parser.parse(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=tz.UTC)
+        return parsed.astimezone(UTC7)
+    except Exception:
+        return None
+
+def load_dates(folder_path):
+    values, sources = [], []
+    for file_path in list_day_files(folder_path):
+        for article in read_day_file(file_path):
+            values.append(article.get("date"))
+            sources.append(article.get("source"))
+    return values, sources
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds, result
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Date parsing cost: dateutil vs DateNormalizer")
+    arg_parser.add_argument("--input", default=INPUT_DIR)
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    args = arg_parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    values, sources = load_dates(args.input)
+    normalizer = DateNormalizer()
+
+    old_time, old = timed(lambda: [dateutil_utc7(value) for value in values], args.rounds)
+    one_time, one = timed(lambda: [normalizer.parse(value, source) for value, source in zip(values, sources)], args.rounds)
+    normalizer.take_counts()
+    batch_time, batch = timed(lambda: normalizer.parse_many(values, sources), args.rounds)
+    counts = normalizer.take_counts()
+
+    mismatches = sum(1 for a, b, c in zip(old, one, batch) if not (a == b == c))
+    per_call = lambda seconds: seconds / len(values) * 1e6
+    print(f" {len(values)} dates from {args.input}")
+    print(f" dateutil:              {old_time * 1000:7.1f} ms ({per_call(old_time):.1f} us/date)")
+    print(f" DateNormalizer.parse:  {one_time * 1000:7.1f} ms ({per_call(one_time):.1f} us/date, {old_time / one_time:.0f}x)")
+    print(f" DateNormalizer batch:  {batch_time * 1000:7.1f} ms ({per_call(batch_time):.1f} us/date, {old_time / batch_time:.0f}x)")
+    print(f" Batch paths per round: {summarize_counts({name: count // args.rounds for name, count in counts.items()})}")
+    print(f" Results differing from dateutil: {mismatches}")
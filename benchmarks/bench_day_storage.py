@@ -0,0 +1,57 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import rss_scraper
+from day_storage import read_day_file
+from url_index import SeenUrlIndex
+
+SOURCE_DAY = "data/rss_by_day/2025-05-01.json"
+RUNS = 200
+ARTICLES_PER_RUN = 15
+
+def make_runs():
+    with open(SOURCE_DAY, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    runs = []
+    for run in range(RUNS):
+        batch = []
+        for i in range(ARTICLES_PER_RUN):
+            article = dict(template[(run * ARTICLES_PER_RUN + i) % len(template)])
+            article["url"] = f"{article['url']}?run={run}&i={i}"
+            article["date"] = "2025-05-01T12:00:00"
+            batch.append(article)
+        runs.append(batch)
+    return runs
+
+def simulate(storage_format, runs):
+    with tempfile.TemporaryDirectory() as data_dir:
+        rss_scraper.DATA_DIR = data_dir
+        index = SeenUrlIndex(os.path.join(data_dir, "seen_urls.sqlite3"))
+        file_path = os.path.join(data_dir, f"2025-05-01.{storage_format}")
+        bytes_written = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for batch in runs:
+                size_before = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+                rss_scraper.save_by_day(batch, index, storage_format)
+                size_after = os.path.getsize(file_path)
+                # A rewrite writes the whole file; an append writes only the new lines.
+                bytes_written += size_after if storage_format == "json" else size_after - size_before
+        elapsed = time.perf_counter() - start
+        count = sum(1 for _ in read_day_file(file_path))
+        index.close()
+    return elapsed, bytes_written, count
+
+if __name__ == "__main__":
+    runs = make_runs()
+    print(f" {RUNS} scrape runs x {ARTICLES_PER_RUN} new articles into one day")
+    for storage_format in ("json", "jsonl"):
+        elapsed, bytes_written, count = simulate(storage_format, runs)
+        print(f" {storage_format:5}: {elapsed:.2f}s, {bytes_written / 1e6:.1f} MB written, {count} articles in day file")
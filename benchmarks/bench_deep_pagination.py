@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from elasticsearch.helpers import bulk
+
+from app import create_app
+from search_common import PAGE_SIZE
+
+BENCH_INDEX = "football_news_bench_pagination"
+bench_app = create_app({"INDEX_ALIAS": BENCH_INDEX})
+es = bench_app.extensions["elasticsearch"]
+PAGES = (1, 50, 400)
+REPEATS = 5
+
+def synthetic_docs(count):
+    clubs = ["Arsenal FC", "Chelsea FC", "Liverpool FC", "FC Barcelona", "Real Madrid CF", "AS Roma"]
+    sources = ["BBC", "SkySports", "Guardian"]
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        # Coarse timestamps so many documents tie on date and the tiebreaker matters.
+        yield {
+            "_index": BENCH_INDEX,
+            "_id": str(i),
+            "_source": {
+                "title": f"Synthetic story {i}",
+                "summary": "Transfer talk and match report",
+                "url": f"https://example.com/story/{i}",
+                "date": (start + timedelta(minutes=10 * (i // 3))).isoformat(),
+                "source": random.choice(sources),
+                "clubs": random.sample(clubs, 2)
+            }
+        }
+
+def build_index(count):
+    if es.indices.exists(index=BENCH_INDEX):
+        es.indices.delete(index=BENCH_INDEX)
+    es.indices.create(index=BENCH_INDEX, mappings={
+        "properties": {
+            "title": {"type": "text"},
+            "summary": {"type": "text"},
+            "url": {"type": "keyword"},
+            "date": {"type": "date"},
+            "source": {"type": "keyword"},
+            "clubs": {"type": "keyword"},
+            "leagues": {"type": "keyword"},
+            "main_league": {"type": "keyword"}
+        }
+    })
+    bulk(es, synthetic_docs(count), chunk_size=5000)
+    es.indices.refresh(index=BENCH_INDEX)
+
+def time_from_page(client, page):
+    start = time.perf_counter()
+    response = client.post("/search", json={"from": (page - 1) * PAGE_SIZE})
+    return time.perf_counter() - start, response.status_code
+
+def time_cursor_page(client, page):
+    # Walk to the page with cursors, timing only the request for the target page.
+    if page == 1:
+        start = time.perf_counter()
+        client.post("/search", json={"paginate": "cursor"})
+        return time.perf_counter() - start
+    response = client.post("/search", json={"paginate": "cursor"}).get_json()
+    for _ in range(page - 2):
+        response = client.post("/search", json={"cursor": response["cursor"]}).get_json()
+    start = time.perf_counter()
+    client.post("/search", json={"cursor": response["cursor"]})
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare from/size and search_after pagination latency")
+    arg_parser.add_argument("--docs", type=int, default=500000)
+    arg_parser.add_argument("--skip-build", action="store_true")
+    args = arg_parser.parse_args()
+
+    if not args.skip_build:
+        print(f" Indexing {args.docs} synthetic documents into {BENCH_INDEX}...")
+        build_index(args.docs)
+
+    client = bench_app.test_client()
+    for page in PAGES:
+        from_times = []
+        for _ in range(REPEATS):
+            elapsed, status = time_from_page(client, page)
+            if status == 200:
+                from_times.append(elapsed)
+        cursor_times = [time_cursor_page(client, page) for _ in range(REPEATS)]
+        from_text = f"{statistics.median(from_times) * 1000:.1f} ms" if from_times else "failed"
+        print(f" Page {page:>3}: from/size {from_text}, search_after {statistics.median(cursor_times) * 1000:.1f} ms")
@@ -0,0 +1,84 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import feedparser
+from rss_scraper import fetch_all_feeds, parse_entries
+
+FEED_COUNT = 6
+DELAY = 0.5
+
+def fixture_xml(name):
+    items = "".join(
+        f"<item><title>{name} story {i}</title><link>https://example.com/{name}/{i}</link>"
+        f"<description>Arsenal beat Chelsea in match {i}</description>"
+        f"<pubDate>Thu, 01 May 2025 0{i}:00:00 GMT</pubDate></item>"
+        for i in range(5)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'.encode("utf-8")
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = self.path.strip("/")
+        time.sleep(DELAY)
+        etag = f'"{name}-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if name == "broken":
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = fixture_xml(name)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Thu, 01 May 2025 10:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def run_fetch(feeds, state, concurrency):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(fetch_all_feeds(feeds, state, concurrency=concurrency, timeout=5))
+    return time.perf_counter() - start, results
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    feeds = {f"feed{i}": f"{base}/feed{i}" for i in range(FEED_COUNT)}
+    feeds["broken"] = f"{base}/broken"
+
+    state = {}
+    sequential_time, _ = run_fetch(feeds, state, concurrency=1)
+    concurrent_time, results = run_fetch(feeds, state, concurrency=len(feeds))
+
+    articles = []
+    for source, result in results.items():
+        if result and result[0] == 200:
+            with contextlib.redirect_stdout(io.StringIO()):
+                articles.extend(parse_entries(source, feedparser.parse(result[1]), set()))
+            state[source] = {"etag": result[2], "modified": result[3]}
+
+    revalidate_time, revalidated = run_fetch(feeds, state, concurrency=len(feeds))
+    not_modified = sum(1 for result in revalidated.values() if result and result[0] == 304)
+    server.shutdown()
+
+    print(f" Feeds: {len(feeds)} ({DELAY:.1f}s server delay each, one returns HTTP 500)")
+    print(f" Sequential fetch:  {sequential_time:.2f}s")
+    print(f" Concurrent fetch:  {concurrent_time:.2f}s ({len(articles)} articles parsed)")
+    print(f" Conditional fetch: {revalidate_time:.2f}s ({not_modified}/{FEED_COUNT} returned 304)")
+    if not_modified != FEED_COUNT or revalidated["broken"] is not None:
+        sys.exit(1)
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUNS = 5
+
+# Cold start of a cleaner worker: a fresh interpreter that loads the keyword maps and
+# builds the club matcher. "legacy" reproduces the old pandas/iterrows path that ran at
+# import time; "compiled, cold" has to build the compiled file, "compiled, warm" reuses it.
+
+LEGACY = """
+import sys
+sys.path.insert(0, "core")
+import pandas as pd
+from keywords_match import CLUB_ALIASES, build_club_matcher
+keyword_to_club, club_to_league, club_to_euro = {}, {}, {}
+for _, row in pd.read_csv("clubs_with_leagues.csv").iterrows():
+    club = row["club_name"].strip()
+    club_to_league[club] = row["league_name"].strip()
+    keyword_to_club[club.lower()] = club
+    for alias in CLUB_ALIASES.get(club, []):
+        keyword_to_club[alias.lower()] = club
+for _, row in pd.read_csv("european_clubs_in_leagues.csv").iterrows():
+    club_to_euro.setdefault(row["club_name"].strip(), []).append(row["league_name"].strip())
+build_club_matcher(keyword_to_club)
+"""
+
+COMPILED = """
+import sys
+sys.path.insert(0, "core")
+from keywords_match import load_keyword_maps, load_club_matcher
+load_club_matcher(load_keyword_maps(maps_dir=sys.argv[1]))
+"""
+
+def run(code, *args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+def report(name, times):
+    print(f" {name:15}: {statistics.median(times) * 1000:7.1f} ms (median of {len(times)})")
+
+if __name__ == "__main__":
+    baseline = [run("pass") for _ in range(RUNS)]
+    report("interpreter", baseline)
+
+    if importlib.util.find_spec("pandas"):
+        report("legacy", [run(LEGACY) for _ in range(RUNS)])
+    else:
+        print(" legacy         : skipped (pandas not installed)")
+
+    cold = []
+    warm = []
+    for _ in range(RUNS):
+        with tempfile.TemporaryDirectory() as maps_dir:
+            cold.append(run(COMPILED, maps_dir))
+            warm.append(run(COMPILED, maps_dir))
+    report("compiled, cold", cold)
+    report("compiled, warm", warm)
@@ -0,0 +1,71 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_search import LocalSearch, build_local_index, iter_clean_articles
+from search_common import parse_search_request, from_search_args, cursor_search_args, load_config, es_client_kwargs
+
+REPEATS = 50
+REQUESTS = [
+    {},
+    {"query": "arsenal"},
+    {"query": "champions league", "facets": True},
+    {"query": "Manchester United", "paginate": "cursor", "facets": True},
+    {"club": "Liverpool FC", "source": "BBC"},
+]
+
+def scaled_articles(folder, scale):
+    # Copies of the real corpus with distinct URLs, to see how latency grows with size.
+    articles = list(iter_clean_articles(folder))
+    for copy in range(scale):
+        for article in articles:
+            yield {**article, "url": f"{article['url']}#{copy}"}
+
+def search_args(data, index):
+    plan = parse_search_request(data)
+    if "cursor_state" in plan:
+        return {"index": index, **cursor_search_args(plan["cursor_state"], plan["facets"])}
+    return from_search_args(plan, index)
+
+def time_requests(client, index):
+    for data in REQUESTS:
+        args = search_args(data, index)
+        client.search(**args)
+        times = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            client.search(**args)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        yield data, statistics.median(times), times[int(len(times) * 0.95)]
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Latency of the embedded search backend (and Elasticsearch, if reachable)")
+    arg_parser.add_argument("--input", default="data/rss_clean_final")
+    arg_parser.add_argument("--scale", type=int, default=1, help="Index this many copies of the corpus")
+    arg_parser.add_argument("--es", action="store_true", help="Also time the same searches against ES_HOSTS")
+    args = arg_parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "local_search.idx")
+    start = time.perf_counter()
+    count = build_local_index(scaled_articles(args.input, args.scale), path)
+    print(f" Built {count} docs in {time.perf_counter() - start:.2f}s ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    start = time.perf_counter()
+    local = LocalSearch(path)
+    print(f" Opened index in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    clients = [("local", local, "local")]
+    if args.es:
+        from elasticsearch import Elasticsearch
+        config = load_config()
+        clients.append(("es", Elasticsearch(**es_client_kwargs(config)), config["INDEX_ALIAS"]))
+
+    for name, client, index in clients:
+        for data, p50, p95 in time_requests(client, index):
+            print(f" {name:5} {str(data):70} p50 {p50 * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms")
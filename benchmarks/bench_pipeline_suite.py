@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from synthetic_corpus import load_templates, generate_corpus
+from keywords_match import load_keyword_maps, load_club_matcher
+from clean_and_reorganize import (
+    is_football_article, detect_clubs_and_leagues, convert_to_utc7, dedupe_day, CUTOFF_DATE, DATE_NORMALIZER, KEYWORDS_AS_OF
+)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Times each cleaner stage on its own over synthetic corpora (benchmarks/synthetic_corpus.py)
+# and compares throughput and peak RSS with a saved baseline. Each size runs in its own
+# process so its peak RSS is its own. Exits 1 when a stage regressed past --threshold.
+#
+#   python benchmarks/bench_pipeline_suite.py                     # compare with the baseline
+#   python benchmarks/bench_pipeline_suite.py --save-baseline     # record a new baseline
+#   python benchmarks/bench_pipeline_suite.py --sizes 10000       # quick check
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+SIZES = [10000, 100000, 1000000]
+STAGES = ["is_football_article", "convert_to_utc7", "detect_clubs_and_leagues", "bucket_dedup", "json_serialise"]
+THRESHOLD = 0.2
+# Stages that took less than this in the baseline are shown but not gated: too noisy.
+MIN_SECONDS = 0.05
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_size(size, seed, chunk_size):
+    templates = load_templates()
+    keyword_to_club = templates["keyword_to_club"]
+    maps = load_keyword_maps(as_of=KEYWORDS_AS_OF)
+    matcher = load_club_matcher(maps)
+    club_to_league, club_to_euro, competition_names = maps["club_to_league"], maps["club_to_euro"], maps["competition_names"]
+
+    seconds = dict.fromkeys(STAGES, 0.0)
+    items = dict.fromkeys(STAGES, 0)
+    pending = defaultdict(list)
+    output_bytes = 0
+    days = 0
+
+    def flush(date_strs):
+        nonlocal output_bytes, days
+        for date_str in date_strs:
+            articles = pending.pop(date_str)
+            start = time.perf_counter()
+            unique = dedupe_day(articles)
+            seconds["bucket_dedup"] += time.perf_counter() - start
+            start = time.perf_counter()
+            output_bytes += len(json.dumps(unique, indent=2, ensure_ascii=False).encode("utf-8"))
+            seconds["json_serialise"] += time.perf_counter() - start
+            items["json_serialise"] += len(unique)
+            days += 1
+
+    generate_seconds = 0.0
+    start = time.perf_counter()
+    for chunk in generate_corpus(templates, size, seed, chunk_size):
+        generate_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        football = [article for article in chunk if is_football_article(article, keyword_to_club)]
+        seconds["is_football_article"] += time.perf_counter() - start
+        items["is_football_article"] += len(chunk)
+
+        start = time.perf_counter()
+        dates = [convert_to_utc7(article["date"], article["source"]) for article in football]
+        seconds["convert_to_utc7"] += time.perf_counter() - start
+        items["convert_to_utc7"] += len(football)
+
+        kept = []
+        for article, dt in zip(football, dates):
+            if dt and dt >= CUTOFF_DATE:
+                article["date"] = dt.isoformat()
+                kept.append((article, dt.date().isoformat()))
+
+        start = time.perf_counter()
+        for article, _ in kept:
+            text = article["title"] + " " + article["summary"]
+            article["clubs"], article["leagues"] = detect_clubs_and_leagues(
+                text, article["url"], keyword_to_club, club_to_league, club_to_euro, competition_names, matcher
+            )
+        seconds["detect_clubs_and_leagues"] += time.perf_counter() - start
+        items["detect_clubs_and_leagues"] += len(kept)
+
+        start = time.perf_counter()
+        for article, date_str in kept:
+            pending[date_str].append(article)
+        seconds["bucket_dedup"] += time.perf_counter() - start
+        items["bucket_dedup"] += len(kept)
+
+        # Chunks are in date order; days two behind the newest one are complete.
+        if kept:
+            newest = max(date_str for _, date_str in kept)
+            flush(sorted(d for d in pending if d < newest)[:-1])
+        start = time.perf_counter()
+    flush(sorted(pending))
+    DATE_NORMALIZER.take_counts()
+
+    return {
+        "size": size,
+        "days": days,
+        "output_mb": round(output_bytes / 1e6, 1),
+        "generate_seconds": round(generate_seconds, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {
+            stage: {
+                "items": items[stage],
+                "seconds": round(seconds[stage], 4),
+                "per_second": round(items[stage] / seconds[stage], 1) if seconds[stage] else None
+            }
+            for stage in STAGES
+        }
+    }
+
+def run_size_in_subprocess(size, seed, chunk_size, repeat):
+    # Best of --repeat runs per stage; peak RSS is the lowest of the runs as well.
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-size", str(size), "--seed", str(seed), "--chunk-size", str(chunk_size)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None:
+            best = result
+            continue
+        for stage, values in result["stages"].items():
+            if (values["per_second"] or 0) > (best["stages"][stage]["per_second"] or 0):
+                best["stages"][stage] = values
+        if result["peak_rss_mb"] is not None:
+            best["peak_rss_mb"] = min(best["peak_rss_mb"], result["peak_rss_mb"])
+    return best
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for size, result in results.items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            print(f" {size}: no baseline")
+            continue
+        for stage in STAGES:
+            now = result["stages"][stage]["per_second"]
+            before = previous["stages"].get(stage, {}).get("per_second")
+            if not now or not before:
+                continue
+            change = now / before - 1
+            if previous["stages"][stage]["seconds"] < MIN_SECONDS:
+                flag = "(too short to gate)"
+            else:
+                flag = "REGRESSION" if change < -threshold else ""
+            print(f" {size:>8} {stage:25} {before:12.0f} -> {now:12.0f} /s ({change:+.0%}) {flag}")
+            if flag == "REGRESSION":
+                regressions.append(f"{size} {stage} throughput {change:+.0%}")
+        now, before = result["peak_rss_mb"], previous.get("peak_rss_mb")
+        if now and before:
+            change = now / before - 1
+            flag = "REGRESSION" if change > threshold else ""
+            print(f" {size:>8} {'peak_rss_mb':25} {before:12.1f} -> {now:12.1f} MB ({change:+.0%}) {flag}")
+            if flag:
+                regressions.append(f"{size} peak RSS {change:+.0%}")
+    return regressions
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Per-stage cleaner throughput and peak RSS on synthetic corpora, against a baseline")
+    arg_parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES), help="Comma-separated corpus sizes")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--chunk-size", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the best throughput per stage counts")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed slowdown / RSS growth (0.2 = 20%%)")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Record this run as the baseline instead of comparing")
+    arg_parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_size:
+        print(json.dumps(run_size(args.run_size, args.seed, args.chunk_size)))
+        sys.exit(0)
+
+    results = {}
+    for size in [int(size) for size in args.sizes.split(",")]:
+        result = run_size_in_subprocess(size, args.seed, args.chunk_size, args.repeat)
+        results[str(size)] = result
+        print(f" {size} articles ({result['days']} days, {result['output_mb']} MB of JSON, generated in {result['generate_seconds']:.1f}s), peak RSS {result['peak_rss_mb']} MB")
+        for stage in STAGES:
+            values = result["stages"][stage]
+            print(f"   {stage:25} {values['items']:>9} in {values['seconds']:8.3f}s  {values['per_second'] or 0:12.0f} /s")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        baseline = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "machine": machine_info(),
+            "sizes": results
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f" Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != machine_info():
+        print(f" Note: baseline was recorded on another machine ({baseline.get('machine')}); re-record it with --save-baseline")
+    if baseline.get("seed") != args.seed:
+        print(f" Note: baseline used seed {baseline.get('seed')}, this run {args.seed}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f" {len(regressions)} regressions past {args.threshold:.0%}: {'; '.join(regressions)}")
+        sys.exit(1)
+    print(f" No stage regressed past {args.threshold:.0%}")
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import create_app
+from response_encoding import dumps, orjson, brotli
+
+# /search payloads on the local backend: body bytes per response with full summaries and
+# with snippets, identity vs gzip vs brotli, and the serialise time json.dumps (what
+# jsonify did) vs response_encoding.dumps. Build the index first: python local_search.py
+
+QUERIES = ["", "arsenal", "manchester united", "transfer", "champions league", "injury"]
+
+def median_ms(values):
+    return statistics.median(values) * 1000
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bytes on the wire and serialise time for /search")
+    arg_parser.add_argument("--index", default="data/local_search.idx")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    app = create_app({"SEARCH_BACKEND": "local", "LOCAL_INDEX_PATH": args.index})
+    client = app.test_client()
+    encodings = ["identity", "gzip"] + (["br"] if brotli else [])
+
+    for snippets in (False, True):
+        sizes = {encoding: [] for encoding in encodings}
+        stdlib_times = []
+        fast_times = []
+        for query in QUERIES:
+            request_body = {"query": query, "facets": True, "snippets": snippets}
+            for encoding in encodings:
+                response = client.post("/search", json=request_body, headers={"Accept-Encoding": encoding})
+                sizes[encoding].append(len(response.data))
+            payload = json.loads(client.post("/search", json=request_body).data)
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                json.dumps(payload)
+                stdlib_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                dumps(payload)
+                fast_times.append(time.perf_counter() - start)
+
+        label = "snippets" if snippets else "full summaries"
+        print(f" /search with facets, {label}, {len(QUERIES)} queries:")
+        for encoding in encodings:
+            print(f"   {encoding:9s} {statistics.mean(sizes[encoding]) / 1024:7.1f} KiB per response")
+        print(f"   serialise: json.dumps {median_ms(stdlib_times):.3f} ms, {'orjson' if orjson else 'json compact'} {median_ms(fast_times):.3f} ms")
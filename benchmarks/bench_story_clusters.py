@@ -0,0 +1,76 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from story_clusters import StoryIndex, WINDOW_DAYS, story_tokens, jaccard
+
+CSV_PATH = "football_news.cleaned_articles.csv"
+
+def load_articles(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        articles = [row for row in csv.DictReader(f) if row.get("date")]
+    articles.sort(key=lambda article: article["date"])
+    return articles
+
+def scaled(articles, scale):
+    # Each copy is moved past the previous one (plus the window) so copies never meet in
+    # the window: the corpus grows in time the way a real archive does.
+    first = date.fromisoformat(articles[0]["date"][:10])
+    span = (date.fromisoformat(articles[-1]["date"][:10]) - first).days + WINDOW_DAYS + 1
+    for copy in range(scale):
+        shift = timedelta(days=copy * span)
+        for article in articles:
+            day = date.fromisoformat(article["date"][:10]) + shift
+            yield day, {**article, "url": f"{article['url']}#{copy}"}
+
+def run_lsh(items):
+    index = StoryIndex()
+    story_ids = []
+    start = time.perf_counter()
+    for day, article in items:
+        story_ids.append(index.assign(article, day))
+    return time.perf_counter() - start, story_ids, index.comparisons
+
+def brute_force_pairs(articles, threshold, same_source_threshold):
+    # Every pair inside the window; what LSH should find without comparing everything.
+    days = [date.fromisoformat(article["date"][:10]) for article in articles]
+    tokens = [story_tokens(article) for article in articles]
+    pairs = set()
+    comparisons = 0
+    for i in range(len(articles)):
+        for j in range(i):
+            if (days[i] - days[j]).days >= WINDOW_DAYS:
+                continue
+            comparisons += 1
+            needed = same_source_threshold if articles[i]["source"] == articles[j]["source"] else threshold
+            if jaccard(tokens[i], tokens[j]) >= needed:
+                pairs.add((j, i))
+    return pairs, comparisons
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Near-duplicate story clustering throughput and recall")
+    arg_parser.add_argument("--csv", default=CSV_PATH)
+    arg_parser.add_argument("--scale", type=int, default=100)
+    args = arg_parser.parse_args()
+
+    articles = load_articles(args.csv)
+    index = StoryIndex()
+
+    start = time.perf_counter()
+    exact_pairs, exact_comparisons = brute_force_pairs(articles, index.threshold, index.same_source_threshold)
+    brute_time = time.perf_counter() - start
+    elapsed, story_ids, comparisons = run_lsh(scaled(articles, 1))
+    found = sum(1 for j, i in exact_pairs if story_ids[i] == story_ids[j])
+    print(f" 1x ({len(articles)} articles): brute force {brute_time:.2f}s / {exact_comparisons} comparisons, "
+          f"LSH {elapsed:.2f}s / {comparisons} comparisons")
+    print(f" Similar pairs in window: {len(exact_pairs)}, same story via LSH: {found} ({found / max(len(exact_pairs), 1):.0%})")
+
+    for scale in sorted({10, args.scale}):
+        elapsed, story_ids, comparisons = run_lsh(scaled(articles, scale))
+        print(f" {scale}x ({len(story_ids)} articles): {elapsed:.2f}s, {len(story_ids) / elapsed:,.0f} articles/s, "
+              f"{comparisons} comparisons, {len(set(story_ids))} stories")
@@ -0,0 +1,41 @@
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from clean_and_reorganize import clean_and_reorganize
+
+INPUT_DIR = "data/rss_by_day"
+
+def timed_run(input_dir, output_dir, workers):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean_and_reorganize(input_dir, output_dir, workers)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare serial and parallel clean_and_reorganize output")
+    arg_parser.add_argument("--input", default=INPUT_DIR)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as parallel_dir:
+        serial_time = timed_run(args.input, serial_dir, 1)
+        parallel_time = timed_run(args.input, parallel_dir, args.workers)
+
+        serial_files = sorted(os.listdir(serial_dir))
+        parallel_files = sorted(os.listdir(parallel_dir))
+        _, mismatch, errors = filecmp.cmpfiles(serial_dir, parallel_dir, serial_files, shallow=False)
+
+        print(f" Serial:   {serial_time:.2f}s")
+        print(f" Parallel: {parallel_time:.2f}s ({args.workers} workers)")
+        if serial_files != parallel_files or mismatch or errors:
+            print(f" Output differs: {sorted(set(serial_files) ^ set(parallel_files)) + mismatch + errors}")
+            sys.exit(1)
+        print(f" Outputs identical ({len(serial_files)} day files)")
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Load test for app.py (threaded WSGI) and app_async.py (ASGI on AsyncElasticsearch)
+# against a local Elasticsearch stand-in that answers every search after a fixed delay,
+# so the numbers show how each serving mode copes with ES latency. Each server runs in
+# its own process; needs aiohttp for the client and quart/hypercorn for the async app.
+
+def es_search_body(hits):
+    return {
+        "took": 5,
+        "timed_out": False,
+        "hits": {"total": {"value": hits, "relation": "eq"}, "hits": [
+            {"_id": str(i), "_source": {
+                "title": f"Story {i}", "summary": "Arsenal beat Chelsea", "url": f"https://example.com/{i}",
+                "source": "BBC", "date": "2025-05-01T12:00:00+07:00", "clubs": ["Arsenal FC"],
+                "leagues": ["English Premier League 2024/25"]
+            }, "sort": ["2025-05-01T05:00:00.000Z", f"https://example.com/{i}"]}
+            for i in range(hits)
+        ]},
+        "aggregations": {
+            field: {"doc_count": hits, "values": {"buckets": [{"key": "Arsenal FC", "doc_count": hits}]}}
+            for field in ("clubs", "leagues", "main_league", "source")
+        }
+    }
+
+def serve_es_stand_in(port, delay):
+    body = json.dumps(es_search_body(20)).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def reply(self, payload):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("X-Elastic-Product", "Elasticsearch")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self.reply(json.dumps({"version": {"number": "8.17.3"}, "tagline": "You Know, for Search"}).encode("utf-8"))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            time.sleep(delay)
+            self.reply(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+def app_config(es_port):
+    return {"ES_HOSTS": f"http://127.0.0.1:{es_port}", "ES_USERNAME": "", "ES_CONNECTIONS_PER_NODE": 64}
+
+def serve_sync(port, es_port):
+    from werkzeug.serving import make_server
+    from app import create_app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", port, create_app(app_config(es_port)), threaded=True).serve_forever()
+
+def serve_async(port, es_port):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from app_async import create_app
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    asyncio.run(serve(create_app(app_config(es_port)), config))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+def start(role, port, *args):
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", role, "--port", str(port), *map(str, args)],
+        cwd=ROOT
+    )
+    wait_for_port(port)
+    return process
+
+async def run_load(url, requests, concurrency):
+    import aiohttp
+
+    latencies = []
+    errors = 0
+    payload = {"query": "arsenal", "facets": True}
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client(session):
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=payload) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Warm up connection pools on both sides before timing.
+        for _ in range(min(concurrency, 10)):
+            async with session.post(url, json=payload) as response:
+                await response.read()
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies), errors
+
+def report(name, elapsed, latencies, errors):
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f" {name:6}: {len(latencies) / elapsed:8.1f} req/s, p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+        f"p99 {p99 * 1000:7.1f} ms, errors {errors}"
+    )
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Load-test the sync and async search apps")
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    arg_parser.add_argument("--concurrency", type=int, default=50)
+    arg_parser.add_argument("--es-delay", type=float, default=0.02, help="Seconds the ES stand-in waits per search")
+    arg_parser.add_argument("--modes", default="sync,async")
+    arg_parser.add_argument("--serve", choices=["es", "sync", "async"], help=argparse.SUPPRESS)
+    arg_parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    arg_parser.add_argument("extra", nargs="*", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.serve == "es":
+        serve_es_stand_in(args.port, float(args.extra[0]))
+    elif args.serve == "sync":
+        serve_sync(args.port, int(args.extra[0]))
+    elif args.serve == "async":
+        serve_async(args.port, int(args.extra[0]))
+    else:
+        es_port = free_port()
+        processes = [start("es", es_port, args.es_delay)]
+        try:
+            print(f" {args.requests} POST /search requests, {args.concurrency} concurrent, ES delay {args.es_delay * 1000:.0f} ms")
+            for mode in args.modes.split(","):
+                port = free_port()
+                processes.append(start(mode, port, es_port))
+                elapsed, latencies, errors = asyncio.run(run_load(f"http://127.0.0.1:{port}/search", args.requests, args.concurrency))
+                report(mode, elapsed, latencies, errors)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
@@ -0,0 +1,138 @@
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import string
+import sys
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from day_storage import list_day_files, read_day_file
+from keywords_match import load_keyword_maps, load_club_matcher
+from clean_and_reorganize import is_football_article, KEYWORDS_AS_OF
+
+# Synthetic RSS corpora of any size, shaped like the real scrape: football stories are the
+# articles of football_news.cleaned_articles.csv with their clubs swapped for other clubs of
+# the same league (club tables from the keyword maps), the rest are the non-football articles
+# of data/rss_by_day. Sources, date formats per source, the football share and the daily
+# volume are taken from data/rss_by_day; a few articles repeat an earlier (title, source) so
+# day deduplication has work to do. Articles come out in date order, in chunks.
+
+CSV_PATH = "football_news.cleaned_articles.csv"
+RAW_DIR = "data/rss_by_day"
+START_DATE = datetime(2025, 4, 16)
+DUPLICATE_SHARE = 0.03
+
+def load_templates(csv_path=CSV_PATH, raw_dir=RAW_DIR, as_of=KEYWORDS_AS_OF):
+    maps = load_keyword_maps(as_of=as_of)
+    keyword_to_club = maps["keyword_to_club"]
+    matcher = load_club_matcher(maps)
+
+    football = []
+    with open(csv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            article = {"title": row["title"], "summary": row["summary"], "url": row["url"], "source": row["source"]}
+            keywords = sorted({keyword for keyword, _ in matcher((article["title"] + " " + article["summary"]).lower())}, key=len, reverse=True)
+            pattern = re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE) if keywords else None
+            football.append((article, pattern))
+
+    noise = []
+    date_formats = defaultdict(list)
+    raw_count = 0
+    raw_days = 0
+    for file_path in list_day_files(raw_dir):
+        raw_days += 1
+        for article in read_day_file(file_path):
+            raw_count += 1
+            date = article.get("date", "")
+            date_formats[article.get("source")].append("iso" if date[:1].isdigit() else date.rsplit(" ", 1)[-1])
+            if not is_football_article(article, keyword_to_club):
+                noise.append({key: article.get(key, "") for key in ("title", "summary", "url", "source")})
+
+    # Other names a club can be swapped to: its registry name and its keywords, in title case.
+    names = defaultdict(list)
+    for keyword, club in keyword_to_club.items():
+        names[club].append(string.capwords(keyword))
+    for club in names:
+        names[club].append(club)
+    by_league = defaultdict(list)
+    for club in sorted(names):
+        by_league[maps["club_to_league"].get(club)].append(club)
+
+    return {
+        "football": football,
+        "noise": noise,
+        "noise_share": len(noise) / raw_count,
+        "per_day": raw_count / max(raw_days, 1),
+        "date_formats": dict(date_formats),
+        "keyword_to_club": keyword_to_club,
+        "club_to_league": maps["club_to_league"],
+        "names": dict(names),
+        "by_league": dict(by_league)
+    }
+
+def format_date(moment, kind):
+    if kind == "iso":
+        return moment.strftime("%Y-%m-%dT%H:%M:%S")
+    return moment.strftime("%a, %d %b %Y %H:%M:%S ") + kind
+
+def swap_clubs(text, pattern, replacements, templates, rng):
+    def replace(match):
+        keyword = match.group(0).lower()
+        if keyword not in replacements:
+            club = templates["keyword_to_club"].get(keyword)
+            league_clubs = templates["by_league"].get(templates["club_to_league"].get(club)) or [club]
+            replacements[keyword] = rng.choice(templates["names"][rng.choice(league_clubs)])
+        return replacements[keyword]
+    return pattern.sub(replace, text)
+
+def generate_corpus(templates, size, seed=0, chunk_size=10000, start=START_DATE):
+    rng = random.Random(seed)
+    seconds_between = 86400 / templates["per_day"]
+    moment = start
+    recent = deque(maxlen=20)
+    chunk = []
+    for i in range(size):
+        moment += timedelta(seconds=rng.expovariate(1 / seconds_between))
+        if recent and rng.random() < DUPLICATE_SHARE:
+            # Same story picked up twice by one feed (new URL, same title and source).
+            original = rng.choice(recent)
+            article = {**original, "url": f"{original['url']}&dup={i}"}
+        elif rng.random() < templates["noise_share"]:
+            template = rng.choice(templates["noise"])
+            article = {**template, "url": f"{template['url']}?n={i}"}
+        else:
+            template, pattern = rng.choice(templates["football"])
+            article = {**template, "url": f"{template['url']}?n={i}"}
+            if pattern is not None:
+                replacements = {}
+                article["title"] = swap_clubs(template["title"], pattern, replacements, templates, rng)
+                article["summary"] = swap_clubs(template["summary"], pattern, replacements, templates, rng)
+        if "date" not in article:
+            article["date"] = format_date(moment, rng.choice(templates["date_formats"].get(article["source"], ["iso"])))
+            recent.append(article)
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Write a synthetic RSS corpus as day-file-style JSON lines")
+    arg_parser.add_argument("--size", type=int, default=10000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", default="-", help="JSON lines file (default: stdout)")
+    args = arg_parser.parse_args()
+
+    templates = load_templates()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    for chunk in generate_corpus(templates, args.size, args.seed):
+        out.write("".join(json.dumps(article, ensure_ascii=False) + "\n" for article in chunk))
+    if out is not sys.stdout:
+        out.close()
+        print(f" Wrote {args.size} articles to {args.output}")
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+class TTLCache:
+    # Small thread-safe LRU with per-entry expiry. An optional shared backend (Redis) is
+    # consulted on a local miss so several app workers can reuse one computed result.
+
+    def __init__(self, maxsize=256, ttl=300, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    return value
+                del self.entries[key]
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._store(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl)
+
+    def _store(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class RedisBackend:
+    def __init__(self, url, prefix="football_news:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            print(f" Shared cache unavailable: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.setex(self.prefix + key, ttl, json.dumps(value))
+        except Exception as e:
+            print(f" Shared cache unavailable: {e}")
+
+def make_shared_backend(url=None):
+    url = url or os.environ.get("FACET_CACHE_REDIS_URL")
+    if not url:
+        return None
+    try:
+        return RedisBackend(url)
+    except ImportError:
+        print(" FACET_CACHE_REDIS_URL is set but the redis package is not installed; using the local cache only")
+        return None
@@ -0,0 +1,101 @@
+# Compact in-memory form of a cleaned article. The cleaner holds every cleaned article until
+# its day is written; as plain dicts that is a per-article hash table plus two lists of
+# repeated club/league strings. ArticleRecord keeps the fields in slots and clubs/leagues as
+# tuples of small integer ids from a NameTable built from the keyword maps, so the names
+# exist once per process. Records convert back to the same dicts (same keys, None values
+# and key order) on write.
+
+FIELDS = ("title", "url", "summary", "date", "source")
+DERIVED = ("clubs", "leagues", "main_league")
+# Key layouts seen so far: articles from one source share a single tuple.
+_LAYOUTS = {}
+
+class NameTable:
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.id(name)
+
+    @classmethod
+    def from_maps(cls, maps):
+        # Sorted, so every worker process built from the same maps gives the same ids.
+        names = set(maps["club_to_league"]) | set(maps["keyword_to_club"].values())
+        names.update(maps["club_to_league"].values())
+        names.update(maps["competition_names"].values())
+        for competitions in maps["club_to_euro"].values():
+            names.update(competitions)
+        return cls(sorted(names))
+
+    def id(self, name):
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def encode(self, name):
+        # Names outside the table stay strings: an id handed out later in one worker
+        # process would mean nothing to the parent.
+        return self.ids.get(name, name)
+
+    def decode(self, value):
+        return self.names[value] if isinstance(value, int) else value
+
+class ArticleRecord:
+    __slots__ = ("title", "url", "summary", "date", "source", "clubs", "leagues", "main_league", "extra", "keys")
+
+    def __init__(self, title, url, summary, date, source, clubs=(), leagues=(), main_league=None, extra=None, keys=None):
+        self.title = title
+        self.url = url
+        self.summary = summary
+        self.date = date
+        self.source = source
+        self.clubs = clubs
+        self.leagues = leagues
+        self.main_league = main_league
+        # Any other field of the source article (rare), in its original order.
+        self.extra = extra
+        # The source article's keys when they are not FIELDS in order (a field missing or
+        # moved); None for the usual scraped article.
+        self.keys = keys
+
+    @classmethod
+    def from_article(cls, article, names):
+        keys = tuple(key for key in article if key not in DERIVED)
+        extra = {key: article[key] for key in keys if key not in FIELDS}
+        main_league = article.get("main_league")
+        return cls(
+            article.get("title"), article.get("url"), article.get("summary"), article.get("date"), article.get("source"),
+            tuple(names.encode(club) for club in article.get("clubs", ())),
+            tuple(names.encode(league) for league in article.get("leagues", ())),
+            names.encode(main_league) if main_league is not None else None,
+            extra or None,
+            None if keys[:len(FIELDS)] == FIELDS else _LAYOUTS.setdefault(keys, keys)
+        )
+
+    def to_article(self, names):
+        if self.keys is None:
+            article = {key: getattr(self, key) for key in FIELDS}
+            if self.extra:
+                article.update(self.extra)
+        else:
+            article = {key: getattr(self, key) if key in FIELDS else self.extra[key] for key in self.keys}
+        article["clubs"] = [names.decode(club) for club in self.clubs]
+        article["leagues"] = [names.decode(league) for league in self.leagues]
+        if self.main_league is not None:
+            article["main_league"] = names.decode(self.main_league)
+        return article
+
+    # Enough of the dict interface for dedupe_day.
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            return default if value is None else value
+        return (self.extra or {}).get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
@@ -1,11 +1,18 @@
 import os
 import json
 import re
-from datetime import datetime, timezone
-from collections import defaultdict, Counter
-from dateutil import parser
-from dateutil.tz import tzoffset
-from keywords_match import build_keyword_maps  
+import argparse
+import time
+import itertools
+from datetime import datetime, timedelta
+from collections import defaultdict, deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+from day_storage import list_day_files, read_day_file, file_signature, day_file_path, write_day_file
+from keywords_match import load_keyword_maps, load_club_matcher, keyword_maps_fingerprint, EURO_COMPETITIONS
+from story_clusters import assign_story_ids
+from date_normalizer import DateNormalizer, UTC7, summarize_counts
+from metrics import METRICS, run_report
+from article_record import ArticleRecord, NameTable
 
 BLOCKLIST = [
     "rugby", "atp", "tennis", "boxing", "mma", "ufc", "fighting", "ring",
@@ -25,15 +32,42 @@ GENERAL_FOOTBALL_WORDS = [
     "title", "retention", "promotion", "relegation", "kickoff", "stadium"
 ]
 
-def convert_to_utc7(date_str):
-    try:
-        dt = parser.parse(date_str)
-    except Exception:
-        print(f" Failed parse date: {date_str}")
-        return None
-    if dt.tzinfo:
-        return dt.astimezone(tzoffset("UTC+7", 7 * 3600))
-    return dt.replace(tzinfo=timezone.utc).astimezone(tzoffset("UTC+7", 7 * 3600))
+CUTOFF_DATE = datetime(2025, 4, 17, tzinfo=UTC7)
+# Keyword maps (season, clubs still in European competitions) as of the cutoff.
+KEYWORDS_AS_OF = CUTOFF_DATE.date().isoformat()
+
+# Competitions by registry code; the full names (with the season) come from the keyword maps.
+UEFA_PHRASES = {
+    "uefa champions league": "uefa.cl",
+    "champions league": "uefa.cl",
+    "uefa europa league": "uefa.el",
+    "europa league": "uefa.el",
+    "uefa europa conference league": "uefa.ecl",
+    "conference league": "uefa.ecl"
+}
+LEAGUE_PHRASES = [
+    ("premier league", "en.1"),
+    ("la liga", "es.1"),
+    ("serie a", "it.1"),
+    ("bundesliga", "de.1"),
+    ("ligue 1", "fr.1")
+]
+LEAGUE_URL_HINTS = {
+    "premier-league": "en.1",
+    "la-liga": "es.1",
+    "serie-a": "it.1",
+    "bundesliga": "de.1",
+    "ligue-1": "fr.1",
+    "champions-league": "uefa.cl",
+    "europa-league": "uefa.el",
+    "conference-league": "uefa.ecl"
+}
+DATE_NORMALIZER = DateNormalizer()
+# Parser usage gathered from every file cleaned in this run, including worker processes.
+DATE_STATS = Counter()
+
+def convert_to_utc7(date_str, source=None):
+    return DATE_NORMALIZER.parse(date_str, source)
 
 def is_football_article(article, keyword_to_club):
     text = (article.get("title", "") + " " + article.get("summary", "")).lower()
@@ -47,7 +81,7 @@ def is_football_article(article, keyword_to_club):
         return True
     return False
 
-def detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to_euro):
+def detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to_euro, competition_names, matcher=None):
     text_lower = text.lower()
     url_lower = url.lower()
     full_text = text_lower + " " + url_lower
@@ -61,22 +95,22 @@ def detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to
             return False
         return True
 
-    for keyword, club in keyword_to_club.items():
-        if re.search(rf"\b{re.escape(keyword)}\b", text_lower):
-            if is_valid_keyword(keyword, club):
-                found_clubs.append(club)
-                league = club_to_league.get(club)
-                if league:
-                    domestic_leagues.append(league)
-
-    uefa_comps = {
-        "uefa champions league": "UEFA Champions League 2024/25",
-        "champions league": "UEFA Champions League 2024/25",
-        "uefa europa league": "UEFA Europa League 2024/25",
-        "europa league": "UEFA Europa League 2024/25",
-        "uefa europa conference league": "UEFA Europa Conference League 2024/25",
-        "conference league": "UEFA Europa Conference League 2024/25"
-    }
+    if matcher is not None:
+        mentions = matcher(text_lower)
+    else:
+        mentions = [
+            (keyword, club) for keyword, club in keyword_to_club.items()
+            if re.search(rf"\b{re.escape(keyword)}\b", text_lower)
+        ]
+
+    for keyword, club in mentions:
+        if is_valid_keyword(keyword, club):
+            found_clubs.append(club)
+            league = club_to_league.get(club)
+            if league:
+                domestic_leagues.append(league)
+
+    uefa_comps = {phrase: competition_names[code] for phrase, code in UEFA_PHRASES.items() if code in competition_names}
 
     context_words = [
         "win", "beat", "match", "tie", "semi-final", "quarter-final", "advance",
@@ -109,33 +143,20 @@ def detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to
         found_leagues = league_mentions or set(domestic_leagues)
 
     if not found_clubs and not found_leagues:
-        if "premier league" in text_lower:
-            found_leagues = {"English Premier League 2024/25"}
-        elif "la liga" in text_lower:
-            found_leagues = {"Spain Primera División 2024/25"}
-        elif "serie a" in text_lower:
-            found_leagues = {"Italian Serie A 2024/25"}
-        elif "bundesliga" in text_lower:
-            found_leagues = {"Deutsche Bundesliga 2024/25"}
-        elif "ligue 1" in text_lower:
-            found_leagues = {"French Ligue 1 2024/25"}
-
-    league_hints = {
-        "premier-league": "English Premier League 2024/25",
-        "la-liga": "Spain Primera División 2024/25",
-        "serie-a": "Italian Serie A 2024/25",
-        "bundesliga": "Deutsche Bundesliga 2024/25",
-        "ligue-1": "French Ligue 1 2024/25",
-        "champions-league": "UEFA Champions League 2024/25",
-        "europa-league": "UEFA Europa League 2024/25",
-        "conference-league": "UEFA Europa Conference League 2024/25"
-    }
+        for phrase, code in LEAGUE_PHRASES:
+            if phrase in text_lower:
+                if code in competition_names:
+                    found_leagues = {competition_names[code]}
+                break
 
-    for keyword, league in league_hints.items():
+    for keyword, code in LEAGUE_URL_HINTS.items():
         if keyword in url_lower:
-            if league.startswith("UEFA") and not found_leagues:
+            league = competition_names.get(code)
+            if league is None:
+                break
+            if code in EURO_COMPETITIONS and not found_leagues:
                 found_leagues = {league}
-            elif not league.startswith("UEFA"):
+            elif code not in EURO_COMPETITIONS:
                 if mentioned_uefa and league in domestic_leagues:
                     found_leagues = {league}
                     mentioned_uefa = set()
@@ -143,72 +164,317 @@ def detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to
                     found_leagues = found_leagues or {league}
             break
 
-    return list(set(found_clubs)), list(found_leagues)
+    # Sorted so the output is identical across processes regardless of hash seed.
+    return sorted(set(found_clubs)), sorted(found_leagues)
+
+def load_day_file(file_path):
+    # Read the whole file here: .jsonl days are parsed lazily, and an error while
+    # iterating would otherwise surface in the worker, outside this try.
+    try:
+        return list(read_day_file(file_path))
+    except Exception as e:
+        print(f" Skipping file {os.path.basename(file_path)}: {e}")
+        return None
+
+def iter_clean_articles(articles, keyword_to_club, club_to_league, club_to_euro, competition_names, matcher=None, normalizer=None):
+    # Yields (article, day) for every article kept; articles are updated in place.
+    articles = list(articles)
+    start = time.perf_counter()
+    total = len(articles)
+    articles = [article for article in articles if is_football_article(article, keyword_to_club)]
+    METRICS.throughput("clean_articles", total, time.perf_counter() - start, step="is_football_article")
+    detected = 0
+    detect_seconds = 0.0
+    dates = (normalizer or DATE_NORMALIZER).parse_many(
+        [article.get("date", "") for article in articles], [article.get("source") for article in articles]
+    )
+    for article, dt in zip(articles, dates):
+        if not dt:
+            continue
+        if dt < CUTOFF_DATE:
+            continue
+        article["date"] = dt.isoformat() 
+        text = article.get("title", "") + " " + article.get("summary", "")
+        url = article.get("url", "") 
+        start = time.perf_counter()
+        clubs, leagues = detect_clubs_and_leagues(text, url, keyword_to_club, club_to_league, club_to_euro, competition_names, matcher)
+        detect_seconds += time.perf_counter() - start
+        detected += 1
+        article["clubs"] = clubs
+        article["leagues"] = leagues
+        domestic_leagues = [lg for lg in leagues if not lg.startswith("UEFA")]
+        if domestic_leagues:
+            for club in clubs:
+                league = club_to_league.get(club)
+                if league in domestic_leagues:
+                    article["main_league"] = league
+                    break
+        yield article, dt.date().isoformat()
+    METRICS.throughput("clean_articles", detected, detect_seconds, step="detect_clubs_and_leagues")
+
+def clean_articles(articles, keyword_to_club, club_to_league, club_to_euro, competition_names, matcher=None, normalizer=None, names=None):
+    # With a NameTable the day buckets hold compact ArticleRecords instead of the dicts.
+    by_date = defaultdict(list)
+    for article, true_date in iter_clean_articles(articles, keyword_to_club, club_to_league, club_to_euro, competition_names, matcher, normalizer):
+        by_date[true_date].append(ArticleRecord.from_article(article, names) if names is not None else article)
+    return by_date
+
+def dedupe_day(articles):
+    unique_articles = []
+    seen = set()
+    for article in articles:
+        identifier = (article.get("title"), article.get("source"))
+        if identifier not in seen:
+            unique_articles.append(article)
+            seen.add(identifier)
+
+    unique_articles.sort(key=lambda x: x["date"])
+    return unique_articles
+
+def write_day(output_path, date_str, articles, compact=False):
+    unique_articles = dedupe_day(articles)
+    names = name_table()
+    out_file = day_file_path(output_path, date_str, compact)
+    # Buckets from clean_articles() hold ArticleRecords, or plain dicts without a NameTable.
+    write_day_file(out_file, [article.to_article(names) if isinstance(article, ArticleRecord) else article for article in unique_articles])
+    # A copy of the day in the other format would be read twice by the loaders.
+    other_file = day_file_path(output_path, date_str, not compact)
+    if os.path.exists(other_file):
+        os.remove(other_file)
+    print(f" Saved {len(unique_articles)} articles to {out_file} (Dropped {len(articles) - len(unique_articles)} duplicates)")
+
+_WORKER_MAPS = None
+_NAMES = None
+
+def name_table():
+    # Built from the same maps in every process, so club/league ids agree across workers.
+    global _NAMES
+    if _NAMES is None:
+        _NAMES = NameTable.from_maps(load_keyword_maps(as_of=KEYWORDS_AS_OF))
+    return _NAMES
+
+def _init_worker():
+    global _WORKER_MAPS
+    maps = load_keyword_maps(as_of=KEYWORDS_AS_OF)
+    _WORKER_MAPS = (maps["keyword_to_club"], maps["club_to_league"], maps["club_to_euro"], maps["competition_names"], load_club_matcher(maps))
+
+def _clean_day_file(file_path):
+    articles = load_day_file(file_path)
+    if articles is None:
+        return {}, {}, METRICS.collect()
+    by_date = clean_articles(articles, *_WORKER_MAPS, names=name_table())
+    # Counters live in the worker process; they travel back with the result.
+    return dict(by_date), dict(DATE_NORMALIZER.take_counts()), METRICS.collect()
+
+def _collect(result):
+    by_date, date_counts, metrics = result
+    DATE_STATS.update(date_counts)
+    METRICS.merge(metrics)
+    return by_date
+
+def _file_date(file_path):
+    try:
+        return datetime.strptime(os.path.basename(file_path)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def _clean_files(file_paths, workers=1):
+    if not file_paths:
+        return
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(file_paths)), initializer=_init_worker) as executor:
+            for file_path, result in zip(file_paths, executor.map(_clean_day_file, file_paths)):
+                yield file_path, _collect(result)
+    else:
+        _init_worker()
+        for file_path in file_paths:
+            yield file_path, _collect(_clean_day_file(file_path))
 
-def clean_and_reorganize(folder_path, output_path):
+def clean_and_reorganize(folder_path, output_path, workers=1, manifest_path=None, full=False, stories=True, compact=False):
     print(f" Processing folder: {folder_path}")
-    KEYWORD_TO_CLUB, CLUB_TO_LEAGUE, CLUB_TO_EURO_COMPS = build_keyword_maps()
 
     if not os.path.exists(output_path):
         os.makedirs(output_path)
         print(f" Created directory: {output_path}")
 
+    # Days rebuilt by this run, None when every day was.
+    rebuilt = None
+    if manifest_path is None:
+        clean_all(folder_path, output_path, workers, compact=compact)
+    else:
+        rebuilt = clean_with_manifest(folder_path, output_path, workers, manifest_path, full, compact)
+
+    if DATE_STATS:
+        print(f" Date parsing: {summarize_counts(DATE_STATS)}")
+        DATE_STATS.clear()
+
+    if stories:
+        # Stories span day files, so the days around the rebuilt ones are revisited too.
+        assign_story_ids(output_path, days=rebuilt)
+
+def clean_with_manifest(folder_path, output_path, workers, manifest_path, full, compact=False):
+    manifest = load_manifest(manifest_path)
+    fingerprint = keyword_maps_fingerprint(as_of=KEYWORDS_AS_OF)
+    output_format = "jsonl" if compact else "json"
+    if full or manifest.get("fingerprint") != fingerprint or manifest.get("format", "json") != output_format:
+        print(" Full rebuild (no manifest, --full, club data or output format changed)")
+        contributions = {}
+        clean_all(folder_path, output_path, workers, contributions, compact)
+        rebuilt = None
+        files = {
+            os.path.basename(file_path): {**file_signature(file_path), "dates": contributions.get(os.path.basename(file_path), [])}
+            for file_path in list_day_files(folder_path)
+        }
+    else:
+        files, rebuilt = clean_incremental(folder_path, output_path, workers, manifest.get("files", {}), compact)
+
+    save_manifest(manifest_path, {"fingerprint": fingerprint, "format": output_format, "files": files})
+    return rebuilt
+
+def clean_all(folder_path, output_path, workers=1, contributions=None, compact=False):
+    if workers > 1:
+        clean_and_reorganize_parallel(folder_path, output_path, workers, contributions, compact)
+        return
+
     all_by_date = defaultdict(list)
 
-    for file_name in os.listdir(folder_path):
-        if not file_name.endswith(".json"):
-            continue
+    for file_path, by_date in _clean_files(list_day_files(folder_path)):
+        if contributions is not None:
+            contributions[os.path.basename(file_path)] = sorted(by_date)
+        for date_str, day_articles in by_date.items():
+            all_by_date[date_str].extend(day_articles)
 
-        file_path = os.path.join(folder_path, file_name)
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                articles = json.load(f)
-        except Exception as e:
-            print(f" Skipping file {file_name}: {e}")
-            continue
+    for date_str, articles in all_by_date.items():
+        write_day(output_path, date_str, articles, compact)
 
-        for article in articles:
-            if not is_football_article(article, KEYWORD_TO_CLUB):
-                continue
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f" Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
 
-            dt = convert_to_utc7(article.get("date", ""))
-            if not dt:
-                continue
-            cutoff_date = datetime(2025, 4, 17, tzinfo=tzoffset("UTC+7", 7 * 3600))
-            if dt < cutoff_date:
+def save_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def clean_incremental(folder_path, output_path, workers, previous_files, compact=False):
+    # An output day can hold articles from neighbouring input files (UTC+7 shift), so the
+    # manifest records which days each input file fed. Changed files make those days dirty,
+    # and every unchanged file that also fed a dirty day is re-read to rebuild it in full.
+    current = {os.path.basename(file_path): file_path for file_path in list_day_files(folder_path)}
+    files = {}
+    changed = []
+    for name, file_path in current.items():
+        previous = previous_files.get(name)
+        signature = file_signature(file_path, previous)
+        outputs_present = previous and all(
+            os.path.exists(day_file_path(output_path, date_str, compact)) for date_str in previous.get("dates", [])
+        )
+        if previous and signature["sha256"] == previous.get("sha256") and outputs_present:
+            files[name] = {**signature, "dates": previous.get("dates", [])}
+        else:
+            files[name] = {**signature, "dates": []}
+            changed.append(name)
+    removed = [name for name in previous_files if name not in current]
+
+    if not changed and not removed:
+        print(" No day files changed since last run")
+        return files, set()
+
+    dirty = set()
+    for name in changed + removed:
+        dirty.update(previous_files.get(name, {}).get("dates", []))
+
+    results = {}
+    for file_path, by_date in _clean_files([current[name] for name in changed], workers):
+        name = os.path.basename(file_path)
+        results[name] = by_date
+        files[name]["dates"] = sorted(by_date)
+        dirty.update(by_date)
+
+    neighbours = [name for name in current if name not in results and dirty.intersection(files[name]["dates"])]
+    for file_path, by_date in _clean_files([current[name] for name in neighbours], workers):
+        results[os.path.basename(file_path)] = by_date
+
+    print(f" {len(changed)} changed, {len(removed)} removed, {len(neighbours)} re-read; rebuilding {len(dirty)} days")
+    for date_str in sorted(dirty):
+        articles = [article for name in sorted(results) for article in results[name].get(date_str, [])]
+        if articles:
+            write_day(output_path, date_str, articles, compact)
+        else:
+            for out_file in (day_file_path(output_path, date_str), day_file_path(output_path, date_str, True)):
+                if os.path.exists(out_file):
+                    os.remove(out_file)
+                    print(f" Removed {out_file} (no articles left)")
+    return files, dirty
+
+def clean_and_reorganize_parallel(folder_path, output_path, workers, contributions=None, compact=False):
+    # Day files are cleaned in worker processes and results are consumed in file order.
+    # Converting to UTC+7 can move an article one day either side of its input file, so
+    # an output day is written once the file two days later has been consumed; only a
+    # small window of days is ever held in memory.
+    pending = defaultdict(list)
+    written = set()
+
+    def flush(date_str):
+        write_day(output_path, date_str, pending.pop(date_str), compact)
+        written.add(date_str)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        in_flight = deque()
+        file_paths = iter(list_day_files(folder_path))
+        for file_path in itertools.islice(file_paths, workers * 2):
+            in_flight.append((file_path, executor.submit(_clean_day_file, file_path)))
+
+        while in_flight:
+            file_path, future = in_flight.popleft()
+            by_date = _collect(future.result())
+            if contributions is not None:
+                contributions[os.path.basename(file_path)] = sorted(by_date)
+            for next_path in itertools.islice(file_paths, 1):
+                in_flight.append((next_path, executor.submit(_clean_day_file, next_path)))
+
+            for date_str, articles in by_date.items():
+                if date_str in written:
+                    # Stray article for a day already on disk: merge it back in. Earlier
+                    # files come first, so dedup and the stable sort match a serial run.
+                    out_file = day_file_path(output_path, date_str, compact)
+                    names = name_table()
+                    pending[date_str] = [ArticleRecord.from_article(article, names) for article in read_day_file(out_file)]
+                    pending[date_str].extend(articles)
+                    flush(date_str)
+                else:
+                    pending[date_str].extend(articles)
+
+            file_date = _file_date(file_path)
+            if file_date is None:
                 continue
-            article["date"] = dt.isoformat() 
-            text = article.get("title", "") + " " + article.get("summary", "")
-            url = article.get("url", "") 
-            clubs, leagues = detect_clubs_and_leagues(text, url, KEYWORD_TO_CLUB, CLUB_TO_LEAGUE, CLUB_TO_EURO_COMPS)
-            article["clubs"] = clubs
-            article["leagues"] = leagues
-            domestic_leagues = [lg for lg in leagues if not lg.startswith("UEFA")]
-            if domestic_leagues:
-                for club in clubs:
-                    league = CLUB_TO_LEAGUE.get(club)
-                    if league in domestic_leagues:
-                        article["main_league"] = league
-                        break
-            true_date = dt.date().isoformat()
-            all_by_date[true_date].append(article)
+            horizon = (file_date - timedelta(days=1)).isoformat()
+            for date_str in sorted(d for d in pending if d < horizon):
+                flush(date_str)
 
-    for date_str, articles in all_by_date.items():
-        unique_articles = []
-        seen = set()
-        for article in articles:
-            identifier = (article.get("title"), article.get("source"))
-            if identifier not in seen:
-                unique_articles.append(article)
-                seen.add(identifier)
-
-        unique_articles.sort(key=lambda x: x["date"])
-        out_file = os.path.join(output_path, f"{date_str}.json")
-        with open(out_file, "w", encoding="utf-8") as f:
-            json.dump(unique_articles, f, indent=2, ensure_ascii=False)
-        print(f" Saved {len(unique_articles)} articles to {out_file} (Dropped {len(articles) - len(unique_articles)} duplicates)")
+    for date_str in sorted(pending):
+        flush(date_str)
 
 if __name__ == "__main__":
     INPUT_DIR = "data/rss_by_day"
     OUTPUT_DIR = "data/rss_clean_final"
-    clean_and_reorganize(INPUT_DIR, OUTPUT_DIR)
+    MANIFEST_PATH = "data/rss_clean_manifest.json"
+    arg_parser = argparse.ArgumentParser(description="Clean and reorganize scraped RSS articles by day")
+    arg_parser.add_argument("--input", default=INPUT_DIR)
+    arg_parser.add_argument("--output", default=OUTPUT_DIR)
+    arg_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (1 = serial)")
+    arg_parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest used to skip unchanged day files")
+    arg_parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild every day")
+    arg_parser.add_argument("--no-stories", action="store_true", help="Skip assigning near-duplicate story ids")
+    arg_parser.add_argument("--format", choices=["json", "jsonl"], default="json",
+                            help="jsonl: compact day files, one article per line (orjson if installed), read directly by database.py")
+    args = arg_parser.parse_args()
+    with run_report("clean"):
+        clean_and_reorganize(args.input, args.output, args.workers, args.manifest, args.full, not args.no_stories, args.format == "jsonl")
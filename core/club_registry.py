@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import sqlite3
+import argparse
+
+# Club/competition/season registry built from every file in data/football.json-master
+# (<season>/<competition code>.json, e.g. 2024-25/en.1.json). One row per club per
+# competition and season, with the dates of the club's first and last match in it, so the
+# keyword maps can be built for any season. Files are parsed in parallel and only files
+# that changed since the last run are parsed again.
+
+SOURCE_DIR = "data/football.json-master"
+REGISTRY_PATH = "data/club_registry.sqlite3"
+
+CLUB_NORMALIZATION = {
+    "Inter": "FC Internazionale Milano",
+    "Roma": "AS Roma",
+    "Lazio": "SS Lazio",
+    "Feyenoord": "Feyenoord Rotterdam",
+    "Ajax": "AFC Ajax",
+    "Rangers": "Rangers FC",
+    "Celtic": "Celtic FC",
+    "Braga": "SC Braga",
+    "Betis": "Real Betis Balompié",
+}
+# UEFA files name clubs with their country: "Arsenal FC (ENG)".
+COUNTRY_SUFFIX = re.compile(r"\s+\([A-Z]{3}\)$")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS competitions (
+        code TEXT, season TEXT, name TEXT, first_date TEXT, last_date TEXT,
+        source TEXT, mtime REAL, size INTEGER,
+        PRIMARY KEY (code, season)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS competitions_season ON competitions (season)",
+    """CREATE TABLE IF NOT EXISTS club_competitions (
+        club TEXT, code TEXT, season TEXT, first_date TEXT, last_date TEXT, matches INTEGER,
+        PRIMARY KEY (code, season, club)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS club_competitions_club ON club_competitions (club)",
+    "CREATE INDEX IF NOT EXISTS club_competitions_season ON club_competitions (season, code)",
+]
+
+def normalize_club(name):
+    name = COUNTRY_SUFFIX.sub("", name.strip())
+    return CLUB_NORMALIZATION.get(name, name)
+
+def list_competition_files(source_dir=SOURCE_DIR):
+    sources = []
+    for season in sorted(os.listdir(source_dir)):
+        season_dir = os.path.join(source_dir, season)
+        if not os.path.isdir(season_dir):
+            continue
+        for filename in sorted(os.listdir(season_dir)):
+            if filename.endswith(".json"):
+                sources.append(f"{season}/{filename}")
+    return sources
+
+def read_competition(source_dir, source):
+    season, filename = source.split("/")
+    with open(os.path.join(source_dir, source), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    clubs = {}
+    for match in data.get("matches", []):
+        day = match.get("date", "")
+        for team_key in ("team1", "team2"):
+            team = match.get(team_key, "").strip()
+            if not team:
+                continue
+            club = normalize_club(team)
+            first, last, matches = clubs.get(club, (day, day, 0))
+            clubs[club] = (min(first, day), max(last, day), matches + 1)
+    days = [first for first, _, _ in clubs.values()] + [last for _, last, _ in clubs.values()]
+    return {
+        "code": filename[:-len(".json")],
+        "season": season,
+        "name": data["name"].strip(),
+        "first_date": min(days, default=""),
+        "last_date": max(days, default=""),
+        "source": source,
+        "clubs": clubs
+    }
+
+def _read_competition(args):
+    return read_competition(*args)
+
+def connect_registry(path=REGISTRY_PATH):
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+    return conn
+
+def ingest_registry(source_dir=SOURCE_DIR, path=REGISTRY_PATH, workers=None, full=False):
+    # A first build fills a temporary file and moves it into place when it is complete, so
+    # another process (a cleaner worker) never opens a registry that exists but is empty.
+    # Later runs update the registry in place, in one transaction.
+    build_path = path if os.path.exists(path) else f"{path}.{os.getpid()}.tmp"
+    try:
+        conn = _ingest(connect_registry(build_path), source_dir, path, workers, full)
+    except BaseException:
+        if build_path != path and os.path.exists(build_path):
+            os.remove(build_path)
+        raise
+    if build_path != path:
+        conn.close()
+        os.replace(build_path, path)
+        conn = connect_registry(path)
+    return conn
+
+def _ingest(conn, source_dir, path, workers, full):
+    known = {source: (mtime, size) for source, mtime, size in conn.execute("SELECT source, mtime, size FROM competitions")}
+    sources = list_competition_files(source_dir)
+    stats = {}
+    for source in sources:
+        st = os.stat(os.path.join(source_dir, source))
+        stats[source] = (st.st_mtime, st.st_size)
+    changed = [source for source in sources if full or known.get(source) != stats[source]]
+    removed = set(known) - set(sources)
+
+    workers = workers or os.cpu_count() or 1
+    jobs = [(source_dir, source) for source in changed]
+    if workers > 1 and len(jobs) > 1:
+        # Imported here: readers of the registry (every cleaner worker) never need it.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            competitions = list(executor.map(_read_competition, jobs, chunksize=8))
+    else:
+        competitions = [_read_competition(job) for job in jobs]
+
+    with conn:
+        for source in removed:
+            for code, season in conn.execute("SELECT code, season FROM competitions WHERE source = ?", (source,)).fetchall():
+                conn.execute("DELETE FROM club_competitions WHERE code = ? AND season = ?", (code, season))
+                conn.execute("DELETE FROM competitions WHERE code = ? AND season = ?", (code, season))
+        for comp in competitions:
+            mtime, size = stats[comp["source"]]
+            conn.execute("DELETE FROM club_competitions WHERE code = ? AND season = ?", (comp["code"], comp["season"]))
+            conn.execute(
+                "INSERT OR REPLACE INTO competitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (comp["code"], comp["season"], comp["name"], comp["first_date"], comp["last_date"], comp["source"], mtime, size)
+            )
+            conn.executemany(
+                "INSERT INTO club_competitions VALUES (?, ?, ?, ?, ?, ?)",
+                ((club, comp["code"], comp["season"], first, last, matches) for club, (first, last, matches) in comp["clubs"].items())
+            )
+
+    competition_count, club_entries = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM competitions), (SELECT COUNT(*) FROM club_competitions)"
+    ).fetchone()
+    print(f" Club registry {path}: parsed {len(changed)} files ({len(sources) - len(changed)} unchanged, {len(removed)} removed), "
+          f"{competition_count} competitions, {club_entries} club entries")
+    return conn
+
+def open_registry(path=REGISTRY_PATH, source_dir=SOURCE_DIR):
+    # First use: build the registry from football.json-master once.
+    if not os.path.exists(path):
+        return ingest_registry(source_dir, path)
+    return connect_registry(path)
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+def resolve_season(conn, codes, as_of=None):
+    # Latest season of these competitions that had started by as_of ("YYYY-MM-DD").
+    query = f"SELECT season FROM competitions WHERE code IN ({_placeholders(codes)})"
+    params = list(codes)
+    if as_of:
+        query += " AND first_date <= ?"
+        params.append(str(as_of)[:10])
+    row = conn.execute(query + " ORDER BY first_date DESC LIMIT 1", params).fetchone()
+    if row is None:
+        raise ValueError(f"No season of {', '.join(codes)} in the club registry" + (f" before {as_of}" if as_of else ""))
+    return row[0]
+
+def season_clubs(conn, season, codes, active_since=None):
+    # (club, code) pairs, in the order of codes; active_since keeps only clubs that
+    # still played in the competition on or after that date.
+    query = f"SELECT club, code FROM club_competitions WHERE season = ? AND code IN ({_placeholders(codes)})"
+    params = [season, *codes]
+    if active_since:
+        query += " AND last_date >= ?"
+        params.append(str(active_since)[:10])
+    position = {code: i for i, code in enumerate(codes)}
+    rows = conn.execute(query + " ORDER BY first_date, club", params).fetchall()
+    return sorted(rows, key=lambda row: position[row[1]])
+
+def competition_names(conn, season, codes):
+    query = f"SELECT code, name FROM competitions WHERE season = ? AND code IN ({_placeholders(codes)})"
+    return dict(conn.execute(query, [season, *codes]).fetchall())
+
+def club_history(conn, club):
+    return conn.execute(
+        "SELECT c.season, c.code, c.name, cc.first_date, cc.last_date, cc.matches "
+        "FROM club_competitions cc JOIN competitions c ON c.code = cc.code AND c.season = cc.season "
+        "WHERE cc.club = ? ORDER BY cc.first_date", (normalize_club(club),)
+    ).fetchall()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Ingest football.json-master into the club/competition/season registry")
+    arg_parser.add_argument("--source", default=SOURCE_DIR)
+    arg_parser.add_argument("--registry", default=REGISTRY_PATH)
+    arg_parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU)")
+    arg_parser.add_argument("--full", action="store_true", help="Re-parse every file, not only changed ones")
+    arg_parser.add_argument("--club", help="Print the competitions of one club after ingesting")
+    args = arg_parser.parse_args()
+
+    conn = ingest_registry(args.source, args.registry, args.workers, args.full)
+    if args.club:
+        for season, code, name, first_date, last_date, matches in club_history(conn, args.club):
+            print(f" {season:8} {code:9} {name} ({matches} matches, {first_date} to {last_date})")
+    conn.close()
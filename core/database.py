@@ -1,16 +1,120 @@
-import json
 import os
-from pymongo import MongoClient
+import time
+import argparse
+import itertools
+from datetime import datetime, timezone
+from pymongo import MongoClient, ReplaceOne, ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+from day_storage import is_day_file, read_day_file, file_signature
+from metrics import METRICS, run_report
+
+INPUT_DIR = "data/rss_clean_final"
+BATCH_SIZE = 1000
 
 client = MongoClient("mongodb://localhost:27017/")
 db = client["football_news"]
 collection = db["cleaned_articles"]
+load_state = db["load_state"]
+
+def remove_duplicate_urls(collection):
+    # Corpora loaded by the old insert_many loader can hold the same URL several times;
+    # keep the first copy so the unique index can be built.
+    removed = 0
+    pipeline = [
+        {"$group": {"_id": "$url", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        result = collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    return removed
+
+def ensure_indexes(collection):
+    try:
+        collection.create_index([("url", ASCENDING)], unique=True, name="url_unique")
+    except OperationFailure:
+        removed = remove_duplicate_urls(collection)
+        print(f" Removed {removed} duplicate articles before creating the unique url index")
+        collection.create_index([("url", ASCENDING)], unique=True, name="url_unique")
+    # Serves db_to_elastic.py's sync query and sort, which break updated_at ties by _id.
+    collection.create_index([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at_id")
+    collection.create_index([("story_id", ASCENDING)], name="story_id")
+
+def upsert_articles(collection, articles, batch_size=BATCH_SIZE):
+    # Unordered bulk upserts keyed on url: re-running the loader rewrites the same
+    # documents instead of duplicating them, and one bad document does not stop a batch.
+    # Returns (written, failed); a caller must not treat a day as loaded while failed > 0.
+    articles = iter(articles)
+    written = 0
+    failed = 0
+    while True:
+        batch = list(itertools.islice(articles, batch_size))
+        if not batch:
+            break
+        # updated_at is the high-water mark db_to_elastic.py uses for incremental syncs.
+        updated_at = datetime.now(timezone.utc)
+        requests = [
+            ReplaceOne({"url": article["url"]}, {**article, "updated_at": updated_at}, upsert=True)
+            for article in batch if article.get("url")
+        ]
+        if not requests:
+            continue
+        start = time.perf_counter()
+        try:
+            result = collection.bulk_write(requests, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            errors = result.get("writeErrors", [])
+            failed += max(len(errors), len(requests) - result.get("nUpserted", 0) - result.get("nMatched", 0))
+            print(f" {len(errors)} write errors in batch, first: {errors[0]['errmsg'] if errors else 'unknown'}")
+        latency = time.perf_counter() - start
+        batch_written = result.get("nUpserted", 0) + result.get("nMatched", 0)
+        METRICS.observe("mongo_bulk_seconds", latency)
+        METRICS.throughput("mongo_bulk_docs", batch_written, latency)
+        written += batch_written
+    return written, failed
+
+def save(json_path, batch_size=BATCH_SIZE):
+    upserted, failed = upsert_articles(collection, read_day_file(json_path), batch_size)
+    if upserted:
+        print(f"Upserted {upserted} articles from {json_path}")
+    if failed:
+        print(f" {failed} articles from {json_path} failed, the day will be retried on the next run")
+    return upserted, failed
+
+def load_days(folder_path=INPUT_DIR, batch_size=BATCH_SIZE, full=False):
+    ensure_indexes(collection)
+    total = 0
+    skipped = 0
+    failed_days = 0
+    start = time.perf_counter()
+    for entry in sorted(os.scandir(folder_path), key=lambda e: e.name):
+        if not is_day_file(entry.name):
+            continue
+        previous = None if full else load_state.find_one({"_id": entry.name})
+        signature = file_signature(entry.path, previous)
+        if previous and previous.get("sha256") == signature["sha256"]:
+            skipped += 1
+            continue
+        upserted, failed = save(entry.path, batch_size)
+        total += upserted
+        if failed:
+            failed_days += 1
+            continue
+        load_state.replace_one({"_id": entry.name}, {"_id": entry.name, **signature}, upsert=True)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0
+    print(f" Loaded {total} articles in {elapsed:.2f}s ({rate:,.0f} docs/sec); {skipped} unchanged days skipped")
+    if failed_days:
+        print(f" {failed_days} days had write errors and were not marked as loaded")
+    return total
 
-def save(json_path):
-    with open(json_path, "r", encoding = "utf-8") as f:
-        articles = json.load(f)
-        if articles:
-            collection.insert_many(articles)
-            print(f"Inserted {len(articles)} articles from {json_path}")
-for filename in os.scandir("data/rss_clean_final"):
-    save(filename)
\ No newline at end of file
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Load cleaned day files into MongoDB")
+    arg_parser.add_argument("--input", default=INPUT_DIR)
+    arg_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    arg_parser.add_argument("--full", action="store_true", help="Reload every day, even unchanged ones")
+    args = arg_parser.parse_args()
+    with run_report("mongo_load"):
+        load_days(args.input, args.batch_size, args.full)
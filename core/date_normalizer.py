@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from collections import Counter
+from dateutil import parser
+
+# Feed dates come as ISO-8601 ("2025-05-14T23:13:23") or RFC-822 ("Sun, 25 May 2025
+# 19:15:00 BST"). DateNormalizer tries cheap parsers first and only hands odd inputs to
+# dateutil. The parser that worked last for a source is tried first for its next date.
+# Naive results are taken as UTC, as convert_to_utc7 always did; zone names neither
+# email.utils nor dateutil know (BST, CEST, ...) therefore also end up as UTC. The US zone
+# names email.utils knows (EDT, PST, ...) get their offset, where dateutil ignored them.
+
+UTC7 = timezone(timedelta(hours=7), "UTC+7")
+
+MONTHS = {name: i for i, name in enumerate(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+# Same named zones email.utils understands.
+ZONE_OFFSETS = {
+    "GMT": 0, "UT": 0, "UTC": 0, "Z": 0,
+    "EST": -5, "EDT": -4, "CST": -6, "CDT": -5, "MST": -7, "MDT": -6, "PST": -8, "PDT": -7
+}
+ZONES = {name: timezone(timedelta(hours=hours)) for name, hours in ZONE_OFFSETS.items()}
+
+def parse_iso(value):
+    return datetime.fromisoformat(value)
+
+def parse_rfc822_fixed(value):
+    # "Sun, 25 May 2025 19:15:00 GMT": the layout every feed we scrape uses, sliced directly.
+    if len(value) < 29 or value[3:5] != ", " or value[19] != ":" or value[22] != ":" or value[25] != " ":
+        raise ValueError(value)
+    parsed = datetime(int(value[12:16]), MONTHS[value[8:11]], int(value[5:7]),
+                      int(value[17:19]), int(value[20:22]), int(value[23:25]))
+    zone = value[26:]
+    if zone[0] in "+-":
+        minutes = int(zone[1:3]) * 60 + int(zone[3:5])
+        # -0000 means "no zone information" (RFC 2822), like email.utils.
+        if minutes or zone[0] == "+":
+            return parsed.replace(tzinfo=timezone(timedelta(minutes=minutes if zone[0] == "+" else -minutes)))
+        return parsed
+    tz = ZONES.get(zone)
+    if tz is None and zone.upper() in ("AM", "PM"):
+        raise ValueError(value)
+    return parsed.replace(tzinfo=tz) if tz else parsed
+
+def parse_rfc822(value):
+    parsed = parsedate_to_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    # email.utils takes any last word for a zone name ("7:15 PM" becomes 07:15); without
+    # a zone it understood, dateutil reads the value instead.
+    if parsed.tzinfo is None and not value.endswith("-0000"):
+        raise ValueError(value)
+    return parsed
+
+FAST_PARSERS = {"iso": parse_iso, "rfc822_fixed": parse_rfc822_fixed, "rfc822": parse_rfc822}
+
+def guess_parsers(value):
+    if value[:1].isdigit():
+        return ("iso", "rfc822")
+    return ("rfc822_fixed", "rfc822")
+
+class DateNormalizer:
+    def __init__(self, tz=UTC7):
+        self.tz = tz
+        self.counts = Counter()
+        self.source_parsers = {}
+
+    def parse(self, value, source=None):
+        # Aware datetime in self.tz, or None when nothing can read the value.
+        if not isinstance(value, str) or not value.strip():
+            self.counts["failed"] += 1
+            return None
+        value = value.strip()
+        learned = self.source_parsers.get(source)
+        if learned is not None:
+            try:
+                parsed = FAST_PARSERS[learned](value)
+                self.counts[learned] += 1
+                self.counts["learned"] += 1
+                return self._localize(parsed)
+            except (ValueError, KeyError, IndexError, TypeError):
+                pass
+        for name in guess_parsers(value):
+            if name == learned:
+                continue
+            try:
+                parsed = FAST_PARSERS[name](value)
+            except (ValueError, KeyError, IndexError, TypeError):
+                continue
+            self.counts[name] += 1
+            self.source_parsers[source] = name
+            return self._localize(parsed)
+        try:
+            parsed = parser.parse(value)
+        except (ValueError, OverflowError):
+            self.counts["failed"] += 1
+            print(f" Failed parse date: {value}")
+            return None
+        self.counts["dateutil"] += 1
+        return self._localize(parsed)
+
+    def parse_many(self, values, sources=None):
+        # Batch variant for re-cleaning whole day files: each distinct (value, source) is
+        # parsed once, and values are grouped by source so the learned parser stays hot.
+        sources = sources if sources is not None else [None] * len(values)
+        by_source = {}
+        for position, (value, source) in enumerate(zip(values, sources)):
+            by_source.setdefault(source, []).append(position)
+        results = [None] * len(values)
+        for source, positions in by_source.items():
+            parsed = {}
+            for position in positions:
+                value = values[position]
+                key = value if isinstance(value, str) else None
+                if key is None or key not in parsed:
+                    result = self.parse(value, source)
+                    if key is None:
+                        results[position] = result
+                        continue
+                    parsed[key] = result
+                else:
+                    self.counts["repeated"] += 1
+                results[position] = parsed[key]
+        return results
+
+    def _localize(self, parsed):
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(self.tz)
+
+    def take_counts(self):
+        counts, self.counts = self.counts, Counter()
+        return counts
+
+def summarize_counts(counts):
+    counts = Counter(counts)
+    total = sum(count for name, count in counts.items() if name not in ("learned", "repeated"))
+    parts = [f"{name} {counts[name]}" for name in ("iso", "rfc822_fixed", "rfc822", "dateutil", "failed") if counts[name]]
+    return f"{total} dates: " + ", ".join(parts) + f" (learned format first try: {counts['learned']}, repeated: {counts['repeated']})"
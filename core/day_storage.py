@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import hashlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DAY_FILE_EXTENSIONS = (".json", ".jsonl")
+
+def is_day_file(file_name):
+    return file_name.endswith(DAY_FILE_EXTENSIONS)
+
+def list_day_files(folder_path):
+    # Sorted so a day stored in both formats is read .json first, then .jsonl.
+    return [
+        os.path.join(folder_path, file_name)
+        for file_name in sorted(os.listdir(folder_path))
+        if is_day_file(file_name)
+    ]
+
+def read_day_file(file_path):
+    if file_path.endswith(".jsonl"):
+        return iter_jsonl(file_path)
+    with open(file_path, "r", encoding="utf-8") as f:
+        return iter(json.load(f))
+
+def iter_jsonl(file_path):
+    # Lines are decoded one by one (bytes in, so bad UTF-8 is a ValueError here too): a torn
+    # final line from an interrupted append, or any other corrupt line, is skipped on its own.
+    with open(file_path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                article = loads(line)
+            except ValueError:
+                article = None
+            if not isinstance(article, dict):
+                print(f" Skipping malformed line {number} in {file_path}")
+                continue
+            yield article
+
+def loads(line):
+    # orjson when installed (its decode error is a ValueError too).
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+def dumps_compact(article):
+    if orjson is not None:
+        return orjson.dumps(article)
+    return json.dumps(article, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def day_file_path(folder_path, date_str, compact=False):
+    return os.path.join(folder_path, f"{date_str}.jsonl" if compact else f"{date_str}.json")
+
+def write_day_file(file_path, articles):
+    # .json: the pretty-printed array; .jsonl: one compact object per line, which is what
+    # iter_jsonl (and so the Mongo loader) reads. Written to a temporary file and renamed.
+    tmp_path = file_path + ".tmp"
+    if file_path.endswith(".jsonl"):
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(dumps_compact(article) + b"\n" for article in articles))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(articles, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+def append_articles(file_path, articles):
+    # One O_APPEND write per batch followed by fsync: a crash can at worst leave a
+    # partial last line, which iter_jsonl skips; earlier lines are never rewritten.
+    if not articles:
+        return 0
+    data = "".join(json.dumps(article, ensure_ascii=False) + "\n" for article in articles).encode("utf-8")
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size and not _ends_with_newline(file_path):
+            data = b"\n" + data
+        # os.write may write less than asked (signals, full disks); a short write must not
+        # leave half a record behind with the rest silently dropped.
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return len(data)
+
+def _ends_with_newline(file_path):
+    with open(file_path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+def file_signature(file_path, previous=None):
+    stat = os.stat(file_path)
+    signature = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if previous and previous.get("size") == signature["size"] and previous.get("mtime") == signature["mtime"]:
+        signature["sha256"] = previous.get("sha256")
+        return signature
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    signature["sha256"] = digest.hexdigest()
+    return signature
+
+def convert_to_jsonl(folder_path):
+    for file_name in sorted(os.listdir(folder_path)):
+        if not file_name.endswith(".json"):
+            continue
+        json_path = os.path.join(folder_path, file_name)
+        jsonl_path = json_path + "l"
+        with open(json_path, "r", encoding="utf-8") as f:
+            articles = json.load(f)
+
+        # Lines already appended to a .jsonl for the same day come after the old .json content.
+        existing = list(iter_jsonl(jsonl_path)) if os.path.exists(jsonl_path) else []
+        tmp_path = jsonl_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for article in articles + existing:
+                f.write(json.dumps(article, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, jsonl_path)
+        os.remove(json_path)
+        print(f" Converted {json_path} -> {jsonl_path} ({len(articles) + len(existing)} articles)")
+
+if __name__ == "__main__":
+    convert_to_jsonl(sys.argv[1] if len(sys.argv) > 1 else "data/rss_by_day")
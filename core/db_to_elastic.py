@@ -1,46 +1,448 @@
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import itertools
+import statistics
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from bson import ObjectId
 from pymongo import MongoClient
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, BadRequestError
 from elasticsearch.helpers import bulk
+from metrics import METRICS, run_report
+from keywords_match import load_keyword_maps, club_aliases
 
 mongo_client = MongoClient("mongodb://localhost:27017")
 mongo_db = mongo_client["football_news"]
 mongo_collection = mongo_db["cleaned_articles"]
 
+# Same environment variables as the search app (search_common.py); there is no default
+# password, require_es_credentials() stops a run that would write without one.
+ES_USERNAME = os.environ.get("ES_USERNAME", "elastic")
+ES_PASSWORD = os.environ.get("ES_PASSWORD", "")
+
 es = Elasticsearch(
     "https://localhost:9200",
-    basic_auth=("elastic", "AjHJ8y3ZPnroSXIvKK_f"),  
+    basic_auth=(ES_USERNAME, ES_PASSWORD),
     verify_certs=False
 )
 
-index_name = "football_news"
-
-if es.indices.exists(index=index_name):
-    es.indices.delete(index=index_name)
-    print(f" Deleted existing index: {index_name}")
-
-es.indices.create(index=index_name, body={
-    "mappings": {
-        "properties": {
-            "title": {"type": "text"},
-            "summary": {"type": "text"},
-            "url": {"type": "keyword"},
-            "date": {"type": "date"},
-            "source": {"type": "keyword"},
-            "clubs": {"type": "keyword"},  
-            "leagues": {"type": "keyword"},
-            "main_league": {"type": "keyword"}  
-        }
+def require_es_credentials():
+    if not ES_PASSWORD:
+        raise RuntimeError(f"ES_PASSWORD is not set for Elasticsearch user {ES_USERNAME}")
+
+# app.py searches the alias; the concrete indices behind it are versioned and split by
+# month of the article date (the UTC+7 day the cleaner files it under):
+# football_news_v<build>-YYYY-MM. Every month also has its own alias, football_news-YYYY-MM,
+# which /search targets for a date range, so a query only touches the months it asks for.
+INDEX_ALIAS = "football_news"
+PARTITION_PATTERN = re.compile(rf"^{INDEX_ALIAS}_v(\d+)-(\d{{4}}-\d{{2}})$")
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}")
+# Partitions this many months behind the newest one are force-merged to a single segment
+# and made read-only; late articles thaw them for the length of a write.
+WRITABLE_MONTHS = 2
+
+CHUNK_SIZE = 2000
+MAX_CHUNK_BYTES = 10 * 1024 * 1024
+THREAD_COUNT = 4
+CURSOR_BATCH_SIZE = 2000
+
+INDEX_MAPPING = {
+    "properties": {
+        "title": {"type": "text"},
+        "summary": {"type": "text"},
+        "url": {"type": "keyword"},
+        "date": {"type": "date"},
+        "source": {"type": "keyword"},
+        "clubs": {"type": "keyword"},
+        "leagues": {"type": "keyword"},
+        "main_league": {"type": "keyword"},
+        "story_id": {"type": "keyword"},
+        "updated_at": {"type": "date"},
+        # Club names and their aliases, for the completion suggester behind /api/suggest
+        # (SUGGEST_BACKEND=elasticsearch).
+        "club_suggest": {"type": "completion"}
     }
-})
-print(f" Created index: {index_name}")
+}
+_CLUB_ALIASES = None
+
+def add_club_suggest(doc):
+    global _CLUB_ALIASES
+    if not doc.get("clubs"):
+        return doc
+    if _CLUB_ALIASES is None:
+        _CLUB_ALIASES = club_aliases(load_keyword_maps())
+    inputs = []
+    for club in doc["clubs"]:
+        for name in [club] + _CLUB_ALIASES.get(club, []):
+            if name not in inputs:
+                inputs.append(name)
+    doc["club_suggest"] = {"input": inputs}
+    return doc
+
+def doc_id(doc):
+    # Derived from the URL so the same article keeps its _id across Mongo reloads.
+    return hashlib.sha1(doc["url"].encode("utf-8")).hexdigest()
+
+def partition_month(doc):
+    for field in ("date", "updated_at"):
+        value = str(doc.get(field) or "")
+        if MONTH_PATTERN.match(value):
+            return value[:7]
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+def month_alias(month):
+    return f"{INDEX_ALIAS}-{month}"
+
+def month_number(month):
+    year, number = month.split("-")
+    return int(year) * 12 + int(number)
+
+class Partitions:
+    # The monthly indices of one build. index_for() routes a document to its month,
+    # creating the partition the first time a month shows up (the rollover) and thawing a
+    # frozen one; finish() re-freezes them and freezes months that fell out of the
+    # writable window. live: new partitions join the read alias straight away
+    # (incremental syncs, the pipeline); a full rebuild swaps all of them in at the end.
+
+    def __init__(self, build, months=(), frozen=(), live=False):
+        self.build = build
+        self.indices = {month: f"{INDEX_ALIAS}_v{build}-{month}" for month in months}
+        self.frozen = set(frozen)
+        self.live = live
+        self.create_settings = None
+        self.created = set()
+        self.thawed = set()
+        self.written = set()
+
+    @classmethod
+    def current(cls):
+        # None when the read alias is missing or still points at an unpartitioned index.
+        builds = set()
+        months = []
+        for index in alias_targets():
+            match = PARTITION_PATTERN.match(index)
+            if not match:
+                return None
+            builds.add(match.group(1))
+            months.append(match.group(2))
+        if len(builds) != 1:
+            return None
+        settings = es.indices.get_settings(index=INDEX_ALIAS, name="index.blocks.write")
+        frozen = [
+            PARTITION_PATTERN.match(index).group(2)
+            for index, value in settings.items()
+            if str(value["settings"].get("index", {}).get("blocks", {}).get("write", "false")) == "true"
+        ]
+        return cls(builds.pop(), months, frozen, live=True)
+
+    def index_for(self, doc):
+        month = partition_month(doc)
+        index = self.indices.get(month)
+        if index is None:
+            index = self.create(month)
+        elif month in self.frozen and month not in self.thawed:
+            es.indices.put_settings(index=index, settings={"index.blocks.write": False})
+            self.thawed.add(month)
+            print(f" Thawed {index} for late articles")
+        self.written.add(month)
+        return index
+
+    def create(self, month):
+        index = f"{INDEX_ALIAS}_v{self.build}-{month}"
+        try:
+            es.indices.create(index=index, mappings=INDEX_MAPPING, settings=self.create_settings)
+        except BadRequestError as e:
+            # Another writer (pipeline vs. db_to_elastic.py) created it first.
+            if e.error != "resource_already_exists_exception":
+                raise
+        if self.live:
+            es.indices.update_aliases(actions=[
+                {"add": {"index": index, "alias": INDEX_ALIAS}},
+                {"add": {"index": index, "alias": month_alias(month)}}
+            ])
+        self.indices[month] = index
+        self.created.add(month)
+        print(f" Created partition: {index}")
+        return index
+
+    def writable(self):
+        return [index for month, index in self.indices.items() if month not in self.frozen]
+
+    def take_written(self):
+        written = [self.indices[month] for month in sorted(self.written)]
+        self.written = set()
+        return written
+
+    def finish(self):
+        if not self.indices:
+            return
+        newest = max(month_number(month) for month in self.indices)
+        for month, index in sorted(self.indices.items()):
+            if month in self.thawed or (month not in self.frozen and newest - month_number(month) >= WRITABLE_MONTHS):
+                self.freeze(month, index)
+        self.thawed = set()
 
-def generate_documents():
-    for doc in mongo_collection.find():
-        doc.pop("_id", None) 
+    def freeze(self, month, index):
+        # One segment per shard and no more writes: the month is small and fast to search,
+        # and merges never touch it again.
+        es.indices.refresh(index=index)
+        es.indices.forcemerge(index=index, max_num_segments=1)
+        es.indices.put_settings(index=index, settings={"index.blocks.write": True})
+        self.frozen.add(month)
+        print(f" Froze partition: {index}")
+
+def generate_documents(partitions, query=None, sync_state=None, cursor_batch_size=CURSOR_BATCH_SIZE):
+    # Only fetch the fields the mapping knows about; everything else is dead weight on the wire.
+    # The loader stamps a whole batch with one updated_at, so the Mongo _id breaks ties and
+    # the mark is the (updated_at, _id) of the last document sent.
+    projection = {field: 1 for field in INDEX_MAPPING["properties"]}
+    cursor = mongo_collection.find(query or {}, projection, batch_size=cursor_batch_size).sort([("updated_at", 1), ("_id", 1)])
+    for doc in cursor:
+        mongo_id = doc.pop("_id")
+        updated_at = doc.get("updated_at")
+        if sync_state is not None and updated_at:
+            sync_state["high_water_mark"] = updated_at
+            sync_state["high_water_id"] = str(mongo_id)
         yield {
-            "_index": index_name,
-            "_source": doc
+            "_index": partitions.index_for(doc),
+            "_id": doc_id(doc),
+            "_source": add_club_suggest(doc)
         }
 
-success, _ = bulk(es, generate_documents())
-print(f"Successfully indexed {success} documents into {index_name}")
+def chunk_actions(actions, chunk_size=CHUNK_SIZE, max_chunk_bytes=MAX_CHUNK_BYTES):
+    chunk = []
+    chunk_bytes = 0
+    for action in actions:
+        size = len(json.dumps(action["_source"], default=str))
+        if chunk and (len(chunk) >= chunk_size or chunk_bytes + size > max_chunk_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(action)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+@contextmanager
+def bulk_load_settings(partitions):
+    # Refreshes and replica copies only slow a bulk load down; switch them off for the
+    # duration and put the previous values back (null restores the cluster default).
+    # Partitions created during the load start with them off and get the defaults after.
+    indices = partitions.writable()
+    previous = {}
+    for index, value in es.indices.get_settings(index=",".join(indices)).items() if indices else []:
+        current = value["settings"]["index"]
+        previous[index] = {
+            "refresh_interval": current.get("refresh_interval"),
+            "number_of_replicas": current.get("number_of_replicas")
+        }
+        es.indices.put_settings(index=index, settings={"refresh_interval": "-1", "number_of_replicas": 0})
+    partitions.create_settings = {"refresh_interval": "-1", "number_of_replicas": 0}
+    try:
+        yield
+    finally:
+        partitions.create_settings = None
+        for month in partitions.created:
+            previous.setdefault(partitions.indices[month], {"refresh_interval": None, "number_of_replicas": None})
+        for index, settings in previous.items():
+            es.indices.put_settings(index=index, settings=settings)
+        if previous:
+            es.indices.refresh(index=",".join(previous))
+
+def fast_bulk(partitions, actions, chunk_size=CHUNK_SIZE, max_chunk_bytes=MAX_CHUNK_BYTES, thread_count=THREAD_COUNT):
+    # What helpers.parallel_bulk does (a thread pool over byte- and count-bounded chunks),
+    # written out because parallel_bulk only yields per-document results: it has no hook to
+    # time one request, and the per-chunk latency is the point of this mode. Each chunk still
+    # goes through helpers.bulk (streaming_bulk underneath), so failures are counted the
+    # same way and a sync with failures keeps its high-water mark. A bounded window keeps
+    # thread_count * 2 chunks in flight, like parallel_bulk's queue_size.
+    def send(chunk):
+        start = time.perf_counter()
+        success, errors = bulk(es, chunk, chunk_size=len(chunk), max_chunk_bytes=max_chunk_bytes, raise_on_error=False)
+        latency = time.perf_counter() - start
+        METRICS.observe("es_bulk_seconds", latency)
+        METRICS.throughput("es_bulk_docs", success, latency)
+        METRICS.inc("es_bulk_errors_total", len(errors))
+        return success, len(errors), latency
+
+    latencies = []
+    total_success = 0
+    total_errors = 0
+    start = time.perf_counter()
+    with bulk_load_settings(partitions), ThreadPoolExecutor(max_workers=thread_count) as executor:
+        chunks = chunk_actions(actions, chunk_size, max_chunk_bytes)
+        in_flight = deque(executor.submit(send, chunk) for chunk in itertools.islice(chunks, thread_count * 2))
+        while in_flight:
+            success, errors, latency = in_flight.popleft().result()
+            in_flight.extend(executor.submit(send, chunk) for chunk in itertools.islice(chunks, 1))
+            latencies.append(latency)
+            total_success += success
+            total_errors += errors
+            print(f" Chunk {len(latencies)}: {success} docs in {latency * 1000:.0f} ms")
+
+    elapsed = time.perf_counter() - start
+    if latencies:
+        ordered = sorted(latencies)
+        print(
+            f" {len(latencies)} chunks: p50 {statistics.median(ordered) * 1000:.0f} ms, "
+            f"p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000:.0f} ms, "
+            f"max {ordered[-1] * 1000:.0f} ms; {total_success / elapsed if elapsed else 0:,.0f} docs/sec"
+        )
+    if total_errors:
+        print(f" {total_errors} documents failed to index")
+    return total_success, total_errors
+
+def index_documents(partitions, actions, fast=False, **bulk_options):
+    # (indexed, failed) in both modes; a sync that had failures must not move its
+    # high-water mark past them.
+    if fast:
+        return fast_bulk(partitions, actions, **bulk_options)
+    start = time.perf_counter()
+    success, errors = bulk(es, actions, raise_on_error=False)
+    METRICS.throughput("es_bulk_docs", success, time.perf_counter() - start)
+    METRICS.inc("es_bulk_errors_total", len(errors))
+    if errors:
+        print(f" {len(errors)} documents failed to index")
+    return success, len(errors)
+
+def alias_targets():
+    if not es.indices.exists_alias(name=INDEX_ALIAS):
+        return []
+    return list(es.indices.get_alias(name=INDEX_ALIAS).keys())
+
+def read_high_water_mark(index=INDEX_ALIAS):
+    # Each sync stamps the partitions it wrote to, so the mark is the latest of them:
+    # (updated_at, Mongo _id or None for marks written before the _id tiebreak).
+    marks = []
+    for mapping in es.indices.get_mapping(index=index).values():
+        meta = mapping["mappings"].get("_meta", {})
+        if meta.get("high_water_mark"):
+            marks.append((datetime.fromisoformat(meta["high_water_mark"]), meta.get("high_water_id") or ""))
+    if not marks:
+        return None, None
+    mark, mark_id = max(marks)
+    # pymongo hands back naive UTC datetimes, so compare in the same form.
+    return mark.astimezone(timezone.utc).replace(tzinfo=None), mark_id or None
+
+def sync_query(high_water_mark, high_water_id):
+    if high_water_mark is None:
+        return None
+    if high_water_id is None:
+        # Old mark without an _id: documents sharing it are sent once more, which is
+        # harmless because ES _ids are stable.
+        return {"updated_at": {"$gte": high_water_mark}}
+    return {"$or": [
+        {"updated_at": {"$gt": high_water_mark}},
+        {"updated_at": high_water_mark, "_id": {"$gt": ObjectId(high_water_id)}}
+    ]}
+
+def write_sync_meta(index, high_water_mark, high_water_id=None):
+    # Kept in the index's own _meta so a rebuilt index starts with its own mark. The
+    # generation changes on every sync that wrote documents; app.py keys its facet
+    # cache on it.
+    mapping = es.indices.get_mapping(index=index)
+    meta = dict(mapping[index]["mappings"].get("_meta", {}))
+    if high_water_mark is not None:
+        if high_water_mark.tzinfo is None:
+            high_water_mark = high_water_mark.replace(tzinfo=timezone.utc)
+        meta["high_water_mark"] = high_water_mark.isoformat()
+        meta["high_water_id"] = high_water_id
+    meta["generation"] = str(time.time_ns())
+    es.indices.put_mapping(index=index, meta=meta)
+
+def full_rebuild(fast=False, cursor_batch_size=CURSOR_BATCH_SIZE, **bulk_options):
+    # Build a fresh set of versioned partitions while the alias keeps serving the old
+    # ones, then swap the read and month aliases in a single atomic update_aliases call.
+    build = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+    partitions = Partitions(build)
+
+    sync_state = {"high_water_mark": None, "high_water_id": None}
+    start = time.perf_counter()
+    actions = generate_documents(partitions, sync_state=sync_state, cursor_batch_size=cursor_batch_size)
+    success, failed = index_documents(partitions, actions, fast, **bulk_options)
+    if failed:
+        # The aliases keep serving the previous build; drop the incomplete one (by name,
+        # wildcard deletes are refused by default).
+        es.indices.delete(index=",".join(partitions.indices.values()))
+        raise RuntimeError(f"{failed} documents failed to index, aliases left on the previous build")
+    if not partitions.indices:
+        partitions.create(partition_month({}))
+    es.indices.refresh(index=f"{INDEX_ALIAS}_v{build}-*")
+    for index in partitions.take_written() or partitions.indices.values():
+        write_sync_meta(index, sync_state["high_water_mark"], sync_state["high_water_id"])
+    partitions.finish()
+    print(f"Successfully indexed {success} documents into {len(partitions.indices)} partitions in {time.perf_counter() - start:.2f}s")
+
+    old_indices = alias_targets()
+    actions = []
+    for index in old_indices:
+        actions.append({"remove": {"index": index, "alias": INDEX_ALIAS}})
+        match = PARTITION_PATTERN.match(index)
+        if match:
+            actions.append({"remove": {"index": index, "alias": month_alias(match.group(2))}})
+    if not old_indices and es.indices.exists(index=INDEX_ALIAS):
+        # One-off migration from the old concrete "football_news" index.
+        actions.append({"remove_index": {"index": INDEX_ALIAS}})
+    for month, index in sorted(partitions.indices.items()):
+        actions.append({"add": {"index": index, "alias": INDEX_ALIAS}})
+        actions.append({"add": {"index": index, "alias": month_alias(month)}})
+    es.indices.update_aliases(actions=actions)
+    print(f" Alias {INDEX_ALIAS} -> {INDEX_ALIAS}_v{build}-* ({len(partitions.indices)} months)")
+
+    for index in old_indices:
+        es.indices.delete(index=index)
+        print(f" Deleted old index: {index}")
+
+def incremental_sync(fast=False, cursor_batch_size=CURSOR_BATCH_SIZE, **bulk_options):
+    partitions = Partitions.current()
+    if partitions is None:
+        print(f" Alias {INDEX_ALIAS} not set up yet or not partitioned by month, running a full rebuild")
+        full_rebuild(fast, cursor_batch_size, **bulk_options)
+        return
+
+    # Adds fields introduced since the index was built (e.g. story_id) with the right type
+    # before any document could map them dynamically.
+    es.indices.put_mapping(index=INDEX_ALIAS, properties=INDEX_MAPPING["properties"])
+    high_water_mark, high_water_id = read_high_water_mark()
+    # Strictly after the mark, so a sync with nothing new sends nothing and leaves the
+    # generation (and the app's facet caches) alone.
+    query = sync_query(high_water_mark, high_water_id)
+    sync_state = {"high_water_mark": high_water_mark, "high_water_id": high_water_id}
+    start = time.perf_counter()
+    actions = generate_documents(partitions, query, sync_state, cursor_batch_size)
+    success, failed = index_documents(partitions, actions, fast, **bulk_options)
+    written = partitions.take_written()
+    # With failures only the generation moves (for the documents that did go in); the
+    # mark stays, so the next sync sends the failed documents again.
+    if success or failed:
+        for index in written:
+            write_sync_meta(index, None if failed else sync_state["high_water_mark"], sync_state["high_water_id"])
+    partitions.finish()
+    if failed:
+        raise RuntimeError(f"{failed} documents failed to index, high-water mark not advanced")
+    print(f"Synced {success} new or changed documents into {len(written)} partitions in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Sync MongoDB articles into Elasticsearch")
+    arg_parser.add_argument("--full", action="store_true", help="Rebuild new versioned monthly partitions and swap the aliases")
+    arg_parser.add_argument("--fast", action="store_true", help="Threaded bulk load with refresh and replicas off (for backfills)")
+    arg_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    arg_parser.add_argument("--max-chunk-bytes", type=int, default=MAX_CHUNK_BYTES)
+    arg_parser.add_argument("--threads", type=int, default=THREAD_COUNT)
+    arg_parser.add_argument("--cursor-batch-size", type=int, default=CURSOR_BATCH_SIZE)
+    args = arg_parser.parse_args()
+    require_es_credentials()
+    bulk_options = {}
+    if args.fast:
+        bulk_options = {"chunk_size": args.chunk_size, "max_chunk_bytes": args.max_chunk_bytes, "thread_count": args.threads}
+    with run_report("es_full_rebuild" if args.full else "es_sync"):
+        if args.full:
+            full_rebuild(args.fast, args.cursor_batch_size, **bulk_options)
+        else:
+            incremental_sync(args.fast, args.cursor_batch_size, **bulk_options)
@@ -1,4 +1,11 @@
-import pandas as pd
+import os
+import re
+import json
+import marshal
+import hashlib
+import argparse
+from datetime import date, timedelta
+from club_registry import REGISTRY_PATH, open_registry, resolve_season, season_clubs, competition_names
 
 CLUB_ALIASES = {
     "AFC Ajax": ["Ajax"],
@@ -73,31 +80,180 @@ CLUB_ALIASES = {
     "Bayer 04 Leverkusen": ["Leverkusen"]
 }
 
-def build_keyword_maps(domestic_csv="clubs_with_leagues.csv", euro_csv="european_clubs_in_leagues.csv"):
-    df = pd.read_csv(domestic_csv)
-    df_euro = pd.read_csv(euro_csv)
+# Competitions the maps are built from (codes from the club registry, see club_registry.py).
+DOMESTIC_COMPETITIONS = ["en.1", "en.2", "es.1", "it.1", "de.1", "fr.1", "pt.1", "sco.1"]
+EURO_COMPETITIONS = ["uefa.cl", "uefa.el", "uefa.ecl"]
+# With an as_of date, a club only counts as being in a European competition if it played
+# in it during the EURO_ACTIVE_DAYS before (or any time after) that date.
+EURO_ACTIVE_DAYS = 21
+# Compiled maps live here, one file per input fingerprint; stale ones are simply ignored.
+KEYWORD_MAPS_DIR = "data/keyword_maps"
 
+def registry_rows(season=None, as_of=None, registry_path=REGISTRY_PATH):
+    # Everything the maps are built from, for a season (default: the latest one that had
+    # started by as_of, or the latest one overall).
+    conn = open_registry(registry_path)
+    try:
+        season = season or resolve_season(conn, DOMESTIC_COMPETITIONS, as_of)
+        active_since = None
+        if as_of:
+            active_since = (date.fromisoformat(str(as_of)[:10]) - timedelta(days=EURO_ACTIVE_DAYS)).isoformat()
+        return {
+            "season": season,
+            "domestic": season_clubs(conn, season, DOMESTIC_COMPETITIONS),
+            "euro": season_clubs(conn, season, EURO_COMPETITIONS, active_since),
+            "competition_names": competition_names(conn, season, DOMESTIC_COMPETITIONS + EURO_COMPETITIONS)
+        }
+    finally:
+        conn.close()
+
+def build_keyword_maps(season=None, as_of=None, registry_path=REGISTRY_PATH, rows=None):
+    rows = rows or registry_rows(season, as_of, registry_path)
+    names = rows["competition_names"]
     KEYWORD_TO_CLUB = {}
     CLUB_TO_LEAGUE = {}
     CLUB_TO_EURO_COMPS = {}
 
-    for _, row in df.iterrows():
-        club = row["club_name"].strip()
-        league = row["league_name"].strip()
-        CLUB_TO_LEAGUE[club] = league
+    for club, code in rows["domestic"]:
+        CLUB_TO_LEAGUE[club] = names[code]
         KEYWORD_TO_CLUB[club.lower()] = club
 
         aliases = CLUB_ALIASES.get(club, [])
         for alias in aliases:
             KEYWORD_TO_CLUB[alias.lower()] = club
 
+    for club, code in rows["euro"]:
+        CLUB_TO_EURO_COMPS.setdefault(club, []).append(names[code])
+
+    return KEYWORD_TO_CLUB, CLUB_TO_LEAGUE, CLUB_TO_EURO_COMPS, names
+
+def keyword_maps_fingerprint(season=None, as_of=None, registry_path=REGISTRY_PATH, rows=None):
+    rows = rows or registry_rows(season, as_of, registry_path)
+    digest = hashlib.sha256()
+    digest.update(json.dumps(rows, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps(CLUB_ALIASES, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+def _trie_pattern(node):
+    # Turn a character trie into a nested alternation so the regex engine never
+    # retries a shared prefix; greedy "?" keeps the longest keyword first.
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in node.items() if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+def compile_club_matcher(keyword_to_club):
+    # Returns the plain data a matcher needs, so it can be stored with the compiled maps.
+    keywords = list(keyword_to_club)
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    # Zero-width lookahead so overlapping mentions ("aston villa" / "villa") are all reported.
+    pattern = r"(?=\b(" + _trie_pattern(trie) + r")\b)"
+
+    # The scan only reports the longest keyword at each position; shorter keywords that
+    # end on a word boundary inside it match at the same spot and are added here.
+    implied = {
+        keyword: [
+            other for other in keywords
+            if other != keyword and keyword.startswith(other) and re.match(rf"{re.escape(other)}\b", keyword)
+        ]
+        for keyword in keywords
+    }
+    return {"pattern": pattern, "implied": implied}
+
+def build_club_matcher(keyword_to_club, compiled=None):
+    compiled = compiled or compile_club_matcher(keyword_to_club)
+    order = {keyword: i for i, keyword in enumerate(keyword_to_club)}
+    pattern = re.compile(compiled["pattern"])
+    implied = compiled["implied"]
+
+    def match(text_lower):
+        found = set()
+        for m in pattern.finditer(text_lower):
+            keyword = m.group(1)
+            found.add(keyword)
+            found.update(implied[keyword])
+        return [(keyword, keyword_to_club[keyword]) for keyword in sorted(found, key=order.__getitem__)]
+
+    return match
+
+def compiled_maps_path(fingerprint, maps_dir=KEYWORD_MAPS_DIR):
+    # marshal's format is tied to the interpreter, so its version is part of the name.
+    return os.path.join(maps_dir, f"keyword_maps-{fingerprint[:16]}-m{marshal.version}.bin")
+
+def compile_keyword_maps(season=None, as_of=None, registry_path=REGISTRY_PATH, maps_dir=KEYWORD_MAPS_DIR, rows=None, fingerprint=None):
+    rows = rows or registry_rows(season, as_of, registry_path)
+    fingerprint = fingerprint or keyword_maps_fingerprint(rows=rows)
+    keyword_to_club, club_to_league, club_to_euro, names = build_keyword_maps(rows=rows)
+    maps = {
+        "fingerprint": fingerprint,
+        "season": rows["season"],
+        "keyword_to_club": keyword_to_club,
+        "club_to_league": club_to_league,
+        "club_to_euro": club_to_euro,
+        "competition_names": names,
+        "matcher": compile_club_matcher(keyword_to_club)
+    }
+    path = compiled_maps_path(fingerprint, maps_dir)
+    try:
+        os.makedirs(maps_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(maps, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f" Could not save compiled keyword maps to {path}: {e}")
+    return maps
+
+_LOADED_MAPS = {}
+
+def load_keyword_maps(season=None, as_of=None, registry_path=REGISTRY_PATH, maps_dir=KEYWORD_MAPS_DIR):
+    # Reading the season's rows from the registry is cheap; building the maps and compiling
+    # the matcher only happen when those rows or CLUB_ALIASES changed since the last
+    # compiled file was written.
+    rows = registry_rows(season, as_of, registry_path)
+    fingerprint = keyword_maps_fingerprint(rows=rows)
+    maps = _LOADED_MAPS.get(fingerprint)
+    if maps is None:
+        try:
+            with open(compiled_maps_path(fingerprint, maps_dir), "rb") as f:
+                maps = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            maps = compile_keyword_maps(maps_dir=maps_dir, rows=rows, fingerprint=fingerprint)
+        _LOADED_MAPS[fingerprint] = maps
+    return maps
+
+def load_club_matcher(maps):
+    return build_club_matcher(maps["keyword_to_club"], maps["matcher"])
+
+def club_aliases(maps):
+    # Club -> the other names it is matched by, as written in CLUB_ALIASES ("Man Utd").
+    keyword_to_club = maps["keyword_to_club"]
+    return {
+        club: [alias for alias in CLUB_ALIASES.get(club, []) if alias.lower() != club.lower() and keyword_to_club.get(alias.lower()) == club]
+        for club in sorted(set(keyword_to_club.values()))
+    }
+
+_LEGACY_NAMES = {"KEYWORD_TO_CLUB": "keyword_to_club", "CLUB_TO_LEAGUE": "club_to_league", "CLUB_TO_EURO_COMPS": "club_to_euro"}
 
-    for _, row in df_euro.iterrows():
-        club = row["club_name"].strip()
-        comp = row["league_name"].strip()
-        CLUB_TO_EURO_COMPS.setdefault(club, []).append(comp)
+def __getattr__(name):
+    # The maps used to be built at import time; keep the old module attributes, loaded on first use.
+    if name in _LEGACY_NAMES:
+        return load_keyword_maps()[_LEGACY_NAMES[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    return KEYWORD_TO_CLUB, CLUB_TO_LEAGUE, CLUB_TO_EURO_COMPS
-KEYWORD_TO_CLUB, CLUB_TO_LEAGUE, CLUB_TO_EURO_COMPS= build_keyword_maps("clubs_with_leagues.csv", "european_clubs_in_leagues.csv")
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compile the club keyword maps")
+    arg_parser.add_argument("--season", help="Season folder, e.g. 2023-24 (default: latest)")
+    arg_parser.add_argument("--as-of", help="Date (YYYY-MM-DD) used to pick the season and the clubs still in European competitions")
+    arg_parser.add_argument("--registry", default=REGISTRY_PATH)
+    arg_parser.add_argument("--output-dir", default=KEYWORD_MAPS_DIR)
+    args = arg_parser.parse_args()
 
-print(CLUB_TO_EURO_COMPS)
+    maps = compile_keyword_maps(args.season, args.as_of, args.registry, args.output_dir)
+    print(f" Compiled {len(maps['keyword_to_club'])} keywords for {len(maps['club_to_league'])} clubs ({maps['season']}) into {compiled_maps_path(maps['fingerprint'], args.output_dir)}")
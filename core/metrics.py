@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Small in-process instrumentation: counters and histograms with labels, rendered in the
+# Prometheus text format (app.py /metrics) or written as a JSON run report by batch stages.
+# Stages import METRICS; each app gets its own Metrics in app.extensions["metrics"].
+
+REPORTS_DIR = "data/run_reports"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; wide enough for a 1 ms search and a 30 s feed fetch.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "feed_fetch_seconds": "Time to fetch one RSS feed",
+    "feed_fetch_errors_total": "RSS feed fetches that failed",
+    "feed_articles_total": "New articles parsed from a feed",
+    "clean_articles_total": "Articles through a cleaner step",
+    "clean_articles_seconds_total": "Time spent in a cleaner step",
+    "mongo_bulk_docs_total": "Documents sent in Mongo bulk upserts",
+    "mongo_bulk_docs_seconds_total": "Time spent in Mongo bulk upserts",
+    "mongo_bulk_seconds": "Latency of one Mongo bulk upsert",
+    "es_bulk_docs_total": "Documents indexed by Elasticsearch bulk requests",
+    "es_bulk_docs_seconds_total": "Time spent in Elasticsearch bulk requests",
+    "es_bulk_seconds": "Latency of one Elasticsearch bulk request",
+    "es_bulk_errors_total": "Documents Elasticsearch failed to index",
+    "http_request_seconds": "Request latency per endpoint",
+    "es_search_seconds": "Wall time of a search call, as seen by the app",
+    "es_took_seconds": "Search time reported by the backend (took)",
+    "response_serialize_seconds": "Time to serialise a response body",
+    "response_compress_seconds": "Time to compress a response body",
+    "http_response_bytes_total": "Response body bytes sent, after compression",
+    "http_response_uncompressed_bytes_total": "Body bytes of compressed responses before compression",
+}
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # name -> {label key -> value}; histogram values are [bucket counts..., sum, count, max].
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 3)
+            if slot < len(self.buckets):
+                state[slot] += 1
+            state[-3] += value
+            state[-2] += 1
+            state[-1] = max(state[-1], value)
+
+    def throughput(self, name, count, seconds, **labels):
+        # <name>_total and <name>_seconds_total; reports turn the pair into <name>_per_second.
+        self.inc(f"{name}_total", count, **labels)
+        self.inc(f"{name}_seconds_total", seconds, **labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def collect(self):
+        # Hands the current values to another process (see merge) and starts from zero.
+        with self.lock:
+            state = {
+                "counters": {name: list(series.items()) for name, series in self.counters.items()},
+                "histograms": {name: list(series.items()) for name, series in self.histograms.items()}
+            }
+            self.counters = {}
+            self.histograms = {}
+        return state
+
+    def merge(self, state):
+        with self.lock:
+            for name, items in state["counters"].items():
+                series = self.counters.setdefault(name, {})
+                for key, value in items:
+                    series[key] = series.get(key, 0) + value
+            for name, items in state["histograms"].items():
+                series = self.histograms.setdefault(name, {})
+                for key, values in items:
+                    current = series.get(key)
+                    if current is None:
+                        series[key] = list(values)
+                        continue
+                    for i in range(len(values) - 1):
+                        current[i] += values[i]
+                    current[-1] = max(current[-1], values[-1])
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name in sorted(self.counters):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self.counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name in sorted(self.histograms):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, state in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {state[-2]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state[-3]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-2]}")
+        return "\n".join(lines) + "\n"
+
+    def quantile(self, state, q):
+        # Upper bound of the bucket holding the q-th observation (the max for the overflow bucket).
+        target = q * state[-2]
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, state[-1])
+        return state[-1]
+
+    def snapshot(self):
+        report = {"counters": {}, "histograms": {}, "rates": {}}
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                report["counters"][name] = [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+            for name, series in sorted(self.histograms.items()):
+                report["histograms"][name] = [
+                    {
+                        "labels": dict(key),
+                        "count": state[-2],
+                        "sum": round(state[-3], 6),
+                        "mean": round(state[-3] / state[-2], 6) if state[-2] else 0,
+                        "p50": self.quantile(state, 0.5),
+                        "p95": self.quantile(state, 0.95),
+                        "max": round(state[-1], 6)
+                    }
+                    for key, state in sorted(series.items())
+                ]
+            for name, series in sorted(self.counters.items()):
+                if not name.endswith("_seconds_total"):
+                    continue
+                base = name[:-len("_seconds_total")]
+                totals = self.counters.get(f"{base}_total", {})
+                report["rates"][f"{base}_per_second"] = [
+                    {"labels": dict(key), "value": round(totals.get(key, 0) / seconds, 1)}
+                    for key, seconds in sorted(series.items()) if seconds
+                ]
+        return report
+
+METRICS = Metrics()
+
+def write_run_report(stage, started_at, elapsed, status="ok", metrics=METRICS, reports_dir=REPORTS_DIR, extra=None):
+    report = {
+        "stage": stage,
+        "status": status,
+        "started_at": started_at.isoformat(),
+        "elapsed_seconds": round(elapsed, 3),
+        **(extra or {}),
+        **metrics.snapshot()
+    }
+    os.makedirs(reports_dir, exist_ok=True)
+    path = os.path.join(reports_dir, f"{stage}-{started_at.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f" Run report: {path}")
+    return path
+
+@contextmanager
+def run_report(stage, metrics=METRICS, reports_dir=REPORTS_DIR):
+    # Wraps one batch run; the report is written even when the stage fails.
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    status = "failed"
+    try:
+        yield metrics
+        status = "ok"
+    finally:
+        write_run_report(stage, started_at, time.perf_counter() - start, status, metrics, reports_dir)
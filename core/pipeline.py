@@ -0,0 +1,372 @@
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+from datetime import datetime, timedelta, timezone, date
+import feedparser
+from elasticsearch.helpers import bulk
+from rss_scraper import (
+    RSS_FEEDS, DATA_DIR, FETCH_CONCURRENCY, FETCH_TIMEOUT, STORAGE_FORMAT,
+    fetch_all_feeds, parse_entries, save_by_day, load_feed_state, save_feed_state
+)
+from url_index import open_url_index
+from keywords_match import load_keyword_maps, load_club_matcher
+from clean_and_reorganize import UTC7, iter_clean_articles
+from story_clusters import StoryIndex, WINDOW_DAYS
+from database import collection, ensure_indexes, upsert_articles
+from db_to_elastic import es, INDEX_MAPPING, Partitions, doc_id, write_sync_meta, add_club_suggest, require_es_credentials
+from metrics import METRICS, run_report
+
+# One process from feed to search: scrape -> clean -> story ids -> Mongo + Elasticsearch.
+# Stages are asyncio tasks joined by bounded queues, so a slow sink holds the scraper back
+# instead of piling articles up in memory. Scraped articles are first written to a journal
+# (SQLite) and each sink records the last journal seq it confirmed; after a crash or a
+# failed run the articles the sinks had not confirmed are replayed. Mongo upserts by url and ES indexes by
+# a url-derived _id, so replaying is harmless.
+#
+# The raw archive in data/rss_by_day is still written (the batch scripts keep working);
+# the cleaned day files are not, articles go straight to the sinks.
+
+PIPELINE_DB = "data/pipeline.sqlite3"
+# Cleaning and story ids are recomputed on replay, so only the journal head and the sinks
+# keep a checkpoint.
+STAGES = ["scrape", "mongo", "es"]
+SINKS = ["mongo", "es"]
+BATCH_SIZE = 500
+FLUSH_SECONDS = 1.0
+QUEUE_SIZE = 1000
+FOLLOW_INTERVAL = 60
+# Bumping the index generation invalidates the app's facet cache; it is a mapping update,
+# so it happens at most this often rather than after every flush.
+GENERATION_BUMP_SECONDS = 30
+MAX_RETRY_DELAY = 60
+# 1 + 2 + 4 + 8 + 16 s of retries, then the run fails and the journal keeps the batch.
+MAX_SINK_ATTEMPTS = 6
+
+class Journal:
+    def __init__(self, path=PIPELINE_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS journal (seq INTEGER PRIMARY KEY AUTOINCREMENT, article TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS checkpoints (stage TEXT PRIMARY KEY, seq INTEGER)")
+
+    def append(self, articles):
+        with self.conn:
+            return [
+                self.conn.execute("INSERT INTO journal (article) VALUES (?)", (json.dumps(article, ensure_ascii=False),)).lastrowid
+                for article in articles
+            ]
+
+    def checkpoint(self, stage):
+        row = self.conn.execute("SELECT seq FROM checkpoints WHERE stage = ?", (stage,)).fetchone()
+        return row[0] if row else 0
+
+    def set_checkpoint(self, stage, seq):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO checkpoints (stage, seq) VALUES (?, ?)", (stage, seq))
+
+    def pending(self, after):
+        for seq, article in self.conn.execute("SELECT seq, article FROM journal WHERE seq > ? ORDER BY seq", (after,)):
+            yield seq, json.loads(article)
+
+    def prune(self, sinks):
+        # Articles every sink has confirmed are not needed for a resume any more.
+        done = min(self.checkpoint(sink) for sink in sinks)
+        with self.conn:
+            self.conn.execute("DELETE FROM journal WHERE seq <= ?", (done,))
+
+    def close(self):
+        self.conn.close()
+
+async def next_batch(queue, limit):
+    # Waits for one item, then takes whatever else is already queued (None ends the stream).
+    batch = [await queue.get()]
+    while len(batch) < limit and batch[-1] is not None and not queue.empty():
+        batch.append(queue.get_nowait())
+    return batch
+
+async def scrape_stage(out, journal, sinks, feeds, follow, interval, concurrency, timeout, storage_format):
+    resume_from = min(journal.checkpoint(sink) for sink in sinks)
+    replayed = 0
+    for seq, article in journal.pending(resume_from):
+        await out.put((seq, article, None, time.monotonic()))
+        replayed += 1
+    if replayed:
+        print(f" Resuming: replaying {replayed} journaled articles after seq {resume_from}")
+
+    seen_urls = open_url_index(DATA_DIR)
+    feed_state = load_feed_state()
+    try:
+        while True:
+            results = await fetch_all_feeds(feeds, feed_state, concurrency, timeout)
+            for source, result in results.items():
+                if result is None:
+                    continue
+                status, body, etag, modified = result
+                if status == 304:
+                    print(f"[{source}] Not modified since last run")
+                    continue
+                try:
+                    articles = parse_entries(source, feedparser.parse(body), seen_urls)
+                except Exception as e:
+                    METRICS.inc("feed_fetch_errors_total", source=source)
+                    print(f"[{source}] Failed to parse feed:", e)
+                    continue
+                scraped_at = time.monotonic()
+                # Journal first: an article the archive has (and the URL index therefore
+                # skips next time) must already be on its way to the sinks.
+                seqs = journal.append(articles)
+                save_by_day(articles, seen_urls, storage_format)
+                feed_state[source] = {"etag": etag, "modified": modified}
+                if seqs:
+                    journal.set_checkpoint("scrape", seqs[-1])
+                for seq, article in zip(seqs, articles):
+                    await out.put((seq, article, None, scraped_at))
+            save_feed_state(feed_state)
+            if not follow:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        seen_urls.close()
+    await out.put(None)
+
+def clean_maps_as_of(day):
+    maps = load_keyword_maps(as_of=day)
+    return maps["season"], (maps["keyword_to_club"], maps["club_to_league"], maps["club_to_euro"], maps["competition_names"], load_club_matcher(maps))
+
+async def clean_stage(inp, out, limit):
+    # Live articles are tagged with the registry as of today (UTC+7): this season's
+    # competitions and the clubs still in Europe. Checked once a day; the compiled maps
+    # are cached by content, so only a real change rebuilds them.
+    maps_day = season = maps = None
+    while True:
+        batch = await next_batch(inp, limit)
+        done = batch[-1] is None
+        items = batch[:-1] if done else batch
+        today = datetime.now(UTC7).date().isoformat()
+        if items and today != maps_day:
+            previous_season = season
+            season, maps = await asyncio.to_thread(clean_maps_as_of, today)
+            maps_day = today
+            if season != previous_season:
+                print(f" Keyword maps: season {season} (as of {today})")
+        if items:
+            kept = {
+                id(article): day
+                for article, day in iter_clean_articles((item[1] for item in items), *maps)
+            }
+            for seq, article, _, scraped_at in items:
+                day = kept.get(id(article))
+                # Dropped articles still move on, so the sink checkpoints can pass them.
+                await out.put((seq, article if day else None, day, scraped_at))
+        if done:
+            await out.put(None)
+            return
+
+async def story_stage(inp, out, story_index, limit):
+    while True:
+        batch = await next_batch(inp, limit)
+        done = batch[-1] is None
+        items = batch[:-1] if done else batch
+        for seq, article, day, scraped_at in items:
+            if article is not None:
+                article["story_id"] = story_index.assign(article, date.fromisoformat(day))
+            await out.put((seq, article, day, scraped_at))
+        if done:
+            await out.put(None)
+            return
+
+def warm_story_index(story_index):
+    # Recent stored articles, so fresh articles can join stories that started before this run.
+    since = (datetime.now(UTC7) - timedelta(days=WINDOW_DAYS)).date().isoformat()
+    projection = {"_id": 0, "title": 1, "summary": 1, "source": 1, "date": 1, "story_id": 1}
+    count = 0
+    for doc in collection.find({"date": {"$gte": since}}, projection).sort("date", 1):
+        if doc.get("story_id") and doc.get("date"):
+            story_index.assign(doc, date.fromisoformat(doc["date"][:10]), doc["story_id"])
+            count += 1
+    return count
+
+# A sink write raises when any article in the batch failed, so write_with_retry sends the
+# batch again and the sink's checkpoint stays put until every article is in. After
+# MAX_SINK_ATTEMPTS the run fails; the next run replays the batch from the journal.
+
+def write_mongo(articles):
+    start = time.perf_counter()
+    written, failed = upsert_articles(collection, articles)
+    METRICS.throughput("pipeline_sink_docs", written, time.perf_counter() - start, sink="mongo")
+    if failed:
+        raise RuntimeError(f"{failed} articles failed to upsert")
+
+def write_es(articles, state):
+    if state.get("partitions") is None:
+        state["partitions"] = Partitions.current()
+        if state["partitions"] is None:
+            raise RuntimeError("monthly index partitions not set up, run db_to_elastic.py --full once")
+    updated_at = datetime.now(timezone.utc)
+    actions = [
+        {
+            "_index": state["partitions"].index_for(article),
+            "_id": doc_id(article),
+            "_source": add_club_suggest({**{field: article[field] for field in INDEX_MAPPING["properties"] if field in article}, "updated_at": updated_at})
+        }
+        for article in articles
+    ]
+    start = time.perf_counter()
+    success, errors = bulk(es, actions, raise_on_error=False)
+    METRICS.throughput("pipeline_sink_docs", success, time.perf_counter() - start, sink="es")
+    state["unstamped"] = True
+    if errors:
+        METRICS.inc("es_bulk_errors_total", len(errors))
+        # e.g. a partition db_to_elastic.py froze since it was looked up: stamping drops the
+        # cached partitions, so the retry sees the block and thaws the month first.
+        stamp_generation(state)
+        error = next(iter(errors[0].values()), {}).get("error", {})
+        raise RuntimeError(f"{len(errors)} documents failed to index, first: {error.get('type', error)}")
+    if time.monotonic() - state.get("stamped_at", 0.0) > GENERATION_BUMP_SECONDS:
+        stamp_generation(state)
+
+def stamp_generation(state):
+    # Only the generation: the high-water mark stays with db_to_elastic.py, so documents
+    # loaded into Mongo by the batch scripts are still picked up by its next sync.
+    # The partitions are looked up again after each stamp, to see months that
+    # db_to_elastic.py created or froze in the meantime.
+    if state.get("unstamped") and state.get("partitions"):
+        for index in state["partitions"].take_written():
+            write_sync_meta(index, None)
+        state["thawed"] = state.get("thawed", set()) | state["partitions"].thawed
+        state["partitions"] = None
+        state["unstamped"] = False
+        state["stamped_at"] = time.monotonic()
+
+def finish_es(state):
+    # Once per run, not per batch: re-freeze the months late articles thawed and freeze
+    # those that fell out of the writable window (forcemerge + write block).
+    stamp_generation(state)
+    thawed = state.pop("thawed", None)
+    if thawed is None:
+        return
+    partitions = Partitions.current()
+    if partitions is not None:
+        partitions.thawed = thawed
+        partitions.finish()
+
+async def write_with_retry(sink, write, articles, attempts=MAX_SINK_ATTEMPTS):
+    delay = 1
+    for attempt in range(1, attempts + 1):
+        try:
+            await asyncio.to_thread(write, articles)
+            return
+        except Exception as e:
+            if attempt == attempts:
+                raise RuntimeError(f"{sink} sink failed {attempts} times, last error: {e}") from e
+            print(f" {sink} sink failed ({e}); retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+async def sink_stage(inp, journal, sinks, batch_size, flush_seconds):
+    loop = asyncio.get_running_loop()
+    es_state = {}
+    writers = {"mongo": write_mongo, "es": lambda articles: write_es(articles, es_state)}
+    checkpoints = {sink: journal.checkpoint(sink) for sink in sinks}
+    delivered = 0
+    done = False
+    try:
+        while not done:
+            # Flush when the batch is full or flush_seconds after its first article arrived.
+            batch = []
+            deadline = None
+            while len(batch) < batch_size:
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inp.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = loop.time() + flush_seconds
+            if not batch:
+                continue
+
+            last_seq = batch[-1][0]
+            for sink in sinks:
+                articles = [article for seq, article, _, _ in batch if article is not None and seq > checkpoints[sink]]
+                if articles:
+                    await write_with_retry(sink, writers[sink], articles)
+                checkpoints[sink] = max(checkpoints[sink], last_seq)
+                journal.set_checkpoint(sink, checkpoints[sink])
+            journal.prune(sinks)
+
+            now = time.monotonic()
+            for _, article, _, scraped_at in batch:
+                if article is not None:
+                    METRICS.observe("pipeline_latency_seconds", now - scraped_at)
+                    delivered += 1
+    finally:
+        if "es" in sinks:
+            await asyncio.to_thread(finish_es, es_state)
+    return delivered
+
+async def run_pipeline(feeds=RSS_FEEDS, sinks=SINKS, follow=False, interval=FOLLOW_INTERVAL, batch_size=BATCH_SIZE,
+                       flush_seconds=FLUSH_SECONDS, queue_size=QUEUE_SIZE, concurrency=FETCH_CONCURRENCY,
+                       timeout=FETCH_TIMEOUT, storage_format=STORAGE_FORMAT, journal_path=PIPELINE_DB):
+    if "es" in sinks:
+        require_es_credentials()
+    journal = Journal(journal_path)
+    story_index = StoryIndex()
+    if "mongo" in sinks:
+        await asyncio.to_thread(ensure_indexes, collection)
+        warmed = await asyncio.to_thread(warm_story_index, story_index)
+        print(f" Story index warmed with {warmed} recent articles")
+
+    raw, cleaned, with_stories = (asyncio.Queue(maxsize=queue_size) for _ in range(3))
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(scrape_stage(raw, journal, sinks, feeds, follow, interval, concurrency, timeout, storage_format)),
+        asyncio.create_task(clean_stage(raw, cleaned, batch_size)),
+        asyncio.create_task(story_stage(cleaned, with_stories, story_index, batch_size)),
+        asyncio.create_task(sink_stage(with_stories, journal, sinks, batch_size, flush_seconds))
+    ]
+    try:
+        try:
+            *_, delivered = await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed stage stops the others, which would otherwise wait on their queues forever.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        print(f" Pipeline: {delivered} articles delivered to {', '.join(sinks)} in {time.perf_counter() - start:.2f}s")
+        print(" Checkpoints: " + ", ".join(f"{stage} {journal.checkpoint(stage)}" for stage in STAGES))
+    finally:
+        journal.close()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Scrape, clean and index new articles in one streaming run")
+    arg_parser.add_argument("--follow", action="store_true", help="Keep polling the feeds instead of exiting after one round")
+    arg_parser.add_argument("--interval", type=float, default=FOLLOW_INTERVAL, help="Seconds between rounds with --follow")
+    arg_parser.add_argument("--sinks", default=",".join(SINKS), help="Comma-separated: mongo, es")
+    arg_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    arg_parser.add_argument("--flush-seconds", type=float, default=FLUSH_SECONDS, help="Longest an article waits for its batch")
+    arg_parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Bound of each queue between stages")
+    arg_parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY)
+    arg_parser.add_argument("--timeout", type=float, default=FETCH_TIMEOUT, help="Per-feed timeout in seconds")
+    arg_parser.add_argument("--format", choices=["jsonl", "json"], default=STORAGE_FORMAT, help="Raw day file format")
+    args = arg_parser.parse_args()
+    sinks = [sink.strip() for sink in args.sinks.split(",") if sink.strip()]
+    unknown = set(sinks) - set(SINKS)
+    if unknown or not sinks:
+        arg_parser.error(f"unknown sinks: {', '.join(sorted(unknown)) or '(none)'}")
+    with run_report("pipeline"):
+        asyncio.run(run_pipeline(
+            sinks=sinks, follow=args.follow, interval=args.interval, batch_size=args.batch_size,
+            flush_seconds=args.flush_seconds, queue_size=args.queue_size, concurrency=args.concurrency,
+            timeout=args.timeout, storage_format=args.format
+        ))
@@ -1,8 +1,18 @@
 import feedparser
 import os
 import json
-from datetime import datetime
+import time
+import asyncio
+import argparse
+import urllib.request
+import urllib.error
+from datetime import datetime, timezone
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from day_storage import DAY_FILE_EXTENSIONS, read_day_file, append_articles
+from url_index import open_url_index, rebuild_url_index, iter_day_file_articles
+from date_normalizer import DateNormalizer
+from metrics import METRICS, run_report
 
 RSS_FEEDS = {
     "BBC": "http://feeds.bbci.co.uk/sport/football/rss.xml",
@@ -11,11 +21,20 @@ RSS_FEEDS = {
 }
 
 DATA_DIR = "data/rss_by_day"
+FEED_STATE_PATH = "data/feed_state.json"
+STORAGE_FORMAT = "jsonl"
+FETCH_CONCURRENCY = 8
+FETCH_TIMEOUT = 15
+DATE_NORMALIZER = DateNormalizer(tz=timezone.utc)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 def parse_feed(source, url, seen_urls):
     print(f"[{source}] Fetching feed...")
-    feed = feedparser.parse(url)
+    with METRICS.timer("feed_fetch_seconds", source=source):
+        feed = feedparser.parse(url)
+    return parse_entries(source, feed, seen_urls)
+
+def parse_entries(source, feed, seen_urls):
     articles = []
 
     for entry in feed.entries:
@@ -23,11 +42,11 @@ def parse_feed(source, url, seen_urls):
             continue
 
         pub_date = entry.get("published", datetime.utcnow().isoformat())
-        try:
-            date_obj = datetime.strptime(pub_date, "%a, %d %b %Y %H:%M:%S %Z")
-            pub_date = date_obj.isoformat()
-        except Exception:
-            pass
+        # Stored as naive UTC ISO so the cleaner takes the fromisoformat fast path;
+        # values no parser understands are kept raw.
+        date_obj = DATE_NORMALIZER.parse(pub_date, source)
+        if date_obj is not None:
+            pub_date = date_obj.replace(tzinfo=None).isoformat()
 
         article = {
             "title": entry.title,
@@ -39,23 +58,22 @@ def parse_feed(source, url, seen_urls):
         articles.append(article)
         seen_urls.add(entry.link)
 
+    METRICS.inc("feed_articles_total", len(articles), source=source)
     print(f"[{source}] Collected {len(articles)} new articles")
     return articles
 
 def load_seen_urls():
-    seen = set()
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith(".json"):
-            path = os.path.join(DATA_DIR, filename)
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    seen.update(article["url"] for article in data if "url" in article)
-            except Exception:
-                continue
-    return seen
-
-def save_by_day(all_articles):
+    return {article["url"] for article in iter_day_file_articles(DATA_DIR) if "url" in article}
+
+def existing_day_urls(date):
+    seen_urls = set()
+    for ext in DAY_FILE_EXTENSIONS:
+        file_path = os.path.join(DATA_DIR, f"{date}{ext}")
+        if os.path.exists(file_path):
+            seen_urls.update(item["url"] for item in read_day_file(file_path) if "url" in item)
+    return seen_urls
+
+def save_by_day(all_articles, url_index=None, storage_format=STORAGE_FORMAT):
     grouped = defaultdict(list)
 
     for article in all_articles:
@@ -67,40 +85,155 @@ def save_by_day(all_articles):
         grouped[date_key].append(article)
 
     for date, new_items in grouped.items():
-        file_path = os.path.join(DATA_DIR, f"{date}.json")
-
-        existing_items = []
-        seen_urls = set()
-
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                existing_items = json.load(f)
-                seen_urls.update(item["url"] for item in existing_items)
-
-        fresh_articles = [
-            item for item in new_items if item["url"] not in seen_urls
-        ]
-
-        all_combined = existing_items + fresh_articles
+        # With a URL index the articles were already checked against the whole archive,
+        # so the day file does not need to be read back just to dedup.
+        seen_urls = existing_day_urls(date) if url_index is None else set()
+        fresh_articles = []
+        for item in new_items:
+            if item["url"] not in seen_urls:
+                fresh_articles.append(item)
+                seen_urls.add(item["url"])
+
+        if storage_format == "jsonl":
+            file_path = os.path.join(DATA_DIR, f"{date}.jsonl")
+            append_articles(file_path, fresh_articles)
+            print(f"[Saved] {len(fresh_articles)} new articles to {file_path}")
+        else:
+            file_path = os.path.join(DATA_DIR, f"{date}.json")
+            existing_items = []
+            if os.path.exists(file_path):
+                with open(file_path, "r", encoding="utf-8") as f:
+                    existing_items = json.load(f)
+
+            all_combined = existing_items + fresh_articles
+
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(all_combined, f, indent=2, ensure_ascii=False)
+            print(f"[Saved] {len(fresh_articles)} new articles (total: {len(all_combined)}) to {file_path}")
+
+        if url_index is not None:
+            url_index.record(fresh_articles)
+
+def load_feed_state(path=FEED_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_feed_state(state, path=FEED_STATE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def fetch_feed(url, etag=None, modified=None, timeout=FETCH_TIMEOUT):
+    headers = {"User-Agent": "football-news-scraper"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, etag, modified
+        raise
+
+async def fetch_all_feeds(feeds, feed_state, concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT):
+    # Blocking urllib calls run in a pool sized to the concurrency limit; the semaphore caps
+    # open connections and wait_for bounds each feed so one slow host cannot hold up the run.
+    # This is a thread pool driven from asyncio, not async IO: a timed-out fetch stops being
+    # awaited but its thread keeps the socket until urlopen's own timeout fires. With a
+    # handful of feeds that costs one thread each and avoids an aiohttp dependency.
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def fetch_one(source, url):
+        state = feed_state.get(source, {})
+        async with semaphore:
+            print(f"[{source}] Fetching feed...")
+            start = time.perf_counter()
+            try:
+                status, body, etag, modified = await asyncio.wait_for(
+                    loop.run_in_executor(executor, fetch_feed, url, state.get("etag"), state.get("modified"), timeout),
+                    timeout
+                )
+            except Exception as e:
+                METRICS.inc("feed_fetch_errors_total", source=source)
+                print(f"[{source}] Failed to fetch feed:", e if str(e) else type(e).__name__)
+                return source, None
+        elapsed = time.perf_counter() - start
+        METRICS.observe("feed_fetch_seconds", elapsed, source=source)
+        print(f"[{source}] HTTP {status} in {elapsed:.2f}s")
+        return source, (status, body, etag, modified)
+
+    try:
+        results = await asyncio.gather(*(fetch_one(source, url) for source, url in feeds.items()))
+    finally:
+        executor.shutdown(wait=False)
+    return dict(results)
+
+def run_all_rss_scrapers_async(feeds=RSS_FEEDS, concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT, storage_format=STORAGE_FORMAT):
+    all_articles = []
+    seen_urls = open_url_index(DATA_DIR)
+    feed_state = load_feed_state()
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(all_combined, f, indent=2, ensure_ascii=False)
+    results = asyncio.run(fetch_all_feeds(feeds, feed_state, concurrency, timeout))
+    for source, result in results.items():
+        if result is None:
+            continue
+        status, body, etag, modified = result
+        if status == 304:
+            print(f"[{source}] Not modified since last run")
+            continue
+        try:
+            articles = parse_entries(source, feedparser.parse(body), seen_urls)
+            all_articles.extend(articles)
+        except Exception as e:
+            print(f"[{source}] Failed to parse feed:", e)
+            continue
+        feed_state[source] = {"etag": etag, "modified": modified}
 
-        print(f"[Saved] {len(fresh_articles)} new articles (total: {len(all_combined)}) to {file_path}")
+    save_by_day(all_articles, seen_urls, storage_format)
+    seen_urls.close()
+    save_feed_state(feed_state)
+    print(f" Done! Total new articles saved: {len(all_articles)}")
 
-def run_all_rss_scrapers():
+def run_all_rss_scrapers(feeds=RSS_FEEDS, storage_format=STORAGE_FORMAT):
     all_articles = []
-    seen_urls = load_seen_urls()
-    for source, url in RSS_FEEDS.items():
+    seen_urls = open_url_index(DATA_DIR)
+    for source, url in feeds.items():
         try:
             articles = parse_feed(source, url, seen_urls)
             all_articles.extend(articles)
         except Exception as e:
+            METRICS.inc("feed_fetch_errors_total", source=source)
             print(f"[{source}] Failed to parse feed:", e)
 
-    save_by_day(all_articles)
+    save_by_day(all_articles, seen_urls, storage_format)
+    seen_urls.close()
     print(f" Done! Total new articles saved: {len(all_articles)}")
 
 if __name__ == "__main__":
-    run_all_rss_scrapers()
+    arg_parser = argparse.ArgumentParser(description="Scrape football RSS feeds into data/rss_by_day")
+    arg_parser.add_argument("--sequential", action="store_true", help="Fetch feeds one after another without conditional GET")
+    arg_parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY)
+    arg_parser.add_argument("--timeout", type=float, default=FETCH_TIMEOUT, help="Per-feed timeout in seconds")
+    arg_parser.add_argument("--format", choices=["jsonl", "json"], default=STORAGE_FORMAT, help="Day file format (jsonl appends, json rewrites)")
+    arg_parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the seen-URL index from the day files and exit")
+    args = arg_parser.parse_args()
+    if args.rebuild_index:
+        rebuild_url_index(DATA_DIR).close()
+    elif args.sequential:
+        with run_report("scrape"):
+            run_all_rss_scrapers(storage_format=args.format)
+    else:
+        with run_report("scrape"):
+            run_all_rss_scrapers_async(concurrency=args.concurrency, timeout=args.timeout, storage_format=args.format)
 
@@ -0,0 +1,197 @@
+import os
+import re
+import random
+import hashlib
+import argparse
+from datetime import date, timedelta
+from collections import defaultdict, deque
+from day_storage import list_day_files, read_day_file, write_day_file
+
+# Near-duplicate story detection across sources and days. Every article gets a story_id;
+# articles whose title+summary word sets are similar enough share the id of the first
+# article of the story, so /search can collapse on it.
+#
+# Signatures use one-permutation MinHash with optimal densification: each token is hashed
+# once into one of NUM_BINS bins, so a signature costs O(tokens) instead of O(tokens x
+# permutations). Signatures are split into BANDS bands for LSH; only articles sharing a
+# band within the last WINDOW_DAYS days are compared, with exact Jaccard on the word sets.
+
+INPUT_DIR = "data/rss_clean_final"
+NUM_BINS = 64
+BANDS = 32
+WINDOW_DAYS = 3
+SIMILARITY_THRESHOLD = 0.4
+# Series pages from one outlet ("Football Daily", "Live on Sky: ...") share a lot of
+# boilerplate, so two articles from the same source must be almost identical.
+SAME_SOURCE_THRESHOLD = 0.8
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "by",
+    "from", "as", "is", "are", "was", "were", "be", "been", "has", "have", "had", "it", "its",
+    "this", "that", "his", "her", "their", "he", "she", "they", "we", "you", "i", "not", "s"
+}
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_TOKEN_HASH_LIMIT = 200000
+_token_hashes = {}
+
+# Empty bins borrow from the first filled bin in a fixed random probe order per bin.
+_probe_random = random.Random(7)
+_PROBES = [[j for j in _probe_random.sample(range(NUM_BINS), NUM_BINS) if j != i] for i in range(NUM_BINS)]
+
+def story_tokens(article):
+    text = (article.get("title", "") + " " + article.get("summary", "")).lower()
+    return frozenset(token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS)
+
+def _token_hash(token):
+    value = _token_hashes.get(token)
+    if value is None:
+        if len(_token_hashes) >= _TOKEN_HASH_LIMIT:
+            _token_hashes.clear()
+        value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        _token_hashes[token] = value
+    return value
+
+def minhash_signature(tokens):
+    bins = [None] * NUM_BINS
+    for token in tokens:
+        value = _token_hash(token)
+        slot = value % NUM_BINS
+        value //= NUM_BINS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    signature = bins[:]
+    for i, value in enumerate(bins):
+        if value is None:
+            for j in _PROBES[i]:
+                if bins[j] is not None:
+                    signature[i] = bins[j]
+                    break
+    return tuple(signature)
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def new_story_id(article):
+    key = article.get("url") or (article.get("title", "") + "|" + article.get("source", ""))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+class StoryIndex:
+    # LSH buckets over a sliding window of days. Articles must be added in date order:
+    # bucket entries are appended chronologically, so expiring a day pops from the left.
+
+    def __init__(self, window_days=WINDOW_DAYS, bands=BANDS, threshold=SIMILARITY_THRESHOLD,
+                 same_source_threshold=SAME_SOURCE_THRESHOLD):
+        self.window_days = window_days
+        self.bands = bands
+        self.rows = NUM_BINS // bands
+        self.threshold = threshold
+        self.same_source_threshold = same_source_threshold
+        self.buckets = defaultdict(deque)
+        self.days = deque()
+        self.comparisons = 0
+
+    def expire(self, day):
+        oldest = day - timedelta(days=self.window_days - 1)
+        while self.days and self.days[0][0] < oldest:
+            _, keys = self.days.popleft()
+            for key in keys:
+                bucket = self.buckets[key]
+                bucket.popleft()
+                if not bucket:
+                    del self.buckets[key]
+
+    def assign(self, article, day, story_id=None):
+        # With a story_id (an article already stored elsewhere) the article is only indexed
+        # under it, so later articles can join its story.
+        self.expire(day)
+        if not self.days or self.days[-1][0] != day:
+            self.days.append((day, []))
+
+        tokens = story_tokens(article)
+        if not tokens:
+            return story_id or new_story_id(article)
+        signature = minhash_signature(tokens)
+        keys = list(enumerate(zip(*[iter(signature)] * self.rows)))
+
+        source = article.get("source")
+        best_story, best_score = story_id, 0.0
+        seen = set()
+        for key in keys if story_id is None else ():
+            for entry in self.buckets.get(key, ()):
+                if id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                self.comparisons += 1
+                score = jaccard(tokens, entry[0])
+                needed = self.same_source_threshold if entry[1] == source else self.threshold
+                if score >= needed and score > best_score:
+                    best_story, best_score = entry[2], score
+
+        story_id = best_story or new_story_id(article)
+        entry = (tokens, source, story_id)
+        for key in keys:
+            self.buckets[key].append(entry)
+        self.days[-1][1].extend(keys)
+        return story_id
+
+def _file_day(file_path):
+    try:
+        return date.fromisoformat(os.path.basename(file_path)[:10])
+    except ValueError:
+        return None
+
+def assign_story_ids(folder_path=INPUT_DIR, window_days=WINDOW_DAYS, days=None):
+    # Walks the cleaned day files in date order and rewrites only the days whose story ids
+    # changed, so the Mongo loader and ES sync only pick up what actually moved.
+    # days: the dates (YYYY-MM-DD) the cleaner rebuilt, or None for every day. A rebuilt
+    # day can only move ids up to window_days - 1 days later, so those are re-assigned
+    # (further on while days keep changing); the window_days - 1 days before it only warm
+    # the index with their stored ids, like the pipeline does.
+    index = StoryIndex(window_days)
+    pending = deque(sorted(date.fromisoformat(day) for day in days)) if days is not None else None
+    reassign_until = None
+    articles_seen = 0
+    stories = set()
+    rewritten = 0
+    for file_path in list_day_files(folder_path):
+        day = _file_day(file_path)
+        if day is None:
+            continue
+        if pending is not None:
+            while pending and pending[0] <= day:
+                reassign_until = max(reassign_until or day, pending.popleft() + timedelta(days=window_days - 1))
+            reassign = reassign_until is not None and day <= reassign_until
+            if not reassign and not pending:
+                break
+            if not reassign and day < pending[0] - timedelta(days=window_days - 1):
+                continue
+        else:
+            reassign = True
+
+        articles = list(read_day_file(file_path))
+        changed = False
+        for article in articles:
+            stored = article.get("story_id")
+            story_id = index.assign(article, day, None if reassign else stored)
+            stories.add(story_id)
+            if stored != story_id:
+                article["story_id"] = story_id
+                changed = True
+        articles_seen += len(articles)
+        if changed:
+            write_day_file(file_path, articles)
+            rewritten += 1
+            if pending is not None:
+                reassign_until = max(reassign_until or day, day + timedelta(days=window_days - 1))
+    print(f" Story ids: {articles_seen} articles in {len(stories)} stories ({rewritten} day files updated, {index.comparisons} comparisons)")
+    return rewritten
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Assign near-duplicate story ids to cleaned articles")
+    arg_parser.add_argument("--input", default=INPUT_DIR)
+    arg_parser.add_argument("--window-days", type=int, default=WINDOW_DAYS)
+    args = arg_parser.parse_args()
+    assign_story_ids(args.input, args.window_days)
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+from day_storage import list_day_files, read_day_file
+
+URL_INDEX_PATH = "data/seen_urls.sqlite3"
+
+class SeenUrlIndex:
+    # Set-like view over a SQLite table of every URL already saved to rss_by_day.
+    # Lookups hit the primary-key index, so they do not grow with the archive.
+    # add() only marks a URL for the current run; record() persists URLs once the
+    # articles are actually written, so a crashed run does not hide unsaved articles.
+
+    def __init__(self, path=URL_INDEX_PATH):
+        self.path = path
+        self.pending = set()
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen_urls (url TEXT PRIMARY KEY, date TEXT) WITHOUT ROWID")
+        self.conn.commit()
+
+    def __contains__(self, url):
+        if url in self.pending:
+            return True
+        return self.conn.execute("SELECT 1 FROM seen_urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM seen_urls").fetchone()[0]
+
+    def add(self, url):
+        self.pending.add(url)
+
+    def record(self, articles):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_urls (url, date) VALUES (?, ?)",
+                ((article["url"], article.get("date", "")[:10]) for article in articles if "url" in article)
+            )
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM seen_urls LIMIT 1").fetchone() is None
+
+    def close(self):
+        self.conn.close()
+
+def iter_day_file_articles(data_dir):
+    for path in list_day_files(data_dir):
+        try:
+            yield from read_day_file(path)
+        except Exception:
+            continue
+
+def rebuild_url_index(data_dir, path=URL_INDEX_PATH):
+    index = SeenUrlIndex(path)
+    with index.conn:
+        index.conn.execute("DELETE FROM seen_urls")
+    index.record(iter_day_file_articles(data_dir))
+    print(f" Rebuilt URL index {path} with {len(index)} URLs from {data_dir}")
+    return index
+
+def open_url_index(data_dir, path=URL_INDEX_PATH):
+    # First run against an existing archive: seed the index from the day files once.
+    if not os.path.exists(path):
+        return rebuild_url_index(data_dir, path)
+    return SeenUrlIndex(path)
@@ -0,0 +1,652 @@
+import os
+import re
+import sys
+import html
+import json
+import math
+import mmap
+import time
+import heapq
+import itertools
+import struct
+import argparse
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from collections import defaultdict
+
+# core/ modules import each other by bare name, as they do when run as scripts; importing
+# them as core.<name> as well would load a second copy of each.
+CORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "core")
+if CORE_DIR not in sys.path:
+    sys.path.insert(0, CORE_DIR)
+
+from day_storage import list_day_files, read_day_file
+
+# Elasticsearch-free search backend for edge deployments and CI. build_local_index() turns
+# the cleaned articles into a single file that LocalSearch memory-maps; LocalSearch answers
+# the same search()/open_point_in_time()/indices.get_mapping() calls app.py makes against
+# Elasticsearch, for the subset of the query DSL that search_common.py builds:
+# match_all, bool (must/filter/must_not), term, multi_match (phrase or best_fields with
+# boosts), range on date (with time_zone), post_filter, terms and filter aggregations, sort on date/url/_score,
+# search_after, collapse, from/size, _source includes and highlight (one fragment per
+# field around the first matching query word).
+#
+# File layout: magic, header length, JSON header (term dictionaries with offsets), then
+# the data region: positional postings (uint32), keyword bitsets, per-doc dates (int64),
+# field lengths (uint32) and the stored documents. Doc ids follow (date, url) order, so
+# date sorting and search_after are range operations on doc ids.
+
+LOCAL_INDEX_PATH = "data/local_search.idx"
+INPUT_DIR = "data/rss_clean_final"
+MAGIC = b"FNLSIDX1"
+
+TEXT_FIELDS = ["title", "summary"]
+KEYWORD_FIELDS = ["source", "clubs", "leagues", "main_league"]
+STORED_FIELDS = ["title", "summary", "url", "source", "date", "clubs", "leagues", "main_league", "story_id"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def date_millis(value):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return 0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+def bound_millis(value, time_zone=None):
+    # Range bounds without an offset are read in the query's time_zone, as ES does.
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.strptime(time_zone, "%z").tzinfo if time_zone else timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+def keyword_values(article, field):
+    value = article.get(field)
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def iter_clean_articles(folder_path=INPUT_DIR):
+    # Pretty-printed .json days and compact .jsonl days (clean_and_reorganize.py --format jsonl).
+    for file_path in list_day_files(folder_path):
+        yield from read_day_file(file_path)
+
+def iter_mongo_articles(uri="mongodb://localhost:27017/", database="football_news", collection="cleaned_articles"):
+    from pymongo import MongoClient
+    client = MongoClient(uri)
+    projection = {field: 1 for field in STORED_FIELDS}
+    projection["_id"] = 0
+    try:
+        yield from client[database][collection].find({}, projection)
+    finally:
+        client.close()
+
+def build_local_index(articles, output_path=LOCAL_INDEX_PATH):
+    by_url = {}
+    for article in articles:
+        if article.get("url"):
+            by_url[article["url"]] = {field: article[field] for field in STORED_FIELDS if field in article}
+    docs = sorted(by_url.values(), key=lambda doc: (date_millis(doc.get("date")), doc["url"]))
+
+    data = bytearray()
+    header = {"generation": str(time.time_ns()), "doc_count": len(docs), "text": {}, "keywords": {}}
+
+    def add_section(raw):
+        offset = len(data)
+        data.extend(raw)
+        data.extend(b"\0" * (-len(data) % 8))
+        return [offset, len(raw)]
+
+    for field in TEXT_FIELDS:
+        postings = defaultdict(list)
+        lengths = []
+        for doc_id, doc in enumerate(docs):
+            positions = defaultdict(list)
+            tokens = tokenize(doc.get(field, ""))
+            for position, token in enumerate(tokens):
+                positions[token].append(position)
+            for token, token_positions in positions.items():
+                postings[token].append((doc_id, token_positions))
+            lengths.append(len(tokens))
+        terms = {}
+        for token, entries in postings.items():
+            flat = []
+            for doc_id, token_positions in entries:
+                flat.append(doc_id)
+                flat.append(len(token_positions))
+                flat.extend(token_positions)
+            terms[token] = add_section(struct.pack(f"<{len(flat)}I", *flat)) + [len(entries)]
+        header["text"][field] = {
+            "terms": terms,
+            "lengths": add_section(struct.pack(f"<{len(lengths)}I", *lengths)),
+            "avgdl": sum(lengths) / len(lengths) if lengths else 0.0
+        }
+
+    for field in KEYWORD_FIELDS:
+        bitsets = defaultdict(int)
+        for doc_id, doc in enumerate(docs):
+            for value in keyword_values(doc, field):
+                bitsets[value] |= 1 << doc_id
+        header["keywords"][field] = {
+            value: add_section(bits.to_bytes((len(docs) + 7) // 8, "little")) + [bits.bit_count()]
+            for value, bits in bitsets.items()
+        }
+
+    header["dates"] = add_section(struct.pack(f"<{len(docs)}q", *(date_millis(doc.get("date")) for doc in docs)))
+    stored = [json.dumps(doc, ensure_ascii=False).encode("utf-8") for doc in docs]
+    offsets = [0]
+    for raw in stored:
+        offsets.append(offsets[-1] + len(raw))
+    header["doc_offsets"] = add_section(struct.pack(f"<{len(offsets)}Q", *offsets))
+    header["docs"] = add_section(b"".join(stored))
+
+    header_raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    header_raw += b" " * (-(len(header_raw) + 16) % 8)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_raw)))
+        f.write(header_raw)
+        f.write(data)
+    # The running app keeps its old mapping until it notices the new file.
+    os.replace(tmp_path, output_path)
+    return len(docs)
+
+class LocalIndex:
+    # Read-only view over one index file. Postings and bitsets are decoded from the
+    # mapping on first use, so opening costs only the header parse.
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = self._stat(path)
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:8] != MAGIC:
+            raise ValueError(f"{path} is not a local search index")
+        header_len = struct.unpack_from("<Q", self.map, 8)[0]
+        self.header = json.loads(self.map[16:16 + header_len])
+        self.base = 16 + header_len
+        self.view = memoryview(self.map)
+        self.doc_count = self.header["doc_count"]
+        self.all_docs = (1 << self.doc_count) - 1
+        self.dates = self._array(self.header["dates"], "q")
+        self.doc_offsets = self._array(self.header["doc_offsets"], "Q")
+        self.lengths = {field: self._array(info["lengths"], "I") for field, info in self.header["text"].items()}
+        self.bitsets = {}
+        self.term_bitsets = {}
+        self.postings = {}
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _array(self, section, fmt):
+        offset, length = section[:2]
+        return self.view[self.base + offset:self.base + offset + length].cast(fmt)
+
+    def document(self, doc_id):
+        start = self.base + self.header["docs"][0]
+        return json.loads(self.map[start + self.doc_offsets[doc_id]:start + self.doc_offsets[doc_id + 1]])
+
+    def keyword_bits(self, field, value):
+        key = (field, value)
+        bits = self.bitsets.get(key)
+        if bits is None:
+            section = self.header["keywords"].get(field, {}).get(value)
+            bits = int.from_bytes(self._array(section, "B"), "little") if section else 0
+            self.bitsets[key] = bits
+        return bits
+
+    def term_postings(self, field, token):
+        # {doc_id: [positions]} for one token of a text field.
+        key = (field, token)
+        postings = self.postings.get(key)
+        if postings is None:
+            postings = {}
+            section = self.header["text"].get(field, {}).get("terms", {}).get(token)
+            if section:
+                flat = self._array(section, "I")
+                i = 0
+                while i < len(flat):
+                    count = flat[i + 1]
+                    postings[flat[i]] = flat[i + 2:i + 2 + count].tolist()
+                    i += 2 + count
+            self.postings[key] = postings
+        return postings
+
+    def term_bits(self, field, token):
+        key = (field, token)
+        bits = self.term_bitsets.get(key)
+        if bits is None:
+            bits = ids_to_bits(self.term_postings(field, token), self.doc_count)
+            self.term_bitsets[key] = bits
+        return bits
+
+    def text_matches(self, field, tokens, phrase):
+        # Bitset-only version of text_scores for queries sorted by something other than score.
+        if not tokens:
+            return 0
+        if not phrase:
+            bits = 0
+            for token in tokens:
+                bits |= self.term_bits(field, token)
+            return bits
+        bits = self.all_docs
+        for token in tokens:
+            bits &= self.term_bits(field, token)
+        if len(tokens) == 1 or not bits:
+            return bits
+        postings = [self.term_postings(field, token) for token in tokens]
+        matched = []
+        for doc_id in iter_ids(bits):
+            starts = set(postings[0][doc_id])
+            for offset, term in enumerate(postings[1:], 1):
+                starts &= {position - offset for position in term[doc_id]}
+            if starts:
+                matched.append(doc_id)
+        return ids_to_bits(matched, self.doc_count)
+
+    def idf(self, df):
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def bm25(self, field, doc_id, freq, idf):
+        info = self.header["text"][field]
+        norm = 1 - BM25_B + BM25_B * self.lengths[field][doc_id] / (info["avgdl"] or 1)
+        return idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * norm)
+
+    def text_scores(self, field, tokens, phrase):
+        # Phrase: every token at consecutive positions, scored on the phrase frequency with
+        # the summed idf of its terms (as Lucene does). Otherwise: sum of per-term scores.
+        if not tokens:
+            return {}
+        postings = [self.term_postings(field, token) for token in tokens]
+        if not phrase:
+            scores = defaultdict(float)
+            for term in postings:
+                idf = self.idf(len(term))
+                for doc_id, positions in term.items():
+                    scores[doc_id] += self.bm25(field, doc_id, len(positions), idf)
+            return scores
+        candidates = set(min(postings, key=len))
+        for term in postings:
+            candidates.intersection_update(term)
+        idf = sum(self.idf(len(term)) for term in postings)
+        scores = {}
+        for doc_id in candidates:
+            starts = set(postings[0][doc_id])
+            for offset, term in enumerate(postings[1:], 1):
+                starts &= {position - offset for position in term[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                scores[doc_id] = self.bm25(field, doc_id, len(starts), idf)
+        return scores
+
+    def date_range(self, date):
+        return bisect_left(self.dates, date), bisect_right(self.dates, date)
+
+    def date_bounds(self, bounds):
+        # Doc ids are in date order, so a date range is one contiguous run of ids.
+        time_zone = bounds.get("time_zone")
+        lo, hi = 0, self.doc_count
+        if "gte" in bounds:
+            lo = bisect_left(self.dates, bound_millis(bounds["gte"], time_zone))
+        if "gt" in bounds:
+            lo = bisect_right(self.dates, bound_millis(bounds["gt"], time_zone))
+        if "lt" in bounds:
+            hi = bisect_left(self.dates, bound_millis(bounds["lt"], time_zone))
+        if "lte" in bounds:
+            hi = bisect_right(self.dates, bound_millis(bounds["lte"], time_zone))
+        return lo, max(lo, hi)
+
+    def first_url_after(self, lo, hi, url):
+        # Within one date, doc ids are in url order.
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.document(mid)["url"] <= url:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+def iter_ids(bits, descending=False):
+    digits = bin(bits)[2:]
+    if descending:
+        top = len(digits) - 1
+        position = digits.find("1")
+        while position >= 0:
+            yield top - position
+            position = digits.find("1", position + 1)
+    else:
+        digits = digits[::-1]
+        doc_id = digits.find("1")
+        while doc_id >= 0:
+            yield doc_id
+            doc_id = digits.find("1", doc_id + 1)
+
+def bits_to_ids(bits):
+    return list(iter_ids(bits))
+
+def ids_to_bits(ids, doc_count):
+    buffer = bytearray((doc_count + 7) // 8)
+    for doc_id in ids:
+        buffer[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buffer, "little")
+
+def query_tokens(query):
+    # Words of every multi_match in the query, for highlighting.
+    kind, body = single_entry(query)
+    if kind == "multi_match":
+        return set(tokenize(body.get("query", "")))
+    if kind == "bool":
+        tokens = set()
+        for occur in ("must", "filter"):
+            for clause in body.get(occur, []):
+                tokens |= query_tokens(clause)
+        return tokens
+    return set()
+
+def highlight_fragment(text, tokens, field_spec, pre_tag, post_tag, encode):
+    # Like the unified highlighter with number_of_fragments 1: a fragment_size window that
+    # starts a little before the first match, or the first no_match_size characters.
+    size = field_spec.get("fragment_size", 100)
+    matches = [match for match in TOKEN_PATTERN.finditer(text) if match.group().lower() in tokens]
+    if not matches:
+        no_match_size = field_spec.get("no_match_size", 0)
+        return [encode(text[:no_match_size])] if no_match_size else []
+    start = max(0, min(matches[0].start() - size // 4, len(text) - size))
+    end = start + size
+    parts = []
+    position = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(encode(text[position:match.start()]))
+        parts.append(pre_tag + encode(match.group()) + post_tag)
+        position = match.end()
+    parts.append(encode(text[position:end]))
+    return ["".join(parts)]
+
+def field_boost(spec):
+    name, _, boost = spec.partition("^")
+    return name, float(boost) if boost else 1.0
+
+def single_entry(clause):
+    (key, value), = clause.items()
+    return key, value
+
+def parse_sort(sort):
+    # [(field, order)]; doc id order already is (date, url), so only sorts that follow it work.
+    fields = []
+    for spec in sort:
+        field, options = single_entry(spec) if isinstance(spec, dict) else (spec, {})
+        order = options if isinstance(options, str) else options.get("order", "desc" if field == "_score" else "asc")
+        fields.append((field, order))
+    if fields and fields[0][0] != "_score" and (fields[0][0] != "date" or fields[1:] not in ([], [("url", "asc")])):
+        raise ValueError(f"unsupported sort: {sort}")
+    return fields
+
+class LocalSearch:
+    # Stands in for the Elasticsearch client in app.py. The index file is re-opened when it
+    # changes on disk; the check runs on get_mapping(), which the app already calls every
+    # few seconds to detect new index generations.
+
+    def __init__(self, path=LOCAL_INDEX_PATH):
+        self.path = path
+        self.index = LocalIndex(path)
+        self.indices = self
+
+    def get_mapping(self, index=None):
+        if LocalIndex._stat(self.path) != self.index.signature:
+            self.index = LocalIndex(self.path)
+        return {f"local:{self.path}": {"mappings": {"_meta": {"generation": self.index.header["generation"]}}}}
+
+    def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+        # The mapped file never changes under a reader, so a generation is a point in time.
+        return {"id": self.index.header["generation"]}
+
+    def close_point_in_time(self, id=None):
+        return {"succeeded": True}
+
+    def close(self):
+        pass
+
+    def evaluate(self, index, query, scoring=False):
+        # Returns (matching doc bitset, {doc_id: score} or None when every match scores 1).
+        # Scores are only computed when the results are sorted by them.
+        kind, body = single_entry(query)
+        if kind == "match_all":
+            return index.all_docs, None
+        if kind == "term":
+            field, value = single_entry(body)
+            if isinstance(value, dict):
+                value = value["value"]
+            return index.keyword_bits(field, value), None
+        if kind == "terms":
+            field, values = single_entry(body)
+            bits = 0
+            for value in values:
+                bits |= index.keyword_bits(field, value)
+            return bits, None
+        if kind == "multi_match":
+            return self.multi_match(index, body, scoring)
+        if kind == "range":
+            field, bounds = single_entry(body)
+            if field != "date":
+                raise ValueError(f"unsupported range field: {field}")
+            lo, hi = index.date_bounds(bounds)
+            return ((1 << hi) - 1) ^ ((1 << lo) - 1), None
+        if kind == "bool":
+            bits = index.all_docs
+            scores = None
+            for clause in body.get("must", []):
+                clause_bits, clause_scores = self.evaluate(index, clause, scoring)
+                bits &= clause_bits
+                if clause_scores is not None:
+                    scores = clause_scores if scores is None else {
+                        doc_id: scores.get(doc_id, 0.0) + clause_scores.get(doc_id, 0.0)
+                        for doc_id in set(scores) | set(clause_scores)
+                    }
+            for clause in body.get("filter", []):
+                bits &= self.evaluate(index, clause)[0]
+            for clause in body.get("must_not", []):
+                bits &= ~self.evaluate(index, clause)[0]
+            return bits, scores
+        raise ValueError(f"unsupported query: {kind}")
+
+    def multi_match(self, index, body, scoring):
+        # best score across fields, like multi_match's default tie_breaker of 0.
+        query = body["query"]
+        phrase = body.get("type") == "phrase"
+        tokens = tokenize(query)
+        if not scoring:
+            bits = 0
+            for spec in body.get("fields", TEXT_FIELDS):
+                field = field_boost(spec)[0]
+                if field in index.header["text"]:
+                    bits |= index.text_matches(field, tokens, phrase)
+                else:
+                    bits |= index.keyword_bits(field, query)
+            return bits, None
+        scores = {}
+        for spec in body.get("fields", TEXT_FIELDS):
+            field, boost = field_boost(spec)
+            if field in index.header["text"]:
+                field_scores = index.text_scores(field, tokens, phrase)
+            else:
+                # Keyword fields only match the whole query string.
+                section = index.header["keywords"].get(field, {}).get(query)
+                if not section:
+                    continue
+                score = index.idf(section[2])
+                field_scores = dict.fromkeys(bits_to_ids(index.keyword_bits(field, query)), score)
+            for doc_id, score in field_scores.items():
+                if score * boost > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score * boost
+        return ids_to_bits(scores, index.doc_count), scores
+
+    def aggregate(self, index, aggs, bits):
+        results = {}
+        for name, spec in aggs.items():
+            if "terms" in spec:
+                field = spec["terms"]["field"]
+                buckets = [
+                    {"key": value, "doc_count": (bits & index.keyword_bits(field, value)).bit_count()}
+                    for value in index.header["keywords"].get(field, {})
+                ]
+                buckets = sorted((b for b in buckets if b["doc_count"]), key=lambda b: (-b["doc_count"], b["key"]))
+                results[name] = {"buckets": buckets[:spec["terms"].get("size", 10)]}
+            elif "filter" in spec:
+                filtered = bits & self.evaluate(index, spec["filter"])[0]
+                results[name] = {"doc_count": filtered.bit_count(), **self.aggregate(index, spec.get("aggs", {}), filtered)}
+            else:
+                raise ValueError(f"unsupported aggregation: {name}")
+        return results
+
+    def search_after_bits(self, index, order, search_after):
+        date, url = search_after[0], search_after[1] if len(search_after) > 1 else None
+        lo, hi = index.date_range(date)
+        after = index.first_url_after(lo, hi, url) if url is not None else hi
+        if order == "asc":
+            return index.all_docs ^ ((1 << after) - 1)
+        return ((1 << lo) - 1) | (((1 << hi) - 1) ^ ((1 << after) - 1))
+
+    def ordered_ids(self, index, bits, scores, sort_fields, limit):
+        if not sort_fields or sort_fields[0][0] == "_score":
+            scores = scores or {}
+            return heapq.nsmallest(limit, bits_to_ids(bits), key=lambda doc_id: (-scores.get(doc_id, 1.0), doc_id))
+        if sort_fields[0][1] == "asc":
+            return list(itertools.islice(iter_ids(bits), limit))
+        # Newest first: walk doc ids downwards in runs of equal dates, keeping url order inside each.
+        ordered = []
+        run = []
+        for doc_id in iter_ids(bits, descending=True):
+            if run and index.dates[doc_id] != index.dates[run[0]]:
+                ordered.extend(reversed(run))
+                run = []
+                if len(ordered) >= limit:
+                    break
+            run.append(doc_id)
+        else:
+            ordered.extend(reversed(run))
+        return ordered[:limit]
+
+    def collapsed(self, index, ordered, field, limit):
+        # First document per value of field, in result order; documents without it stay.
+        documents = []
+        seen = set()
+        for doc_id in ordered:
+            document = index.document(doc_id)
+            value = document.get(field)
+            if value is None or value not in seen:
+                documents.append((doc_id, document))
+                seen.add(value)
+                if len(documents) >= limit:
+                    break
+        return documents
+
+    def highlight(self, spec, tokens, document):
+        encode = html.escape if spec.get("encoder") == "html" else str
+        pre_tag = spec.get("pre_tags", ["<em>"])[0]
+        post_tag = spec.get("post_tags", ["</em>"])[0]
+        fragments = {}
+        for field, field_spec in spec["fields"].items():
+            fragment = highlight_fragment(document.get(field) or "", tokens, field_spec, pre_tag, post_tag, encode)
+            if fragment:
+                fragments[field] = fragment
+        return fragments
+
+    def search(self, index=None, query=None, post_filter=None, aggs=None, sort=None, size=10, from_=0,
+               source=None, search_after=None, pit=None, collapse=None, track_total_hits=True, highlight=None, **kwargs):
+        started = time.perf_counter()
+        local = self.index
+        sort_fields = parse_sort(sort or [])
+        by_score = not sort_fields or sort_fields[0][0] == "_score"
+        bits, scores = self.evaluate(local, query or {"match_all": {}}, by_score)
+        aggregations = self.aggregate(local, aggs, bits) if aggs else None
+        if post_filter:
+            bits &= self.evaluate(local, post_filter)[0]
+        total = bits.bit_count()
+        if search_after:
+            if by_score:
+                raise ValueError("search_after needs a date sort")
+            bits &= self.search_after_bits(local, sort_fields[0][1], search_after)
+
+        hits = []
+        tokens = query_tokens(query or {"match_all": {}}) if highlight else None
+        if collapse:
+            documents = self.collapsed(local, self.ordered_ids(local, bits, scores, sort_fields, local.doc_count), collapse["field"], from_ + size)
+        else:
+            documents = [(doc_id, local.document(doc_id)) for doc_id in self.ordered_ids(local, bits, scores, sort_fields, from_ + size)]
+        for doc_id, document in documents[from_:]:
+            score = (scores or {}).get(doc_id, 1.0)
+            hit = {
+                "_index": f"local:{self.path}",
+                "_id": str(doc_id),
+                "_score": score if by_score else None,
+                "_source": {field: document[field] for field in source if field in document} if source else document
+            }
+            if sort_fields:
+                hit["sort"] = [score] if by_score else [local.dates[doc_id], document["url"]][:len(sort_fields)]
+            if highlight:
+                hit["highlight"] = self.highlight(highlight, tokens, document)
+            hits.append(hit)
+
+        response = {
+            "took": int((time.perf_counter() - started) * 1000),
+            "timed_out": False,
+            "hits": {"total": {"value": total, "relation": "eq"}, "hits": hits}
+        }
+        if pit:
+            response["pit_id"] = local.header["generation"]
+        if aggregations is not None:
+            response["aggregations"] = aggregations
+        return response
+
+class AsyncLocalSearch:
+    # app_async.py awaits every client call; searches here are in-process and short, so
+    # they run inline on the event loop.
+
+    def __init__(self, path=LOCAL_INDEX_PATH):
+        self.local = LocalSearch(path)
+        self.indices = self
+
+    async def get_mapping(self, index=None):
+        return self.local.get_mapping(index)
+
+    async def open_point_in_time(self, **kwargs):
+        return self.local.open_point_in_time(**kwargs)
+
+    async def close_point_in_time(self, **kwargs):
+        return self.local.close_point_in_time(**kwargs)
+
+    async def search(self, **kwargs):
+        return self.local.search(**kwargs)
+
+    async def close(self):
+        pass
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build the embedded search index used by SEARCH_BACKEND=local")
+    arg_parser.add_argument("--input", default=INPUT_DIR, help="Folder of cleaned day files")
+    arg_parser.add_argument("--mongo", nargs="?", const="mongodb://localhost:27017/", help="Read from MongoDB instead (optional URI)")
+    arg_parser.add_argument("--output", default=LOCAL_INDEX_PATH)
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    articles = iter_mongo_articles(args.mongo) if args.mongo else iter_clean_articles(args.input)
+    count = build_local_index(articles, args.output)
+    print(f" Indexed {count} articles into {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,331 @@
+import os
+import json
+import base64
+from datetime import date, datetime, timedelta, timezone
+
+# Settings shared by app.py and app_async.py. Every key can be overridden with an
+# environment variable of the same name or through the config passed to create_app().
+DEFAULT_CONFIG = {
+    # "elasticsearch", or "local" for the embedded index built by local_search.py.
+    "SEARCH_BACKEND": "elasticsearch",
+    "LOCAL_INDEX_PATH": "data/local_search.idx",
+    "ES_HOSTS": "https://localhost:9200",
+    "ES_USERNAME": "elastic",
+    # No default: set ES_PASSWORD in the environment (or pass it to create_app()).
+    "ES_PASSWORD": "",
+    "ES_VERIFY_CERTS": False,
+    "ES_CONNECTIONS_PER_NODE": 10,
+    "ES_REQUEST_TIMEOUT": 10.0,
+    "ES_MAX_RETRIES": 3,
+    "ES_RETRY_ON_TIMEOUT": True,
+    "ES_KEEP_ALIVE": True,
+    # Alias maintained by core/db_to_elastic.py; it is swapped atomically on full rebuilds.
+    "INDEX_ALIAS": "football_news",
+    "FACET_CACHE_SIZE": 256,
+    "FACET_CACHE_TTL": 300,
+    "FACET_CACHE_REDIS_URL": "",
+    "GENERATION_CHECK_SECONDS": 5.0,
+    # /api/suggest: "trie" (in memory, built at startup) or "elasticsearch" (completion
+    # suggester on club_suggest); the keyword maps of the latest season unless SUGGEST_AS_OF.
+    "SUGGEST_BACKEND": "trie",
+    "SUGGEST_AS_OF": "",
+}
+
+PAGE_SIZE = 20
+PIT_KEEP_ALIVE = "2m"
+# Article dates are UTC+7 days (the cleaner's calendar); date_from/date_to are read the same way.
+ARTICLE_TIME_ZONE = "+07:00"
+# Wider ranges search the read alias rather than naming every month.
+MAX_SEARCH_MONTHS = 24
+
+# Request filter -> indexed field it restricts.
+FILTER_FIELDS = {"league": "main_league", "club": "clubs", "source": "source"}
+# Each facet ignores the filter driven by its own selector so the other options keep
+# their counts (the league selector feeds both league facets).
+FACET_EXCLUDED_FILTER = {"clubs": "club", "leagues": "league", "main_league": "league", "source": "source"}
+RESULT_FIELDS = ["title", "summary", "url", "source", "date", "clubs", "leagues", "story_id"]
+LIST_FIELDS = {"clubs", "leagues"}
+# "snippets": true swaps the full summary for one highlighted fragment of about this many
+# characters. The highlighter escapes the text, so a snippet is safe to insert as HTML.
+SNIPPET_CHARS = 160
+SNIPPET_HIGHLIGHT = {
+    "encoder": "html",
+    "pre_tags": ["<mark>"],
+    "post_tags": ["</mark>"],
+    "fields": {"summary": {"fragment_size": SNIPPET_CHARS, "number_of_fragments": 1, "no_match_size": SNIPPET_CHARS}}
+}
+
+def _parse_setting(raw, default):
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+def load_config(overrides=None):
+    config = dict(DEFAULT_CONFIG)
+    for key, default in DEFAULT_CONFIG.items():
+        if key in os.environ:
+            config[key] = _parse_setting(os.environ[key], default)
+    config.update(overrides or {})
+    return config
+
+def es_client_kwargs(config):
+    # Connections in the per-node pool are persistent, so keep-alive is on by default;
+    # ES_KEEP_ALIVE=false asks the server to close each connection instead.
+    kwargs = {
+        "hosts": [host.strip() for host in config["ES_HOSTS"].split(",")],
+        "verify_certs": config["ES_VERIFY_CERTS"],
+        "connections_per_node": config["ES_CONNECTIONS_PER_NODE"],
+        "request_timeout": config["ES_REQUEST_TIMEOUT"],
+        "max_retries": config["ES_MAX_RETRIES"],
+        "retry_on_timeout": config["ES_RETRY_ON_TIMEOUT"],
+    }
+    if config["ES_USERNAME"]:
+        if not config["ES_PASSWORD"]:
+            raise ValueError(f"ES_PASSWORD is not set for Elasticsearch user {config['ES_USERNAME']}")
+        kwargs["basic_auth"] = (config["ES_USERNAME"], config["ES_PASSWORD"])
+    if not config["ES_KEEP_ALIVE"]:
+        kwargs["headers"] = {"Connection": "close"}
+    return kwargs
+
+def parse_day(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name}, expected YYYY-MM-DD")
+
+def date_range_clause(filters):
+    # date_to is inclusive: the range ends where the next day starts.
+    bounds = {}
+    if filters.get("date_from"):
+        bounds["gte"] = parse_day(filters["date_from"], "date_from").isoformat()
+    if filters.get("date_to"):
+        bounds["lt"] = (parse_day(filters["date_to"], "date_to") + timedelta(days=1)).isoformat()
+    if not bounds:
+        return None
+    return {"range": {"date": {**bounds, "time_zone": ARTICLE_TIME_ZONE}}}
+
+def search_targets(index, filters):
+    # core/db_to_elastic.py keeps one alias per month (<alias>-YYYY-MM), so a date range
+    # only searches the partitions it overlaps. Months without a partition are skipped
+    # (ignore_unavailable).
+    if not filters.get("date_from"):
+        return index
+    start = parse_day(filters["date_from"], "date_from")
+    if filters.get("date_to"):
+        end = parse_day(filters["date_to"], "date_to")
+    else:
+        end = datetime.now(timezone(timedelta(hours=7))).date()
+    first = start.year * 12 + start.month - 1
+    last = end.year * 12 + end.month - 1
+    if last < first or last - first >= MAX_SEARCH_MONTHS:
+        return index
+    return ",".join(f"{index}-{month // 12:04d}-{month % 12 + 1:02d}" for month in range(first, last + 1))
+
+def filter_clauses(filters):
+    clauses = {
+        name: {"term": {field: filters[name]}}
+        for name, field in FILTER_FIELDS.items()
+        if filters.get(name)
+    }
+    date_range = date_range_clause(filters)
+    if date_range:
+        clauses["date"] = date_range
+    return clauses
+
+def text_query(filters):
+    query = filters.get("query", "")
+    if not query:
+        return {"match_all": {}}
+    return {
+        "multi_match": {
+            "query": query,
+            "type": "phrase",
+            "fields": [
+                "title^3", "summary^2", "source",
+                "clubs^5", "leagues^6", "main_league^7"
+            ]
+        }
+    }
+
+def build_search_query(filters):
+    return {
+        "bool": {
+            "must": [text_query(filters)],
+            "filter": list(filter_clauses(filters).values())
+        }
+    }
+
+def build_facet_search(filters):
+    # Filters go in post_filter so hits are filtered while every facet aggregation sees
+    # the text query plus all filters except its own.
+    clauses = filter_clauses(filters)
+    aggs = {
+        field: {
+            "filter": {"bool": {"filter": [
+                clause for name, clause in clauses.items() if name != FACET_EXCLUDED_FILTER[field]
+            ]}},
+            "aggs": {"values": {"terms": {"field": field, "size": 1000}}}
+        }
+        for field in FACET_EXCLUDED_FILTER
+    }
+    return {
+        "query": text_query(filters),
+        "post_filter": {"bool": {"filter": list(clauses.values())}},
+        "aggs": aggs
+    }
+
+def format_facets(aggregations):
+    return {
+        field: [
+            {"key": bucket["key"], "count": bucket["doc_count"]}
+            for bucket in aggregations[field]["values"]["buckets"]
+        ]
+        for field in FACET_EXCLUDED_FILTER
+    }
+
+def format_hit(hit, snippets=False):
+    source = hit["_source"]
+    result = {field: source.get(field, [] if field in LIST_FIELDS else "") for field in RESULT_FIELDS}
+    if snippets:
+        result["summary"] = hit.get("highlight", {}).get("summary", [""])[0]
+    return result
+
+def result_source_args(snippets):
+    # Only the fields the response returns; with snippets the summary comes back through
+    # the highlighter rather than the whole _source field.
+    if not snippets:
+        return {"source": RESULT_FIELDS}
+    return {"source": [field for field in RESULT_FIELDS if field != "summary"], "highlight": SNIPPET_HIGHLIGHT}
+
+def encode_cursor(state):
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+def decode_cursor(token):
+    return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+
+def parse_search_request(data):
+    # Returns what /search should do; raises ValueError for a cursor it cannot decode or
+    # a date_from/date_to that is not YYYY-MM-DD.
+    date_sort = data.get("date", "desc")
+    if date_sort not in ("asc", "desc"):
+        date_sort = "desc"
+    # "collapse": true keeps one article per story_id (the newest, or oldest with date=asc).
+    plan = {"facets": bool(data.get("facets")), "collapse": bool(data.get("collapse")), "snippets": bool(data.get("snippets")), "sort": date_sort}
+
+    if data.get("cursor"):
+        try:
+            plan["cursor_state"] = decode_cursor(data["cursor"])
+        except Exception:
+            raise ValueError("invalid cursor")
+    elif data.get("paginate") == "cursor":
+        filters = {key: data.get(key, "") for key in ("query", "league", "club", "source", "date_from", "date_to")}
+        plan["cursor_state"] = {
+            "filters": filters, "sort": date_sort, "collapse": plan["collapse"], "snippets": plan["snippets"],
+            "pit": None, "search_after": None
+        }
+    else:
+        plan["filters"] = data
+        plan["from"] = data.get("from", 0)
+    filters = plan["cursor_state"]["filters"] if "cursor_state" in plan else plan["filters"]
+    date_range_clause(filters)
+    return plan
+
+def from_search_args(plan, index):
+    search_args = build_facet_search(plan["filters"]) if plan["facets"] else {"query": build_search_query(plan["filters"])}
+    if plan["collapse"]:
+        search_args["collapse"] = {"field": "story_id"}
+    return {
+        "index": search_targets(index, plan["filters"]),
+        "ignore_unavailable": True,
+        "sort": [{"date": {"order": plan["sort"]}}],
+        "size": PAGE_SIZE,
+        "from_": plan["from"],
+        **result_source_args(plan["snippets"]),
+        **search_args
+    }
+
+def cursor_search_args(state, facets):
+    # Point-in-time + search_after: every page costs the same no matter how deep it is,
+    # is not capped by the 10k result window, and new documents cannot shift the pages.
+    # url is unique per article, so it breaks date ties deterministically.
+    search_args = {
+        "sort": [{"date": {"order": state["sort"]}}, {"url": {"order": "asc"}}],
+        "size": PAGE_SIZE,
+        "track_total_hits": False,
+        **result_source_args(state.get("snippets", False))
+    }
+    if facets:
+        search_args.update(build_facet_search(state["filters"]))
+    else:
+        search_args["query"] = build_search_query(state["filters"])
+    if state.get("search_after"):
+        search_args["search_after"] = state["search_after"]
+    return search_args
+
+def next_cursor(state, results):
+    # None on the last page, when the caller should close the point in time.
+    hits = results["hits"]["hits"]
+    if len(hits) < PAGE_SIZE:
+        return None
+    return encode_cursor({
+        "filters": state["filters"],
+        "sort": state["sort"],
+        "collapse": state.get("collapse", False),
+        "snippets": state.get("snippets", False),
+        "pit": results.get("pit_id", state["pit"]),
+        "search_after": hits[-1]["sort"]
+    })
+
+def collapse_page(hits):
+    # ES only collapses with search_after when sorting on the collapse field, so cursor
+    # pages are collapsed here, best effort: one article per story within the page. Pages
+    # can come back shorter than PAGE_SIZE and a story can show up again on a later page;
+    # the "from" mode collapses exactly.
+    seen = set()
+    page = []
+    for hit in hits:
+        story_id = hit["story_id"]
+        if not story_id or story_id not in seen:
+            page.append(hit)
+            seen.add(story_id)
+    return page
+
+def search_response(plan, results, cursor=None):
+    snippets = plan["cursor_state"].get("snippets", False) if "cursor_state" in plan else plan["snippets"]
+    hits = [format_hit(hit, snippets) for hit in results["hits"]["hits"]]
+    if "cursor_state" in plan and plan["cursor_state"].get("collapse"):
+        hits = collapse_page(hits)
+    if "cursor_state" in plan:
+        response = {"results": hits, "cursor": cursor}
+    elif plan["facets"]:
+        response = {"results": hits}
+    else:
+        return hits
+    if plan["facets"]:
+        response["facets"] = format_facets(results["aggregations"])
+    return response
+
+def facet_list_search(name, index, league=""):
+    if name == "clubs":
+        query = {"match_all": {}} if not league else {"term": {"main_league": league}}
+        return {"index": index, "size": 0, "query": query, "aggs": {"clubs": {"terms": {"field": "clubs", "size": 1000}}}}
+    if name == "leagues":
+        return {"index": index, "size": 0, "aggs": {"unique_leagues": {"terms": {"field": "leagues", "size": 1000}}}}
+    return {"index": index, "size": 0, "aggs": {"sources": {"terms": {"field": "source", "size": 1000}}}}
+
+def facet_list_values(name, response):
+    if name == "clubs":
+        return sorted(bucket["key"] for bucket in response["aggregations"]["clubs"]["buckets"])
+    if name == "leagues":
+        return sorted(bucket["key"] for bucket in response["aggregations"]["unique_leagues"]["buckets"])
+    return [bucket["key"] for bucket in response["aggregations"]["sources"]["buckets"]]
+
+def generation_from_mappings(mappings):
+    return ",".join(
+        f"{index}:{mapping['mappings'].get('_meta', {}).get('generation', '')}"
+        for index, mapping in sorted(mappings.items())
+    )
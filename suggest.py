@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import unicodedata
+
+# Club autocomplete for /api/suggest. ClubSuggester is a character trie over the club names
+# and their CLUB_ALIASES, built once at startup from the keyword maps. Every node stores its
+# best MAX_SUGGESTIONS clubs already ranked, so a lookup is one walk down the trie, however
+# short the prefix. Prefixes match the start of a name or of any word in it ("united"
+# finds "Manchester United FC"), case- and accent-insensitively ("atletico").
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "core")
+MAX_SUGGESTIONS = 20
+DEFAULT_SUGGESTIONS = 10
+
+NON_WORD = re.compile(r"[^0-9a-z]+")
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return NON_WORD.sub(" ", text.lower()).strip()
+
+class ClubSuggester:
+    def __init__(self, club_to_league, aliases, league_order=None, limit=MAX_SUGGESTIONS):
+        # Node: [children by character, ranked suggestions]; while building, the second
+        # item maps club -> its best (rank, name) instead.
+        self.root = [{}, {}]
+        self.limit = limit
+        self.club_to_league = club_to_league
+        self.league_order = league_order or {}
+        self.clubs_by_name = {}
+        for club in sorted(club_to_league):
+            for position, name in enumerate([club] + aliases.get(club, [])):
+                self.clubs_by_name[normalize(name)] = club
+                self._add(club, name, position)
+        self._finish(self.root)
+
+    def _add(self, club, name, position):
+        words = normalize(name).split()
+        for start in range(len(words)):
+            key = " ".join(words[start:])
+            # Whole name before a later word, the club's own name before its aliases,
+            # then by league (top flights first) and shorter names first.
+            league = self.league_order.get(self.club_to_league.get(club), len(self.league_order))
+            rank = (start > 0, position > 0, league, len(club), club)
+            node = self.root
+            for ch in key:
+                node = node[0].setdefault(ch, [{}, {}])
+                best = node[1].get(club)
+                if best is None or rank < best[0]:
+                    node[1][club] = (rank, name)
+
+    def _finish(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            ranked = sorted(node[1].items(), key=lambda item: item[1][0])[:self.limit]
+            node[1] = [
+                {"club": club, "league": self.club_to_league.get(club), "match": name}
+                for club, (_, name) in ranked
+            ]
+            stack.extend(node[0].values())
+
+    def suggest(self, prefix, limit=DEFAULT_SUGGESTIONS):
+        key = normalize(prefix)
+        if not key:
+            return []
+        node = self.root
+        for ch in key:
+            node = node[0].get(ch)
+            if node is None:
+                return []
+        return node[1][:limit]
+
+    def club_for(self, name):
+        # Club a matched name (e.g. an ES completion option) belongs to.
+        return self.clubs_by_name.get(normalize(name), name)
+
+def load_club_suggester(as_of=None):
+    # core/ modules import each other by bare name, as they do when run as scripts.
+    if CORE_DIR not in sys.path:
+        sys.path.insert(0, CORE_DIR)
+    from keywords_match import load_keyword_maps, club_aliases, DOMESTIC_COMPETITIONS
+    maps = load_keyword_maps(as_of=as_of or None)
+    names = maps["competition_names"]
+    league_order = {names[code]: i for i, code in enumerate(DOMESTIC_COMPETITIONS) if code in names}
+    return ClubSuggester(maps["club_to_league"], club_aliases(maps), league_order)
+
+def completion_search(index, prefix, size):
+    # ES alternative: the club_suggest completion field indexed by core/db_to_elastic.py.
+    return {
+        "index": index,
+        "size": 0,
+        "source": False,
+        "suggest": {"clubs": {"prefix": prefix, "completion": {"field": "club_suggest", "size": size, "skip_duplicates": True}}}
+    }
+
+def completion_values(response, suggester, limit):
+    seen = set()
+    suggestions = []
+    for option in response.get("suggest", {}).get("clubs", [{}])[0].get("options", []):
+        club = suggester.club_for(option["text"]) if suggester else option["text"]
+        if club in seen:
+            continue
+        seen.add(club)
+        league = suggester.club_to_league.get(club) if suggester else None
+        suggestions.append({"club": club, "league": league, "match": option["text"]})
+    return suggestions[:limit]
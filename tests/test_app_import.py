@@ -0,0 +1,32 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+@pytest.mark.parametrize("module", ["app", "app_async"])
+def test_import_needs_no_search_backend(module, tmp_path):
+    # Fresh interpreter with no ES_* or SEARCH_* settings, run away from any data/ folder:
+    # importing must not build a client, read credentials or open an index file.
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("ES_", "SEARCH_", "LOCAL_INDEX"))}
+    env["PYTHONPATH"] = ROOT
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}; assert not hasattr({module}, 'app'); print({module}.create_app)"],
+        cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_core_modules_are_loaded_once():
+    # core/ is imported by bare name everywhere; a "core.metrics" next to "metrics" would
+    # mean two module copies and two separate metric registries.
+    code = (
+        "import sys, app, app_async, local_search, metrics, day_storage; "
+        "dupes = [name for name in sys.modules if name.startswith('core.')]; "
+        "assert not dupes, dupes; "
+        "assert app.Metrics is app_async.Metrics is metrics.Metrics"
+    )
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import pickle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import clean_and_reorganize
+from article_record import ArticleRecord, NameTable
+from day_storage import read_day_file
+
+NAMES = NameTable(["Arsenal FC", "English Premier League 2024/25"])
+
+def round_trip(article, names=NAMES):
+    record = pickle.loads(pickle.dumps(ArticleRecord.from_article(article, names)))
+    return record.to_article(names)
+
+def test_scraped_article_round_trips():
+    article = {"title": "Arsenal win", "url": "https://example.com/1", "summary": "", "date": "2025-05-01T10:00:00+07:00", "source": "BBC",
+               "clubs": ["Arsenal FC"], "leagues": ["English Premier League 2024/25"], "main_league": "English Premier League 2024/25"}
+    assert list(round_trip(article).items()) == list(article.items())
+
+def test_none_values_missing_keys_and_key_order_are_kept():
+    articles = [
+        {"title": "Arsenal win", "url": "https://example.com/1", "summary": None, "date": "2025-05-01", "source": "BBC", "clubs": [], "leagues": []},
+        {"title": "Arsenal win", "url": "https://example.com/2", "date": "2025-05-01", "source": "BBC", "clubs": [], "leagues": []},
+        {"source": "BBC", "author": None, "title": "Arsenal win", "date": "2025-05-01", "url": "https://example.com/3", "summary": "", "clubs": [], "leagues": []},
+    ]
+    for article in articles:
+        assert list(round_trip(article).items()) == list(article.items())
+
+def test_names_outside_the_table_stay_strings():
+    # A worker must not hand out ids the parent process does not know.
+    article = {"title": "Arsenal win", "url": "https://example.com/1", "summary": "", "date": "2025-05-01", "source": "BBC",
+               "clubs": ["Arsenal FC", "Some New Club"], "leagues": ["Some New League"], "main_league": "Some New League"}
+    worker_names = NameTable(NAMES.names)
+    record = ArticleRecord.from_article(article, worker_names)
+    assert record.clubs == (0, "Some New Club")
+    assert len(worker_names.names) == 2
+    assert pickle.loads(pickle.dumps(record)).to_article(NameTable(NAMES.names)) == article
+
+def test_write_day_accepts_plain_dicts(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean_and_reorganize, "_NAMES", NAMES)
+    article = {"title": "Arsenal win", "url": "https://example.com/1", "summary": "", "date": "2025-05-01T10:00:00+07:00", "source": "BBC", "clubs": [], "leagues": []}
+    clean_and_reorganize.write_day(str(tmp_path), "2025-05-01", [article, ArticleRecord.from_article({**article, "source": "Sky"}, NAMES)])
+    saved = list(read_day_file(str(tmp_path / "2025-05-01.json")))
+    assert saved == [article, {**article, "source": "Sky"}]
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import club_registry
+import keywords_match
+
+def write_competition(source_dir, season, code, name, matches):
+    os.makedirs(os.path.join(source_dir, season), exist_ok=True)
+    with open(os.path.join(source_dir, season, f"{code}.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": name, "matches": [{"date": day, "team1": team1, "team2": team2} for day, team1, team2 in matches]}, f)
+
+def test_first_build_only_appears_when_complete(tmp_path, monkeypatch):
+    source_dir = str(tmp_path / "football.json")
+    path = str(tmp_path / "registry.sqlite3")
+    write_competition(source_dir, "2024-25", "en.1", "Premier League 2024/25", [("2024-08-16", "Arsenal FC", "Chelsea FC")])
+    write_competition(source_dir, "2024-25", "es.1", "Primera División 2024/25", [("2024-08-17", "Real Madrid CF", "Betis")])
+
+    seen = []
+    read_competition = club_registry._read_competition
+
+    def checking_read(job):
+        # A reader polling for the registry must not find it while files are still parsed.
+        seen.append(os.path.exists(path))
+        return read_competition(job)
+
+    # One parser process, so the patched reader runs here.
+    monkeypatch.setattr(club_registry.os, "cpu_count", lambda: 1)
+    monkeypatch.setattr(club_registry, "_read_competition", checking_read)
+    conn = club_registry.open_registry(path, source_dir)
+    assert seen == [False, False]
+    assert sorted(os.listdir(tmp_path)) == ["football.json", "registry.sqlite3"]
+    assert conn.execute("SELECT COUNT(*) FROM club_competitions").fetchone()[0] == 4
+    assert club_registry.club_history(conn, "Betis")[0][:3] == ("2024-25", "es.1", "Primera División 2024/25")
+    conn.close()
+
+def test_failed_first_build_leaves_no_registry(tmp_path, monkeypatch):
+    source_dir = str(tmp_path / "football.json")
+    path = str(tmp_path / "registry.sqlite3")
+    write_competition(source_dir, "2024-25", "en.1", "Premier League 2024/25", [("2024-08-16", "Arsenal FC", "Chelsea FC")])
+
+    def failing_read(job):
+        raise ValueError("broken file")
+
+    monkeypatch.setattr(club_registry.os, "cpu_count", lambda: 1)
+    monkeypatch.setattr(club_registry, "_read_competition", failing_read)
+    with pytest.raises(ValueError):
+        club_registry.open_registry(path, source_dir)
+    assert os.listdir(tmp_path) == ["football.json"]
+
+def build_fixture_registry(tmp_path):
+    source_dir = str(tmp_path / "football.json")
+    write_competition(source_dir, "2023-24", "en.1", "English Premier League 2023/24", [
+        ("2023-08-12", "Arsenal FC", "Burnley FC"),
+        ("2024-05-19", "Aston Villa FC", "Burnley FC"),
+    ])
+    write_competition(source_dir, "2024-25", "en.1", "English Premier League 2024/25", [
+        ("2024-08-17", "Arsenal FC", "Aston Villa FC"),
+        ("2025-05-25", "Ipswich Town FC", "Arsenal FC"),
+    ])
+    write_competition(source_dir, "2024-25", "it.1", "Italian Serie A 2024/25", [("2024-08-18", "Inter", "Roma")])
+    write_competition(source_dir, "2024-25", "uefa.cl", "UEFA Champions League 2024/25", [
+        ("2024-09-17", "Arsenal FC (ENG)", "Aston Villa FC (ENG)"),
+        ("2025-03-12", "Aston Villa FC (ENG)", "Inter (ITA)"),
+        ("2025-04-30", "Arsenal FC (ENG)", "Inter (ITA)"),
+    ])
+    registry_path = str(tmp_path / "registry.sqlite3")
+    club_registry.ingest_registry(source_dir, registry_path, workers=1).close()
+    return registry_path
+
+def test_keyword_maps_follow_the_season_and_european_run(tmp_path):
+    registry_path = build_fixture_registry(tmp_path)
+    maps_dir = str(tmp_path / "keyword_maps")
+
+    maps = keywords_match.load_keyword_maps(as_of="2025-05-10", registry_path=registry_path, maps_dir=maps_dir)
+    assert maps["season"] == "2024-25"
+    assert maps["keyword_to_club"]["arsenal"] == "Arsenal FC"
+    assert maps["keyword_to_club"]["inter milan"] == "FC Internazionale Milano"
+    assert maps["club_to_league"]["Ipswich Town FC"] == "English Premier League 2024/25"
+    assert "Burnley FC" not in maps["club_to_league"]
+    # Villa went out in March, more than EURO_ACTIVE_DAYS before as_of; Arsenal and Inter played on.
+    assert maps["club_to_euro"] == {"Arsenal FC": ["UEFA Champions League 2024/25"], "FC Internazionale Milano": ["UEFA Champions League 2024/25"]}
+    matcher = keywords_match.load_club_matcher(maps)
+    assert matcher("aston villa beat arsenal at villa park") == [("arsenal", "Arsenal FC"), ("aston villa", "Aston Villa FC"), ("villa", "Aston Villa FC")]
+
+    earlier = keywords_match.load_keyword_maps(as_of="2024-06-01", registry_path=registry_path, maps_dir=maps_dir)
+    assert earlier["season"] == "2023-24"
+    assert earlier["club_to_league"]["Burnley FC"] == "English Premier League 2023/24"
+    with pytest.raises(ValueError, match="No season"):
+        keywords_match.load_keyword_maps(as_of="2020-01-01", registry_path=registry_path, maps_dir=maps_dir)
+
+def test_compiled_maps_are_reused_until_the_registry_changes(tmp_path, monkeypatch):
+    registry_path = build_fixture_registry(tmp_path)
+    maps_dir = str(tmp_path / "keyword_maps")
+    first = keywords_match.load_keyword_maps(registry_path=registry_path, maps_dir=maps_dir)
+    assert os.listdir(maps_dir) == [os.path.basename(keywords_match.compiled_maps_path(first["fingerprint"], maps_dir))]
+
+    # A new process: nothing cached in memory, the compiled file is read back as it is.
+    monkeypatch.setattr(keywords_match, "_LOADED_MAPS", {})
+    monkeypatch.setattr(keywords_match, "compile_keyword_maps", lambda **kwargs: pytest.fail("maps compiled again"))
+    assert keywords_match.load_keyword_maps(registry_path=registry_path, maps_dir=maps_dir) == first
+    monkeypatch.undo()
+
+    source_dir = str(tmp_path / "football.json")
+    write_competition(source_dir, "2024-25", "de.1", "German Bundesliga 2024/25", [("2024-08-23", "FC Bayern München", "Bayer 04 Leverkusen")])
+    club_registry.ingest_registry(source_dir, registry_path, workers=1).close()
+    second = keywords_match.load_keyword_maps(registry_path=registry_path, maps_dir=maps_dir)
+    assert second["fingerprint"] != first["fingerprint"]
+    assert second["keyword_to_club"]["bayern munich"] == "FC Bayern München"
+    assert len(os.listdir(maps_dir)) == 2
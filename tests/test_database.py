@@ -0,0 +1,50 @@
+import os
+import sys
+
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import database
+from day_storage import write_day_file
+
+def article(number, day="2025-05-01"):
+    return {"title": f"Article {number}", "url": f"https://example.com/{day}/{number}", "summary": "", "date": f"{day}T10:00:00+07:00", "source": "BBC"}
+
+@pytest.fixture
+def mongo(monkeypatch, tmp_path):
+    db = mongomock.MongoClient()["football_news"]
+    monkeypatch.setattr(database, "collection", db["cleaned_articles"])
+    monkeypatch.setattr(database, "load_state", db["load_state"])
+    for day in ("2025-05-01", "2025-05-02"):
+        write_day_file(str(tmp_path / f"{day}.json"), [article(number, day) for number in range(3)])
+    return db
+
+def test_reload_is_idempotent(mongo, tmp_path):
+    assert database.load_days(str(tmp_path)) == 6
+    assert database.load_days(str(tmp_path)) == 0
+    assert mongo["cleaned_articles"].count_documents({}) == 6
+    assert mongo["load_state"].count_documents({}) == 2
+
+def test_failed_writes_leave_days_unloaded(mongo, tmp_path, monkeypatch):
+    def failing_bulk_write(requests, ordered=True):
+        raise BulkWriteError({
+            "writeErrors": [{"index": i, "code": 11000, "errmsg": "E11000 duplicate key"} for i in range(len(requests))],
+            "nUpserted": 0, "nMatched": 0
+        })
+
+    monkeypatch.setattr(mongo["cleaned_articles"], "bulk_write", failing_bulk_write)
+    assert database.load_days(str(tmp_path)) == 0
+    assert mongo["load_state"].count_documents({}) == 0
+
+    # Once Mongo accepts writes again, the same days are retried rather than skipped.
+    monkeypatch.undo()
+    monkeypatch.setattr(database, "collection", mongo["cleaned_articles"])
+    monkeypatch.setattr(database, "load_state", mongo["load_state"])
+    assert database.load_days(str(tmp_path)) == 6
+    assert mongo["load_state"].count_documents({}) == 2
+
+def test_batch_without_urls_is_skipped(mongo):
+    assert database.upsert_articles(mongo["cleaned_articles"], [{"title": "no url"}]) == (0, 0)
@@ -0,0 +1,77 @@
+import os
+import sys
+import warnings
+from datetime import datetime, timezone
+
+import pytest
+from dateutil import parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from date_normalizer import DateNormalizer, UTC7, summarize_counts
+
+SAMPLES = [
+    "2025-05-14T23:13:23",
+    "2025-05-14T23:13:23+00:00",
+    "2025-05-14T23:13:23.512000+02:00",
+    "2025-05-14",
+    "Sun, 25 May 2025 19:15:00 GMT",
+    "Sun, 25 May 2025 19:15:00 +0100",
+    "Sun, 25 May 2025 19:15:00 -0430",
+    "Sun, 25 May 2025 19:15:00 -0000",
+    "Sun, 25 May 2025 19:15:00 BST",
+    "Sun, 5 May 2025 09:15:00 GMT",
+    "25 May 2025 19:15 GMT",
+    "May 25, 2025 7:15 PM",
+]
+
+def old_convert_to_utc7(value):
+    # What the cleaner did before DateNormalizer: dateutil for everything, naive as UTC.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = parser.parse(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(UTC7)
+
+@pytest.mark.parametrize("value", SAMPLES)
+def test_same_instant_as_dateutil(value):
+    parsed = DateNormalizer().parse(value, "BBC")
+    assert parsed == old_convert_to_utc7(value)
+    assert parsed.utcoffset() == UTC7.utcoffset(None)
+
+def test_us_zone_names_get_their_offset():
+    # dateutil ignored "EDT" and took the time as UTC.
+    assert DateNormalizer().parse("Sun, 25 May 2025 19:15:00 EDT") == datetime(2025, 5, 25, 23, 15, tzinfo=timezone.utc)
+
+def test_am_pm_is_not_taken_for_a_zone():
+    normalizer = DateNormalizer()
+    assert normalizer.parse("Sun, 25 May 2025 07:15:00 PM") == datetime(2025, 5, 25, 19, 15, tzinfo=timezone.utc)
+    assert normalizer.parse("May 25, 2025 7:15 PM") == datetime(2025, 5, 25, 19, 15, tzinfo=timezone.utc)
+    assert normalizer.take_counts()["dateutil"] == 2
+
+def test_unreadable_values_are_none():
+    normalizer = DateNormalizer()
+    for value in ("", "   ", None, "not a date at all"):
+        assert normalizer.parse(value, "BBC") is None
+    assert normalizer.take_counts()["failed"] == 4
+
+def test_learned_parser_is_tried_first_and_relearned():
+    normalizer = DateNormalizer()
+    normalizer.parse("Sun, 25 May 2025 19:15:00 GMT", "Sky")
+    normalizer.parse("Mon, 26 May 2025 08:00:00 GMT", "Sky")
+    # The source switched format: the fallback still works and becomes the new guess.
+    assert normalizer.parse("2025-05-27T10:00:00", "Sky") == datetime(2025, 5, 27, 17, 0, tzinfo=UTC7)
+    normalizer.parse("2025-05-28T10:00:00", "Sky")
+    counts = normalizer.take_counts()
+    assert (counts["rfc822_fixed"], counts["iso"], counts["learned"]) == (2, 2, 2)
+    assert normalizer.counts == {}
+
+def test_parse_many_matches_parse():
+    values = SAMPLES + SAMPLES[:3] + [None, "garbage"]
+    sources = ["BBC" if i % 2 else "Guardian" for i in range(len(values))]
+    normalizer = DateNormalizer()
+    assert normalizer.parse_many(values, sources) == [DateNormalizer().parse(value, source) for value, source in zip(values, sources)]
+    counts = normalizer.take_counts()
+    assert counts["failed"] == 2
+    assert summarize_counts(counts).startswith(f"{len(values) - counts['repeated']} dates: ")
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import day_storage
+from clean_and_reorganize import load_day_file
+
+ARTICLES = [{"title": f"Arsenal win {number}", "url": f"https://example.com/{number}", "source": "BBC"} for number in range(3)]
+
+def test_short_writes_are_completed(tmp_path, monkeypatch):
+    write = os.write
+    calls = []
+
+    def short_write(fd, data):
+        calls.append(len(data))
+        return write(fd, bytes(data[:7]))
+
+    path = str(tmp_path / "2025-05-01.jsonl")
+    monkeypatch.setattr(day_storage.os, "write", short_write)
+    written = day_storage.append_articles(path, ARTICLES)
+    assert len(calls) > 1
+    assert os.path.getsize(path) == written
+    assert list(day_storage.read_day_file(path)) == ARTICLES
+
+def test_corrupt_lines_are_skipped(tmp_path, capsys):
+    path = tmp_path / "2025-05-01.jsonl"
+    lines = [day_storage.dumps_compact(article) for article in ARTICLES]
+    path.write_bytes(b"\n".join([lines[0], b"\xff\xfe not utf-8", lines[1], b"[1, 2]", b"{}{", lines[2], b'{"title": "torn']))
+    assert load_day_file(str(path)) == ARTICLES
+    assert capsys.readouterr().out.count("Skipping malformed line") == 4
+
+def test_unreadable_day_file_is_skipped(tmp_path):
+    path = tmp_path / "2025-05-01.json"
+    path.write_text('[{"title": "Arsenal win"', encoding="utf-8")
+    assert load_day_file(str(path)) is None
@@ -0,0 +1,113 @@
+import os
+import sys
+from datetime import datetime
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import db_to_elastic
+
+INDEX = "football_news_v1-2025-05"
+LOADED_AT = datetime(2025, 5, 2, 8, 0, 0)
+
+class FakeIndices:
+    # The calls incremental_sync makes, against one live May 2025 partition.
+    def __init__(self):
+        self.meta = {}
+
+    def exists_alias(self, name):
+        return True
+
+    def get_alias(self, name):
+        return {INDEX: {}}
+
+    def get_settings(self, index, name):
+        return {INDEX: {"settings": {}}}
+
+    def get_mapping(self, index):
+        return {INDEX: {"mappings": {"_meta": dict(self.meta)}}}
+
+    def put_mapping(self, index, meta=None, properties=None):
+        if meta is not None:
+            self.meta = meta
+
+class FakeES:
+    def __init__(self):
+        self.indices = FakeIndices()
+
+@pytest.fixture
+def sync(monkeypatch):
+    collection = mongomock.MongoClient()["football_news"]["cleaned_articles"]
+    es = FakeES()
+    sent = []
+    failures = []
+
+    def fake_bulk(client, actions, raise_on_error=True):
+        actions = list(actions)
+        sent.append([action["_source"]["url"] for action in actions])
+        errors = [{"index": {"_id": action["_id"], "error": {"type": "mapper_parsing_exception"}}} for action in actions if action["_source"]["url"] in failures]
+        return len(actions) - len(errors), errors
+
+    monkeypatch.setattr(db_to_elastic, "mongo_collection", collection)
+    monkeypatch.setattr(db_to_elastic, "es", es)
+    monkeypatch.setattr(db_to_elastic, "bulk", fake_bulk)
+    return collection, es, sent, failures
+
+def insert(collection, numbers, updated_at=LOADED_AT):
+    # One loader batch: every document gets the same updated_at.
+    collection.insert_many([
+        {"_id": ObjectId(f"{number:024x}"), "title": f"Article {number}", "url": f"https://example.com/{number}", "date": "2025-05-01T10:00:00+07:00", "updated_at": updated_at}
+        for number in numbers
+    ])
+
+def test_sync_query_is_strictly_after_the_mark():
+    mark_id = str(ObjectId(f"{5:024x}"))
+    assert db_to_elastic.sync_query(None, None) is None
+    assert db_to_elastic.sync_query(LOADED_AT, None) == {"updated_at": {"$gte": LOADED_AT}}
+    assert db_to_elastic.sync_query(LOADED_AT, mark_id) == {"$or": [
+        {"updated_at": {"$gt": LOADED_AT}},
+        {"updated_at": LOADED_AT, "_id": {"$gt": ObjectId(mark_id)}}
+    ]}
+
+def test_documents_sharing_the_mark_are_split_by_id(sync):
+    collection, es, sent, failures = sync
+    insert(collection, range(1, 4))
+    db_to_elastic.incremental_sync()
+    assert sent == [[f"https://example.com/{number}" for number in (1, 2, 3)]]
+    assert es.indices.meta["high_water_id"] == str(ObjectId(f"{3:024x}"))
+
+    # A second loader batch in the same second as the first, and a later one.
+    insert(collection, (4, 5))
+    insert(collection, (6,), datetime(2025, 5, 2, 9, 0, 0))
+    db_to_elastic.incremental_sync()
+    assert sent[-1] == [f"https://example.com/{number}" for number in (4, 5, 6)]
+    assert es.indices.meta["high_water_mark"] == "2025-05-02T09:00:00+00:00"
+
+def test_sync_with_nothing_new_sends_nothing_and_keeps_the_generation(sync):
+    collection, es, sent, failures = sync
+    insert(collection, range(1, 4))
+    db_to_elastic.incremental_sync()
+    meta = dict(es.indices.meta)
+    db_to_elastic.incremental_sync()
+    assert sent[-1] == []
+    assert es.indices.meta == meta
+
+def test_failed_documents_keep_the_mark(sync):
+    collection, es, sent, failures = sync
+    insert(collection, (1,))
+    db_to_elastic.incremental_sync()
+    meta = dict(es.indices.meta)
+
+    insert(collection, (2, 3), datetime(2025, 5, 3))
+    failures.append("https://example.com/2")
+    with pytest.raises(RuntimeError, match="high-water mark not advanced"):
+        db_to_elastic.incremental_sync()
+    assert es.indices.meta["high_water_mark"] == meta["high_water_mark"]
+    assert es.indices.meta["generation"] != meta["generation"]
+
+    failures.clear()
+    db_to_elastic.incremental_sync()
+    assert sent[-1] == ["https://example.com/2", "https://example.com/3"]
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import cache
+from app import create_app
+from local_search import build_local_index
+
+def articles(sources):
+    return [
+        {"title": f"Arsenal win {number}", "summary": "", "url": f"https://example.com/{number}", "date": f"2025-05-0{number % 9 + 1}T10:00:00+07:00",
+         "source": source, "clubs": ["Arsenal FC"], "leagues": ["English Premier League 2024/25"], "main_league": "English Premier League 2024/25"}
+        for number, source in enumerate(sources)
+    ]
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    path = str(tmp_path / "local_search.idx")
+    build_local_index(articles(["BBC", "Guardian"]), path)
+    # Away from data/: no club registry, so the app starts without suggestions.
+    monkeypatch.chdir(tmp_path)
+    app = create_app({"SEARCH_BACKEND": "local", "LOCAL_INDEX_PATH": path, "GENERATION_CHECK_SECONDS": 0})
+    searches = []
+    client = app.extensions["elasticsearch"]
+    search = client.search
+
+    def counting_search(**kwargs):
+        searches.append(kwargs)
+        return search(**kwargs)
+
+    monkeypatch.setattr(client, "search", counting_search)
+    app.searches = searches
+    app.index_path = path
+    return app
+
+def test_facet_lists_are_computed_once_per_generation(app):
+    client = app.test_client()
+    assert client.get("/api/sources").get_json() == ["BBC", "Guardian"]
+    assert client.get("/api/sources").get_json() == ["BBC", "Guardian"]
+    assert client.get("/api/clubs?league=English Premier League 2024/25").get_json() == ["Arsenal FC"]
+    assert len(app.searches) == 2
+
+    # A rebuilt index is a new generation: the old entries are never looked up again.
+    build_local_index(articles(["BBC", "Guardian", "SkySports"]), app.index_path)
+    assert client.get("/api/sources").get_json() == ["BBC", "Guardian", "SkySports"]
+    assert len(app.searches) == 3
+
+def test_etag_answers_revalidation_with_304(app):
+    client = app.test_client()
+    first = client.get("/api/sources")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    again = client.get("/api/sources", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    build_local_index(articles(["BBC"]), app.index_path)
+    changed = client.get("/api/sources", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json() == ["BBC"]
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache = cache.TTLCache(maxsize=2, ttl=10)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    assert ttl_cache.get("a") == 1
+    ttl_cache.set("c", 3)
+    # "b" was the least recently used entry.
+    assert (ttl_cache.get("a"), ttl_cache.get("b"), ttl_cache.get("c")) == (1, None, 3)
+    now[0] += 11
+    assert ttl_cache.get("a") is None
+
+def test_shared_backend_fills_the_local_cache():
+    class SharedStub:
+        def __init__(self):
+            self.values = {}
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def set(self, key, value, ttl):
+            self.values[key] = value
+
+    shared = SharedStub()
+    cache.TTLCache(shared=shared).set("leagues", ["English Premier League 2024/25"])
+    other_worker = cache.TTLCache(shared=shared)
+    assert other_worker.get("leagues") == ["English Premier League 2024/25"]
+    shared.values.clear()
+    assert other_worker.get("leagues") == ["English Premier League 2024/25"]
@@ -0,0 +1,144 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from app import create_app
+from local_search import build_local_index, tokenize
+
+UTC7 = timezone(timedelta(hours=7))
+CLUBS = [("Arsenal FC", "English Premier League 2024/25"), ("Chelsea FC", "English Premier League 2024/25"),
+         ("FC Barcelona", "Spanish La Liga 2024/25"), ("Real Madrid CF", "Spanish La Liga 2024/25")]
+CL = "UEFA Champions League 2024/25"
+TITLES = ["Arsenal beat Chelsea in the derby", "Barcelona sign new striker", "Champions League draw made",
+          "Real Madrid manager praises fans", "Transfer news round up", "Chelsea injury update before the derby"]
+
+def corpus():
+    # 72 articles over a week that spans two months; some posted in the late UTC evening,
+    # which is already the next day in UTC+7, the calendar date_from/date_to use.
+    start = datetime(2025, 4, 27, 9, 0, tzinfo=timezone.utc)
+    articles = []
+    for number in range(72):
+        moment = start + timedelta(hours=number * 2 + (number % 5) * 7)
+        club, league = CLUBS[number % len(CLUBS)]
+        clubs = sorted({club, CLUBS[(number + 1) % len(CLUBS)][0]}) if number % 3 == 0 else [club]
+        leagues = sorted({league} | ({CL} if number % 4 == 0 else set()))
+        zone = UTC7 if number % 2 else timezone.utc
+        articles.append({
+            "title": TITLES[number % len(TITLES)],
+            "summary": f"Match report number {number}: the derby ended {number % 4} - {number % 3}." if number % 6 else "",
+            "url": f"https://example.com/{number:03d}",
+            "date": moment.astimezone(zone).isoformat(),
+            "source": ["BBC", "SkySports", "Guardian"][number % 3],
+            "clubs": clubs,
+            "leagues": leagues,
+            "main_league": league,
+            "story_id": f"story-{number // 2}",
+        })
+    return articles
+
+ARTICLES = corpus()
+
+def moment(article):
+    return datetime.fromisoformat(article["date"])
+
+def phrase_in(text, query):
+    words, phrase = tokenize(text), tokenize(query)
+    return bool(phrase) and any(words[i:i + len(phrase)] == phrase for i in range(len(words) - len(phrase) + 1))
+
+def matches(article, filters):
+    # What the Elasticsearch query from search_common.py selects: a phrase in title or
+    # summary, or the exact value of a keyword field; term filters; UTC+7 day range.
+    query = filters.get("query", "")
+    if query and not (phrase_in(article["title"], query) or phrase_in(article["summary"], query) or query == article["source"]
+                      or query in article["clubs"] or query in article["leagues"] or query == article["main_league"]):
+        return False
+    if filters.get("league") and article["main_league"] != filters["league"]:
+        return False
+    if filters.get("club") and filters["club"] not in article["clubs"]:
+        return False
+    if filters.get("source") and article["source"] != filters["source"]:
+        return False
+    day = moment(article).astimezone(UTC7).date().isoformat()
+    if filters.get("date_from") and day < filters["date_from"]:
+        return False
+    if filters.get("date_to") and day > filters["date_to"]:
+        return False
+    return True
+
+def expected(filters, order):
+    selected = [article for article in ARTICLES if matches(article, filters)]
+    if order == "asc":
+        return sorted(selected, key=lambda article: (moment(article), article["url"]))
+    return sorted(selected, key=lambda article: (-moment(article).timestamp(), article["url"]))
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("local_search")
+    path = str(folder / "local_search.idx")
+    assert build_local_index(ARTICLES, path) == len(ARTICLES)
+    cwd = os.getcwd()
+    # Away from data/: no club registry, so the app starts without suggestions.
+    os.chdir(folder)
+    try:
+        yield create_app({"SEARCH_BACKEND": "local", "LOCAL_INDEX_PATH": path}).test_client()
+    finally:
+        os.chdir(cwd)
+
+CASES = [
+    {},
+    {"query": "derby"},
+    {"query": "champions league"},
+    {"query": "Real Madrid manager"},
+    {"query": "BBC"},
+    {"query": CL},
+    {"club": "Chelsea FC", "source": "BBC"},
+    {"league": "Spanish La Liga 2024/25", "query": "the"},
+    {"date_from": "2025-04-30", "date_to": "2025-05-02"},
+    {"date_from": "2025-05-01", "club": "Arsenal FC"},
+]
+
+@pytest.mark.parametrize("filters", CASES)
+@pytest.mark.parametrize("order", ["desc", "asc"])
+def test_cursor_pages_match_the_reference(client, filters, order):
+    want = expected(filters, order)
+    assert want or not filters
+    response = client.post("/search", json={**filters, "paginate": "cursor", "date": order}).get_json()
+    urls = []
+    while True:
+        urls += [hit["url"] for hit in response["results"]]
+        if not response["cursor"]:
+            break
+        response = client.post("/search", json={"cursor": response["cursor"]}).get_json()
+    assert urls == [article["url"] for article in want]
+
+@pytest.mark.parametrize("filters", CASES)
+def test_from_pages_match_the_reference(client, filters):
+    want = expected(filters, "desc")
+    page = client.post("/search", json={**filters, "from": 20}).get_json()
+    assert [hit["date"] for hit in page] == [article["date"] for article in want[20:40]]
+
+@pytest.mark.parametrize("filters", CASES)
+def test_facets_ignore_their_own_filter(client, filters):
+    facets = client.post("/search", json={**filters, "facets": True}).get_json()["facets"]
+    for facet, own_filter, values in (("clubs", "club", "clubs"), ("source", "source", None), ("main_league", "league", None)):
+        others = {key: value for key, value in filters.items() if key != own_filter}
+        counts = {}
+        for article in ARTICLES:
+            if matches(article, others):
+                for value in (article[values] if values else [article[facet]]):
+                    counts[value] = counts.get(value, 0) + 1
+        assert {bucket["key"]: bucket["count"] for bucket in facets[facet]} == counts
+
+def test_collapse_keeps_one_article_per_story(client):
+    hits = client.post("/search", json={"query": "derby", "collapse": True, "paginate": "cursor"}).get_json()["results"]
+    stories = [hit["story_id"] for hit in hits]
+    assert len(stories) == len(set(stories))
+    newest = {}
+    for article in expected({"query": "derby"}, "desc"):
+        newest.setdefault(article["story_id"], article["url"])
+    assert [hit["url"] for hit in hits] == [url for url in newest.values()][:len(hits)]
@@ -0,0 +1,114 @@
+import os
+import sys
+import asyncio
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import pipeline
+
+MAPS = ({"arsenal": "Arsenal FC"}, {"Arsenal FC": "Premier League"}, {}, {}, None)
+
+def article(number):
+    return {"title": f"Arsenal win match {number}", "url": f"https://example.com/{number}", "summary": "", "date": "2025-05-01T10:00:00", "source": "BBC"}
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The raw archive, URL index and feed state are relative paths.
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(pipeline.DATA_DIR)
+    monkeypatch.setattr(pipeline, "clean_maps_as_of", lambda day: ("2024-25", MAPS))
+    monkeypatch.setattr(pipeline, "collection", mongomock.MongoClient()["football_news"]["cleaned_articles"])
+    journal = pipeline.Journal(str(tmp_path / "pipeline.sqlite3"))
+    journal.append([article(number) for number in range(3)])
+    journal.close()
+    return tmp_path
+
+def run(workdir):
+    # No feeds: the run only replays what the journal holds.
+    asyncio.run(pipeline.run_pipeline(feeds={}, sinks=["mongo"], flush_seconds=0.01, journal_path=str(workdir / "pipeline.sqlite3")))
+
+def journal_state(workdir):
+    journal = pipeline.Journal(str(workdir / "pipeline.sqlite3"))
+    try:
+        return journal.checkpoint("mongo"), len(list(journal.pending(0)))
+    finally:
+        journal.close()
+
+def test_failing_sink_fails_the_run_and_keeps_the_batch(workdir, monkeypatch):
+    calls = []
+
+    def failing_write(articles):
+        calls.append(len(articles))
+        raise RuntimeError("mongo is down")
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(pipeline, "write_mongo", failing_write)
+    monkeypatch.setattr(pipeline.asyncio, "sleep", no_sleep)
+    with pytest.raises(RuntimeError, match="failed 6 times"):
+        run(workdir)
+    assert calls == [3] * pipeline.MAX_SINK_ATTEMPTS
+    assert journal_state(workdir) == (0, 3)
+
+    monkeypatch.undo()
+    monkeypatch.chdir(workdir)
+    monkeypatch.setattr(pipeline, "clean_maps_as_of", lambda day: ("2024-25", MAPS))
+    collection = mongomock.MongoClient()["football_news"]["cleaned_articles"]
+    monkeypatch.setattr(pipeline, "collection", collection)
+    run(workdir)
+    assert journal_state(workdir) == (3, 0)
+    assert sorted(doc["url"] for doc in collection.find()) == [f"https://example.com/{number}" for number in range(3)]
+
+class FakePartitions:
+    finished = 0
+
+    def __init__(self):
+        self.thawed = set()
+        self.written = set()
+
+    @classmethod
+    def current(cls):
+        return cls()
+
+    def index_for(self, doc):
+        self.written.add("2025-05")
+        return "football_news_v1-2025-05"
+
+    def take_written(self):
+        written, self.written = sorted(self.written), set()
+        return written
+
+    def finish(self):
+        FakePartitions.finished += 1
+
+def test_partitions_are_finished_once_per_run(monkeypatch):
+    bulk_calls = []
+    monkeypatch.setattr(pipeline, "Partitions", FakePartitions)
+    monkeypatch.setattr(pipeline, "bulk", lambda es, actions, raise_on_error: (bulk_calls.append(len(actions)) or len(actions), []))
+    monkeypatch.setattr(pipeline, "write_sync_meta", lambda index, mark: None)
+    FakePartitions.finished = 0
+
+    class NoJournal:
+        def checkpoint(self, stage):
+            return 0
+
+        def set_checkpoint(self, stage, seq):
+            pass
+
+        def prune(self, sinks):
+            pass
+
+    async def feed():
+        queue = asyncio.Queue()
+        for seq in range(1, 5):
+            queue.put_nowait((seq, {**article(seq), "date": "2025-05-01T10:00:00+07:00"}, "2025-05-01", 0.0))
+        queue.put_nowait(None)
+        return await pipeline.sink_stage(queue, NoJournal(), ["es"], 2, 0.01)
+
+    assert asyncio.run(feed()) == 4
+    assert bulk_calls == [2, 2]
+    assert FakePartitions.finished == 1
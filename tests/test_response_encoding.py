@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import gzip
+import html
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import response_encoding
+from response_encoding import accepted_encodings, choose_encoding, compress, dumps, server_timing
+from app import create_app
+from local_search import build_local_index
+
+def test_accept_encoding_negotiation():
+    assert accepted_encodings("gzip;q=0.5, br, identity;q=0") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+    size = response_encoding.MIN_COMPRESS_BYTES
+    assert choose_encoding("gzip", "application/json", size) == "gzip"
+    assert choose_encoding("gzip", "application/json", size - 1) is None
+    assert choose_encoding("gzip", "image/png", size) is None
+    assert choose_encoding("gzip;q=0", "application/json", size) is None
+    assert choose_encoding("", "application/json", size) is None
+    assert choose_encoding("*", "text/html", size) == ("br" if response_encoding.brotli else "gzip")
+
+def test_br_needs_the_brotli_package(monkeypatch):
+    monkeypatch.setattr(response_encoding, "brotli", None)
+    assert choose_encoding("br, gzip", "application/json", 4096) == "gzip"
+    assert choose_encoding("br", "application/json", 4096) is None
+
+def test_dumps_and_compress_round_trip():
+    payload = {"title": "Atlético de Madrid – \"derby\"", "clubs": ["Club Atlético de Madrid"], "count": 3}
+    assert json.loads(dumps(payload)) == payload
+    body = dumps(payload) * 50
+    # mtime=0: the same body always compresses to the same bytes (stable for caches).
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert gzip.decompress(compress(body, "gzip")) == body
+    assert server_timing([("serialize", 0.0012), ("compress", 0.0004)]) == "serialize;dur=1.20, compress;dur=0.40"
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / "local_search.idx")
+    build_local_index([
+        {"title": f"Arsenal beat Chelsea {number}", "summary": f"A <b>long</b> match report about the derby, part {number}. " * 4,
+         "url": f"https://example.com/{number}", "date": f"2025-05-{number % 28 + 1:02d}T10:00:00+07:00", "source": "BBC",
+         "clubs": ["Arsenal FC", f"Visiting Club Number {number:02d} FC"], "leagues": ["English Premier League 2024/25"], "main_league": "English Premier League 2024/25"}
+        for number in range(30)
+    ], path)
+    # Away from data/: no club registry, so the app starts without suggestions.
+    monkeypatch.chdir(tmp_path)
+    return create_app({"SEARCH_BACKEND": "local", "LOCAL_INDEX_PATH": path}).test_client()
+
+def test_search_is_compressed_when_accepted(client):
+    plain = client.post("/search", json={"query": "derby", "facets": True}, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    assert "serialize;dur=" in plain.headers["Server-Timing"]
+
+    zipped = client.post("/search", json={"query": "derby", "facets": True}, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert int(zipped.headers["Content-Length"]) == len(zipped.data) < len(plain.data)
+    assert "compress;dur=" in zipped.headers["Server-Timing"]
+    assert gzip.decompress(zipped.data) == plain.data
+
+    if response_encoding.brotli is not None:
+        squeezed = client.post("/search", json={"query": "derby", "facets": True}, headers={"Accept-Encoding": "br, gzip"})
+        assert squeezed.headers["Content-Encoding"] == "br"
+        assert response_encoding.brotli.decompress(squeezed.data) == plain.data
+
+def test_snippets_replace_the_summary_with_an_escaped_fragment(client):
+    full = client.post("/search", json={"query": "derby"}).get_json()
+    short = client.post("/search", json={"query": "derby", "snippets": True}).get_json()
+    assert [hit["url"] for hit in short] == [hit["url"] for hit in full]
+    summaries = {hit["url"]: hit["summary"] for hit in full}
+    for hit in short:
+        assert "<mark>derby</mark>" in hit["summary"]
+        assert "<b>" not in hit["summary"]
+        text = html.unescape(hit["summary"].replace("<mark>", "").replace("</mark>", ""))
+        assert text in summaries[hit["url"]] and len(text) < len(summaries[hit["url"]])
+
+def test_compressed_facet_list_keeps_a_weak_etag(client):
+    plain = client.get("/api/clubs", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/api/clubs", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] == f"W/{plain.headers['ETag']}"
+    # Either validator revalidates either encoding.
+    for etag in (plain.headers["ETag"], zipped.headers["ETag"]):
+        for encoding in ("identity", "gzip"):
+            assert client.get("/api/clubs", headers={"If-None-Match": etag, "Accept-Encoding": encoding}).status_code == 304
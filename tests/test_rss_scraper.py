@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import rss_scraper
+from day_storage import read_day_file
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Thu, 01 May 2025 10:00:00 GMT"
+
+def fixture_xml(name):
+    items = "".join(
+        f"<item><title>{name} story {i}</title><link>https://example.com/{name}/{i}</link>"
+        f"<description>Arsenal beat Chelsea in match {i}</description>"
+        f"<pubDate>Thu, 0{i + 1} May 2025 10:00:00 GMT</pubDate></item>"
+        for i in range(3)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'.encode("utf-8")
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        name = self.path.strip("/")
+        FeedHandler.requests.append((name, self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")))
+        if name == "slow":
+            # The client has given up by now; answering would only hit a closed socket.
+            time.sleep(2)
+            return
+        if name == "broken":
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = fixture_xml(name)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FeedHandler.requests = []
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # DATA_DIR, the URL index and the feed state are relative paths.
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(rss_scraper.DATA_DIR)
+    return tmp_path
+
+def saved_articles(folder):
+    data_dir = os.path.join(folder, rss_scraper.DATA_DIR)
+    return {name: list(read_day_file(os.path.join(data_dir, name))) for name in sorted(os.listdir(data_dir))}
+
+def test_conditional_get_returns_304_with_stored_validators(base_url):
+    feeds = {"bbc": f"{base_url}/bbc", "sky": f"{base_url}/sky"}
+    first = asyncio.run(rss_scraper.fetch_all_feeds(feeds, {}))
+    assert first["bbc"][0] == 200
+    assert first["bbc"][2:] == (ETAG, LAST_MODIFIED)
+
+    state = {"bbc": {"etag": ETAG, "modified": None}, "sky": {"etag": None, "modified": LAST_MODIFIED}}
+    second = asyncio.run(rss_scraper.fetch_all_feeds(feeds, state))
+    assert second["bbc"] == (304, None, ETAG, None)
+    assert second["sky"] == (304, None, None, LAST_MODIFIED)
+    assert ("bbc", ETAG, None) in FeedHandler.requests
+    assert ("sky", None, LAST_MODIFIED) in FeedHandler.requests
+
+def test_one_failing_feed_does_not_stop_the_others(base_url):
+    feeds = {"bbc": f"{base_url}/bbc", "slow": f"{base_url}/slow", "broken": f"{base_url}/broken", "sky": f"{base_url}/sky"}
+    start = time.perf_counter()
+    results = asyncio.run(rss_scraper.fetch_all_feeds(feeds, {}, timeout=0.5))
+    assert time.perf_counter() - start < 1.5
+    assert results["slow"] is None
+    assert results["broken"] is None
+    assert results["bbc"][0] == 200
+    assert results["sky"][0] == 200
+
+def test_second_run_saves_nothing_and_keeps_validators(base_url, workdir):
+    feeds = {"bbc": f"{base_url}/bbc", "broken": f"{base_url}/broken"}
+    rss_scraper.run_all_rss_scrapers_async(feeds)
+    state = rss_scraper.load_feed_state()
+    assert state == {"bbc": {"etag": ETAG, "modified": LAST_MODIFIED}}
+    before = saved_articles(workdir)
+
+    rss_scraper.run_all_rss_scrapers_async(feeds)
+    assert ("bbc", ETAG, LAST_MODIFIED) in FeedHandler.requests
+    assert saved_articles(workdir) == before
+
+def test_sequential_and_concurrent_runs_save_the_same_articles(base_url, tmp_path, monkeypatch):
+    feeds = {name: f"{base_url}/{name}" for name in ("bbc", "sky", "guardian", "broken")}
+    results = {}
+    for mode in ("sequential", "concurrent"):
+        folder = tmp_path / mode
+        folder.mkdir()
+        monkeypatch.chdir(folder)
+        os.makedirs(rss_scraper.DATA_DIR)
+        if mode == "sequential":
+            rss_scraper.run_all_rss_scrapers(feeds)
+        else:
+            rss_scraper.run_all_rss_scrapers_async(feeds)
+        results[mode] = saved_articles(folder)
+
+    assert results["sequential"] == results["concurrent"]
+    assert sum(len(articles) for articles in results["concurrent"].values()) == 9
@@ -0,0 +1,53 @@
+import os
+import sys
+import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from story_clusters import assign_story_ids
+from day_storage import read_day_file, write_day_file
+
+STORIES = [
+    "arsenal agree new contract with defender gabriel until 2029",
+    "chelsea sign young striker from brazilian club palmeiras",
+    "liverpool manager praises fans after dramatic late winner",
+    "bayern munich confirm injury to goalkeeper ahead of final",
+]
+
+def write_days(folder):
+    # Every story is retold by another outlet on the next day.
+    for offset in range(6):
+        day = f"2025-05-{offset + 1:02d}"
+        articles = [
+            {"title": STORIES[(offset + shift) % len(STORIES)] + f" report {source}", "summary": "", "url": f"https://{source}/{day}/{shift}",
+             "date": f"{day}T10:00:00+07:00", "source": source}
+            for shift, source in ((0, "bbc"), (-1, "sky"))
+        ]
+        write_day_file(os.path.join(folder, f"{day}.json"), articles)
+
+def story_ids(folder):
+    return {name: [article["story_id"] for article in read_day_file(os.path.join(folder, name))] for name in sorted(os.listdir(folder))}
+
+def test_rebuilt_days_match_a_full_pass(tmp_path):
+    full = str(tmp_path / "full")
+    incremental = str(tmp_path / "incremental")
+    os.makedirs(full)
+    write_days(full)
+    assign_story_ids(full)
+    shutil.copytree(full, incremental)
+
+    for folder in (full, incremental):
+        path = os.path.join(folder, "2025-05-03.json")
+        articles = list(read_day_file(path))
+        articles[0]["title"] = "completely unrelated transfer rumour about a goalkeeper"
+        write_day_file(path, articles)
+
+    assert assign_story_ids(full) > 0
+    assign_story_ids(incremental, days={"2025-05-03"})
+    assert story_ids(incremental) == story_ids(full)
+
+def test_no_rebuilt_days_reads_nothing(tmp_path, capsys):
+    write_days(str(tmp_path))
+    assign_story_ids(str(tmp_path))
+    assert assign_story_ids(str(tmp_path), days=set()) == 0
+    assert "Story ids: 0 articles" in capsys.readouterr().out